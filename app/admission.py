@@ -0,0 +1,214 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+
+from app.config.settings import get_settings
+from app.metrics import (
+    admission_in_flight,
+    admission_queue_depth,
+    admission_rejections_total,
+)
+from app.responses import error_response
+
+settings = get_settings()
+
+HOLD_TIME_SMOOTHING = 0.2
+
+
+class OverloadedError(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._hold_time = 0.0
+        # waiters may belong to different event loops, e.g. one per worker
+        # thread, so each is woken through its own loop
+        self._waiters: deque[tuple] = deque()
+        self._lock = threading.Lock()
+        self._in_flight = admission_in_flight.labels(name)
+        self._queue_depth = admission_queue_depth.labels(name)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def slot(self, patient: bool = False):
+        if patient:
+            await self.acquire_patiently()
+        else:
+            await self.acquire()
+
+        started_at = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started_at)
+
+    async def acquire(self):
+        with self._lock:
+            if self._active < self.max_concurrent and not self._waiters:
+                self._active += 1
+                self._in_flight.set(self._active)
+                return
+
+            if len(self._waiters) >= self.max_queue:
+                raise self._reject('queue_full')
+
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+            self._queue_depth.set(len(self._waiters))
+
+        try:
+            await self._wait(loop, waiter)
+        except TimeoutError:
+            with self._lock:
+                raise self._reject('timeout') from None
+
+    async def acquire_patiently(self):
+        # bulk work backs off instead of failing while requests keep the
+        # limiter busy
+        while True:
+            try:
+                return await self.acquire()
+            except OverloadedError as exc:
+                await asyncio.sleep(exc.retry_after)
+
+    def release(self, hold_time: float | None = None):
+        with self._lock:
+            if hold_time is not None:
+                self._hold_time += HOLD_TIME_SMOOTHING * (
+                    hold_time - self._hold_time
+                )
+
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                self._queue_depth.set(len(self._waiters))
+
+                try:
+                    # the slot is handed over, so active stays the same
+                    loop.call_soon_threadsafe(self._wake, waiter)
+                    return
+                except RuntimeError:
+                    # the waiter's event loop is already closed
+                    continue
+
+            self._active -= 1
+            self._in_flight.set(self._active)
+
+    def retry_after(self) -> int:
+        drain_time = (
+            max(self._hold_time, 0.1)
+            * (len(self._waiters) + 1)
+            / max(self.max_concurrent, 1)
+        )
+
+        return max(math.ceil(drain_time), 1)
+
+    async def _wait(self, loop, waiter: asyncio.Future):
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException:
+            with self._lock:
+                queued = (loop, waiter) in self._waiters
+
+                if queued:
+                    self._waiters.remove((loop, waiter))
+                    self._queue_depth.set(len(self._waiters))
+
+            # a slot handed over right before the timeout must be returned
+            if not queued and waiter.done() and not waiter.cancelled():
+                self.release()
+
+            raise
+
+    def _wake(self, waiter: asyncio.Future):
+        if waiter.done():
+            self.release()
+            return
+
+        waiter.set_result(None)
+
+    def _reject(self, reason: str) -> OverloadedError:
+        admission_rejections_total.labels(self.name, reason).inc()
+
+        return OverloadedError(reason, self.retry_after())
+
+
+class InFlightLimitMiddleware:
+    def __init__(
+        self,
+        app,
+        max_in_flight: int | None = None,
+        exempt_paths: tuple[str, ...] = ('/metrics',),
+    ):
+        if max_in_flight is None:
+            max_in_flight = get_settings().max_in_flight_requests
+
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.exempt_paths = exempt_paths
+        self.in_flight = 0
+        self._rejections = admission_rejections_total.labels(
+            'http', 'in_flight'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope['type'] != 'http'
+            or self.max_in_flight <= 0
+            or scope['path'] in self.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.max_in_flight:
+            self._rejections.inc()
+            response = error_response(
+                'service unavailable error',
+                {},
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+
+hashing_limiter = AdmissionLimiter(
+    'hashing',
+    max_concurrent=settings.hashing_max_concurrent,
+    max_queue=settings.hashing_queue_size,
+    queue_timeout=settings.hashing_queue_timeout,
+)
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
+
+from app.config.settings import get_settings
+from app.config.sharding import current_shard, current_tenant_id
+from app.metrics import cache_requests_total
+
+settings = get_settings()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float, name: str = 'default'):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter = cache_requests_total.labels(name, 'hit')
+        self._miss_counter = cache_requests_total.labels(name, 'miss')
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is None:
+                self.misses += 1
+                self._miss_counter.inc()
+                return default
+
+            expires_at, value = item
+
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                self._miss_counter.inc()
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            self._hit_counter.inc()
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+
+def user_cache_key(user_id: int) -> tuple[str, str, int]:
+    # ids are only unique within a shard, and users only visible to their
+    # own tenant
+    return current_shard(), current_tenant_id(), user_id
+
+
+def detached_copy(instance):
+    # a session-free copy, so cached rows never expire or lazy load
+    mapper = inspect(instance).mapper
+    copy = mapper.class_manager.new_instance()
+
+    for attribute in mapper.column_attrs:
+        set_committed_value(
+            copy, attribute.key, getattr(instance, attribute.key)
+        )
+
+    make_transient_to_detached(copy)
+
+    return copy
+
+
+token_cache = TTLCache(
+    maxsize=settings.token_cache_maxsize,
+    ttl=settings.token_cache_ttl,
+    name='token',
+)
+user_cache = TTLCache(
+    maxsize=settings.user_cache_maxsize,
+    ttl=settings.user_cache_ttl,
+    name='user',
+)
@@ -0,0 +1,94 @@
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from argon2 import PasswordHasher
+
+from app.config.settings import get_settings
+
+HASHING_TARGET_MS = 250
+CALIBRATION_SAMPLES = 3
+# the floor recommended by OWASP for argon2id, in kibibytes, which pairs it
+# with two passes; one pass needs 46 MiB
+MIN_MEMORY_COST = 19 * 1024
+ONE_PASS_MEMORY_COST = 46 * 1024
+MAX_TIME_COST = 64
+
+
+@dataclass(frozen=True)
+class Argon2Parameters:
+    time_cost: int
+    memory_cost: int
+    parallelism: int
+
+    def as_env(self) -> str:
+        return (
+            f'ARGON2_TIME_COST={self.time_cost}\n'
+            f'ARGON2_MEMORY_COST={self.memory_cost}\n'
+            f'ARGON2_PARALLELISM={self.parallelism}\n'
+        )
+
+
+def measure_hash_time(
+    parameters: Argon2Parameters, samples: int = CALIBRATION_SAMPLES
+) -> float:
+    hasher = PasswordHasher(
+        time_cost=parameters.time_cost,
+        memory_cost=parameters.memory_cost,
+        parallelism=parameters.parallelism,
+    )
+    timings = []
+
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        hasher.hash('calibration-password')
+        timings.append(time.perf_counter() - started_at)
+
+    return statistics.median(timings)
+
+
+def min_time_cost(memory_cost: int) -> int:
+    return 1 if memory_cost >= ONE_PASS_MEMORY_COST else 2
+
+
+def calibrate(
+    target: float,
+    max_memory_cost: int | None = None,
+    parallelism: int | None = None,
+    measure: Callable[[Argon2Parameters], float] = measure_hash_time,
+) -> tuple[Argon2Parameters, float]:
+    if max_memory_cost is None:
+        max_memory_cost = get_settings().argon2_memory_cost
+
+    if parallelism is None:
+        parallelism = get_settings().argon2_parallelism
+
+    # memory first, it is what makes guessing expensive on GPUs, halved
+    # until a single pass fits the budget
+    memory_cost = max(max_memory_cost, 8 * parallelism)
+
+    while True:
+        parameters = Argon2Parameters(
+            min_time_cost(memory_cost), memory_cost, parallelism
+        )
+        elapsed = measure(parameters)
+
+        if elapsed <= target or memory_cost // 2 < MIN_MEMORY_COST:
+            break
+
+        memory_cost //= 2
+
+    # then the rest of the budget goes to extra passes over that memory
+    while parameters.time_cost < MAX_TIME_COST:
+        candidate = Argon2Parameters(
+            parameters.time_cost + 1, memory_cost, parallelism
+        )
+        candidate_elapsed = measure(candidate)
+
+        if candidate_elapsed > target:
+            break
+
+        parameters, elapsed = candidate, candidate_elapsed
+
+    return parameters, elapsed
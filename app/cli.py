@@ -0,0 +1,216 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from functools import partial
+
+from app.calibration import (
+    CALIBRATION_SAMPLES,
+    HASHING_TARGET_MS,
+    calibrate,
+    measure_hash_time,
+)
+from app.config.database import (
+    async_shard_sessions,
+    dispose_async_engines,
+    shard_sessions,
+)
+from app.config.settings import get_settings
+from app.config.sharding import TENANT_SHARDS, current_shard, current_tenant
+from app.export import EXPORT_FORMATS, iter_export
+from app.hashing import HashingEngine
+from app.importer import aiter_import, encode_event
+from app.repositories.user_repository import UserRepository
+from app.tenancy import TENANT_PATTERN
+
+
+def tenant_name(value: str) -> str:
+    if not TENANT_PATTERN.fullmatch(value):
+        raise argparse.ArgumentTypeError(
+            'must be lowercase letters, digits and dashes'
+        )
+
+    return value
+
+
+def export_users(args):
+    output = (
+        open(args.output, 'w', encoding='utf-8', newline='')
+        if args.output
+        else sys.stdout
+    )
+
+    try:
+        with shard_sessions[current_shard()]() as session:
+            for chunk in iter_export(
+                session, args.format, args.since, args.batch_size
+            ):
+                output.write(chunk)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+async def import_users(args):
+    # a dedicated pool, so an import never queues behind request hashing
+    engine = HashingEngine(
+        max_workers=args.workers,
+        max_pending=args.workers,
+        timeout=get_settings().hashing_timeout,
+    )
+    source = (
+        open(args.input, encoding='utf-8') if args.input != '-' else sys.stdin
+    )
+
+    try:
+        async with async_shard_sessions[current_shard()]() as session:
+            # nothing else hashes in this process, no admission needed
+            async for event in aiter_import(
+                session, source, args.batch_size, engine, limiter=None
+            ):
+                sys.stdout.write(encode_event(event))
+                sys.stdout.flush()
+    finally:
+        engine.shutdown()
+        await dispose_async_engines()
+
+        if source is not sys.stdin:
+            source.close()
+
+
+def grant_admin(args):
+    with shard_sessions[current_shard()]() as session:
+        user = UserRepository(session).set_admin(args.email, not args.revoke)
+
+    if user is None:
+        sys.exit(
+            f'no user with the email {args.email} in the {args.tenant} tenant'
+        )
+
+    role = 'an admin' if user.is_admin else 'not an admin'
+    sys.stdout.write(f'{user.email} is {role}\n')
+
+
+def pin_tenants(args):
+    # run before appending a shard, so no tenant moves away from its users
+    tenant_shards = dict(TENANT_SHARDS)
+
+    for shard, session_factory in shard_sessions.items():
+        with session_factory() as session:
+            for tenant in UserRepository(session).get_tenant_ids():
+                tenant_shards.setdefault(tenant, shard)
+
+    pairs = ','.join(
+        f'{tenant}={shard}' for tenant, shard in sorted(tenant_shards.items())
+    )
+    sys.stdout.write(f'TENANT_SHARDS={pairs}\n')
+
+
+def calibrate_hashing(args):
+    parameters, elapsed = calibrate(
+        args.target_ms / 1000,
+        args.max_memory_cost,
+        args.parallelism,
+        partial(measure_hash_time, samples=args.samples),
+    )
+
+    # ready to be appended to the .env file of this machine
+    sys.stdout.write(f'# {elapsed * 1000:.1f} ms per hash\n')
+    sys.stdout.write(parameters.as_env())
+
+
+def main(argv: list[str] | None = None):
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog='python -m app.cli')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser(
+        'export-users', help='stream every user as NDJSON or CSV'
+    )
+    export_parser.add_argument(
+        '--format', choices=EXPORT_FORMATS, default='ndjson'
+    )
+    export_parser.add_argument(
+        '--since',
+        type=datetime.fromisoformat,
+        help='only users updated at or after this ISO 8601 timestamp',
+    )
+    export_parser.add_argument(
+        '--batch-size', type=int, default=settings.export_batch_size
+    )
+    export_parser.add_argument('--output', help='file to write, or stdout')
+    export_parser.add_argument(
+        '--tenant', type=tenant_name, default=settings.default_tenant
+    )
+    export_parser.set_defaults(handler=export_users)
+
+    import_parser = commands.add_parser(
+        'import-users', help='create users from an NDJSON file'
+    )
+    import_parser.add_argument('input', help='NDJSON file, or - for stdin')
+    import_parser.add_argument(
+        '--batch-size', type=int, default=settings.import_batch_size
+    )
+    import_parser.add_argument(
+        '--workers', type=int, default=settings.hashing_workers
+    )
+    import_parser.add_argument(
+        '--tenant', type=tenant_name, default=settings.default_tenant
+    )
+    import_parser.set_defaults(handler=import_users)
+
+    admin_parser = commands.add_parser(
+        'grant-admin', help='let a user manage the other users'
+    )
+    admin_parser.add_argument('email')
+    admin_parser.add_argument(
+        '--revoke', action='store_true', help='take the admin role away'
+    )
+    admin_parser.add_argument(
+        '--tenant', type=tenant_name, default=settings.default_tenant
+    )
+    admin_parser.set_defaults(handler=grant_admin)
+
+    pin_parser = commands.add_parser(
+        'pin-tenants',
+        help='print TENANT_SHARDS keeping every tenant on its current shard',
+    )
+    pin_parser.set_defaults(handler=pin_tenants)
+
+    calibrate_parser = commands.add_parser(
+        'calibrate-hashing',
+        help='pick argon2 costs that fit a latency budget on this machine',
+    )
+    calibrate_parser.add_argument(
+        '--target-ms', type=float, default=HASHING_TARGET_MS
+    )
+    calibrate_parser.add_argument(
+        '--max-memory-cost',
+        type=int,
+        default=settings.argon2_memory_cost,
+        help='upper bound for the memory cost, in kibibytes',
+    )
+    calibrate_parser.add_argument(
+        '--parallelism', type=int, default=settings.argon2_parallelism
+    )
+    calibrate_parser.add_argument(
+        '--samples', type=int, default=CALIBRATION_SAMPLES
+    )
+    calibrate_parser.set_defaults(handler=calibrate_hashing)
+
+    args = parser.parse_args(argv)
+
+    # the tenant picks the shard, and scopes every query
+    token = current_tenant.set(getattr(args, 'tenant', None))
+
+    try:
+        result = args.handler(args)
+
+        if asyncio.iscoroutine(result):
+            asyncio.run(result)
+    finally:
+        current_tenant.reset(token)
+
+
+if __name__ == '__main__':
+    main()
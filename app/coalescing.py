@@ -0,0 +1,109 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.metrics import single_flight_calls_total
+
+_LEADER_CANCELLED = object()
+
+
+class SingleFlight:
+    # concurrent calls for the same key wait for the first one instead of
+    # repeating it, e.g. a client fanning out requests with one token
+    def __init__(self, name: str):
+        self.executed = 0
+        self.coalesced = 0
+        self._executed_counter = single_flight_calls_total.labels(
+            name, 'executed'
+        )
+        self._coalesced_counter = single_flight_calls_total.labels(
+            name, 'coalesced'
+        )
+        self._flights: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._flights.get(key)
+            is_leader = future is None
+
+            if is_leader:
+                future = self._flights[key] = Future()
+                self._record_executed()
+            else:
+                self._record_coalesced()
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = call()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def stats(self) -> dict:
+        return {
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._flights),
+        }
+
+    def _record_executed(self):
+        self.executed += 1
+        self._executed_counter.inc()
+
+    def _record_coalesced(self):
+        self.coalesced += 1
+        self._coalesced_counter.inc()
+
+
+class AsyncSingleFlight(SingleFlight):
+    async def do(
+        self, key: Hashable, call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        while True:
+            future = self._flights.get(key)
+
+            if future is None:
+                return await self._lead(key, call)
+
+            self._record_coalesced()
+            # a cancelled follower must not cancel the call the others wait on
+            result = await asyncio.shield(future)
+
+            # the leader went away, one of the followers calls again
+            if result is not _LEADER_CANCELLED:
+                return result
+
+    async def _lead(
+        self, key: Hashable, call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        future = self._flights[key] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._record_executed()
+
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # only the leader was cancelled, the followers still want a result
+            future.set_result(_LEADER_CANCELLED)
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # retrieved here, nobody may be waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
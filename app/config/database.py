@@ -1,25 +1,245 @@
-import os
-
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import registry, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-from app.helpers import load_env
+from app.config.routing import ReplicaSet, RoutingSession
+from app.config.settings import get_settings
+from app.config.sharding import PRIMARY_SHARD, SHARD_URLS, current_shard
+from app.instrumentation import instrument_engine
+from app.metrics import instrument_pool
 
 table_registry = registry()
 
-load_env()
+settings = get_settings()
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+
+    if url.drivername in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+
+    return url.render_as_string(hide_password=False)
+
+
+def sqlite_pragmas() -> dict:
+    return {
+        'journal_mode': settings.sqlite_journal_mode,
+        'synchronous': settings.sqlite_synchronous,
+        'busy_timeout': settings.sqlite_busy_timeout,
+        'cache_size': settings.sqlite_cache_size,
+        'mmap_size': settings.sqlite_mmap_size,
+        'temp_store': settings.sqlite_temp_store,
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # all but journal_mode only last as long as the connection
+    cursor = dbapi_connection.cursor()
+
+    for name, value in sqlite_pragmas().items():
+        cursor.execute(f'PRAGMA {name}={value}')
+
+    cursor.close()
+
+
+def engine_options(database_url: str, options: dict) -> dict:
+    url = make_url(database_url)
 
-SQLALCHEMY_DATABASE_URL = os.getenv('DATABASE_URL')
+    if url.get_backend_name() == 'sqlite':
+        options = {'connect_args': {'check_same_thread': False}, **options}
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={'check_same_thread': False}
+        # in-memory databases live and die with their single connection
+        if url.database in {None, '', ':memory:'}:
+            return options
+
+    # only the queue pools take sizing, not e.g. NullPool or StaticPool
+    if not issubclass(options.get('poolclass', QueuePool), QueuePool):
+        return options
+
+    return {
+        'pool_size': settings.database_pool_size,
+        'max_overflow': settings.database_max_overflow,
+        'pool_timeout': settings.database_pool_timeout,
+        'pool_pre_ping': settings.database_pool_pre_ping,
+        **options,
+    }
+
+
+def create_database_engine(database_url: str, **options) -> Engine:
+    engine = create_engine(
+        database_url, **engine_options(database_url, options)
+    )
+
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', set_sqlite_pragmas)
+
+    return engine
+
+
+def create_async_database_engine(database_url: str, **options) -> AsyncEngine:
+    # aiosqlite is not pooled by default, every session would reconnect
+    # and replay the pragmas
+    if make_url(database_url).get_backend_name() == 'sqlite':
+        options.setdefault('poolclass', AsyncAdaptedQueuePool)
+
+    engine = create_async_engine(
+        database_url, **engine_options(database_url, options)
+    )
+
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas)
+
+    return engine
+
+
+SQLALCHEMY_DATABASE_URL = settings.database_url
+SQLALCHEMY_ASYNC_DATABASE_URL = (
+    settings.async_database_url
+    or get_async_database_url(SQLALCHEMY_DATABASE_URL)
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
+replica_engines = [
+    create_database_engine(url) for url in settings.database_replica_urls
+]
+replicas = ReplicaSet(
+    replica_engines,
+    settings.database_replica_selection,
+    settings.database_replica_retry_interval,
+)
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+    class_=RoutingSession,
+    info={'replicas': replicas},
+)
+
+async_engine = create_async_database_engine(SQLALCHEMY_ASYNC_DATABASE_URL)
+async_replica_engines = [
+    create_async_database_engine(get_async_database_url(url))
+    for url in settings.database_replica_urls
+]
+async_replicas = ReplicaSet(
+    [replica.sync_engine for replica in async_replica_engines],
+    settings.database_replica_selection,
+    settings.database_replica_retry_interval,
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    sync_session_class=RoutingSession,
+    info={'replicas': async_replicas},
+)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+instrument_pool(engine, 'sync')
+instrument_pool(async_engine.sync_engine, 'async')
+
+for index, replica in enumerate(replica_engines):
+    instrument_engine(replica)
+    instrument_pool(replica, f'sync-replica-{index}')
+
+for index, replica in enumerate(async_replica_engines):
+    instrument_engine(replica.sync_engine)
+    instrument_pool(replica.sync_engine, f'async-replica-{index}')
+
+# the replicas above only serve the primary shard
+shard_engines = {PRIMARY_SHARD: engine}
+async_shard_engines = {PRIMARY_SHARD: async_engine}
+shard_sessions = {PRIMARY_SHARD: SessionLocal}
+async_shard_sessions = {PRIMARY_SHARD: AsyncSessionLocal}
+
+for name, url in SHARD_URLS.items():
+    if name == PRIMARY_SHARD:
+        continue
+
+    shard_engines[name] = create_database_engine(url)
+    async_shard_engines[name] = create_async_database_engine(
+        get_async_database_url(url)
+    )
+    shard_sessions[name] = sessionmaker(
+        autoflush=False, expire_on_commit=False, bind=shard_engines[name]
+    )
+    async_shard_sessions[name] = async_sessionmaker(
+        bind=async_shard_engines[name],
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    instrument_engine(shard_engines[name])
+    instrument_engine(async_shard_engines[name].sync_engine)
+    instrument_pool(shard_engines[name], f'sync-{name}')
+    instrument_pool(async_shard_engines[name].sync_engine, f'async-{name}')
+
+sync_engines = [*shard_engines.values(), *replica_engines]
+async_engines = [*async_shard_engines.values(), *async_replica_engines]
+
+
+async def dispose_async_engines():
+    for database_engine in async_engines:
+        await database_engine.dispose()
 
+
+class LazySession:
+    # the session is only built, and a connection only checked out, once a
+    # dependency actually uses it; requests answered from the caches or the
+    # token claims never touch the pool
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._session = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = self._session_factory()
+
+        return getattr(self._session, name)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+class LazyAsyncSession(LazySession):
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+# FastAPI caches a dependency for the whole request, so the current user
+# lookup and the route body share one session, and with it one connection;
+# the session belongs to the shard of the request's tenant
 def get_session():
-    session = SessionLocal()
+    session = LazySession(shard_sessions[current_shard()])
     try:
         yield session
     finally:
         session.close()
+
+
+async def get_async_session():
+    session = LazyAsyncSession(async_shard_sessions[current_shard()])
+    try:
+        yield session
+    finally:
+        await session.close()
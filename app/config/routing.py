@@ -0,0 +1,99 @@
+import itertools
+import threading
+import time
+from typing import Literal
+
+from sqlalchemy import Engine, Select, event
+from sqlalchemy.orm import Session
+
+ReplicaSelection = Literal['round_robin', 'least_busy']
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        engines: list[Engine],
+        selection: ReplicaSelection = 'round_robin',
+        retry_interval: float = 30,
+    ):
+        self.engines = engines
+        self.selection = selection
+        self.retry_interval = retry_interval
+        self._turns = itertools.count()
+        self._down_until: dict[Engine, float] = {}
+        self._lock = threading.Lock()
+
+        for engine in engines:
+            event.listen(engine, 'handle_error', self._on_error)
+
+    def pick(self) -> Engine | None:
+        healthy = self.healthy()
+
+        if not healthy:
+            return None
+
+        if self.selection == 'least_busy':
+            return min(healthy, key=_checked_out)
+
+        return healthy[next(self._turns) % len(healthy)]
+
+    def healthy(self) -> list[Engine]:
+        now = time.monotonic()
+
+        with self._lock:
+            return [
+                engine
+                for engine in self.engines
+                if self._down_until.get(engine, 0) <= now
+            ]
+
+    def mark_down(self, engine: Engine):
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + self.retry_interval
+
+    def _on_error(self, context):
+        # a replica that cannot be reached is skipped until the retry
+        # interval passes, its reads going to the primary meanwhile
+        if context.connection is None or context.is_disconnect:
+            self.mark_down(context.engine)
+
+
+def _checked_out(engine: Engine) -> int:
+    # NullPool and StaticPool do not keep count
+    checkedout = getattr(engine.pool, 'checkedout', None)
+
+    return checkedout() if checkedout else 0
+
+
+class RoutingSession(Session):
+    # reads go to a replica and everything else to the primary bind; once
+    # the session wrote, it sticks to the primary so it reads its writes
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or (clause is not None and not _is_read(clause)):
+            self.info['wrote'] = True
+        elif clause is not None and not self.info.get('wrote'):
+            replica = self._pick_replica()
+
+            if replica is not None:
+                return replica
+
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def _pick_replica(self) -> Engine | None:
+        replicas = self.info.get('replicas')
+
+        if replicas is None:
+            return None
+
+        # one replica per session, so its reads share a connection and a
+        # consistent view
+        replica = self.info.get('replica')
+
+        if replica is None or replica not in replicas.healthy():
+            replica = self.info['replica'] = replicas.pick()
+
+        return replica
+
+
+def _is_read(clause) -> bool:
+    return isinstance(clause, Select) and clause._for_update_arg is None
@@ -0,0 +1,193 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Literal
+
+import argon2
+from dotenv import dotenv_values
+from pydantic import BaseSettings, Extra, validator
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def available_cpus() -> int:
+    # the cores this process may run on, e.g. the cpuset of a container,
+    # where os.cpu_count() still reports every core of the host
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+class Settings(BaseSettings):
+    database_url: str
+    async_database_url: str | None = None
+    database_replica_urls: list[str] = []
+    database_replica_selection: Literal['round_robin', 'least_busy'] = (
+        'round_robin'
+    )
+    database_replica_retry_interval: float = 30
+    database_shard_urls: list[str] = []
+    shard_virtual_nodes: int = 100
+    # tenant=shard pairs that override the ring
+    tenant_shards: list[str] = []
+    tenant_header: str = 'X-Tenant'
+    tenant_domain: str | None = None
+    default_tenant: str = 'default'
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    database_pool_pre_ping: bool = True
+    sqlite_journal_mode: Literal[
+        'delete', 'truncate', 'persist', 'memory', 'wal', 'off'
+    ] = 'wal'
+    sqlite_synchronous: Literal['off', 'normal', 'full', 'extra'] = 'normal'
+    sqlite_busy_timeout: int = 5000
+    # negative sizes are in kibibytes, so 64 MiB of page cache
+    sqlite_cache_size: int = -64000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_temp_store: Literal['default', 'file', 'memory'] = 'memory'
+
+    secret_key: str | None = None
+    access_token_expire_minutes: int = 30
+    refresh_token_expire_minutes: int = 10080
+    auth_claims_mode: bool = False
+    claims_access_token_expire_minutes: int = 5
+    introspect_max_tokens: int = 500
+    # shared with the internal services, admins can introspect without it
+    introspect_secret: str | None = None
+
+    # before the hashing settings, which are sized per server worker
+    serve_host: str = '0.0.0.0'
+    serve_port: int = 8000
+    serve_workers: int | None = None
+    serve_backlog: int = 2048
+    serve_keep_alive: int = 5
+    serve_limit_concurrency: int | None = None
+    serve_graceful_timeout: int = 30
+    serve_log_level: str = 'info'
+
+    hashing_workers: int | None = None
+    hashing_max_pending: int | None = None
+    hashing_timeout: float = 5
+    hashing_max_concurrent: int | None = None
+    hashing_queue_size: int | None = None
+    hashing_queue_timeout: float = 1
+    max_in_flight_requests: int = 0
+    argon2_time_cost: int = argon2.DEFAULT_TIME_COST
+    argon2_memory_cost: int = argon2.DEFAULT_MEMORY_COST
+    argon2_parallelism: int = argon2.DEFAULT_PARALLELISM
+
+    token_cache_maxsize: int = 10000
+    token_cache_ttl: float = 300
+    user_cache_maxsize: int = 10000
+    user_cache_ttl: float = 30
+
+    login_throttle_backend: Literal['memory', 'sqlite'] = 'memory'
+    login_throttle_sqlite_path: str = './login-throttle.sqlite'
+    login_throttle_email_limit: int = 10
+    login_throttle_email_window: float = 900
+    login_throttle_ip_limit: int = 30
+    login_throttle_ip_window: float = 60
+    login_throttle_max_keys: int = 100000
+    # proxies whose X-Forwarded-For names the client, as IPs or networks
+    trusted_proxies: list[str] = []
+
+    users_page_size: int = 50
+    users_max_page_size: int = 200
+    export_batch_size: int = 1000
+    import_batch_size: int = 500
+    import_max_batch_size: int = 5000
+    import_hashing_workers: int | None = None
+
+    debug: bool = False
+    loop_watchdog_threshold: float = 0.1
+    slow_query_threshold_ms: float = 100
+    slow_query_log_file: str | None = None
+    metrics_multiproc_dir: str | None = None
+
+    class Config:
+        env_file = BASE_DIR / '.env'
+        env_file_encoding = 'utf-8'
+        extra = Extra.ignore
+        frozen = True
+
+        @classmethod
+        def parse_env_var(cls, field_name: str, raw_value: str):
+            # comma separated, the validator below splits it
+            if field_name in {
+                'database_replica_urls',
+                'database_shard_urls',
+                'tenant_shards',
+                'trusted_proxies',
+            }:
+                return raw_value
+
+            return cls.json_loads(raw_value)
+
+    # blank values, as in .env.example, fall back to the defaults
+    @validator('*', pre=True)
+    def blank_as_default(cls, value, field):
+        if isinstance(value, str) and not value:
+            return field.default
+
+        return value
+
+    @validator(
+        'database_replica_urls',
+        'database_shard_urls',
+        'tenant_shards',
+        'trusted_proxies',
+        pre=True,
+    )
+    def split_comma_separated(cls, value):
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(',') if item.strip()]
+
+        return value
+
+    @validator('serve_workers', always=True)
+    def default_to_cpu_count(cls, value):
+        return value or available_cpus()
+
+    # every server worker starts its own pool, so the cores are shared out
+    @validator('hashing_workers', always=True)
+    def default_hashing_workers(cls, value, values):
+        return value or max(1, available_cpus() // values['serve_workers'])
+
+    @validator('hashing_max_pending', always=True)
+    def default_max_pending(cls, value, values):
+        return value or values['hashing_workers'] * 8
+
+    # half of the cores at most, the rest stays with the logins
+    @validator('import_hashing_workers', always=True)
+    def default_import_hashing_workers(cls, value, values):
+        return value or max(1, values['hashing_workers'] // 2)
+
+    @validator('hashing_max_concurrent', always=True)
+    def default_max_concurrent(cls, value, values):
+        return value or values['hashing_workers']
+
+    @validator('hashing_queue_size', always=True)
+    def default_queue_size(cls, value, values):
+        return value or values['hashing_max_concurrent'] * 4
+
+    # 0 leaves the number of concurrent connections unbounded
+    @validator('serve_limit_concurrency')
+    def zero_as_unbounded(cls, value):
+        return value or None
+
+
+@lru_cache
+def get_settings() -> Settings:
+    overrides = {}
+
+    # the test values win over the environment, so the suite never runs
+    # against a database exported in the developer's shell
+    if os.getenv('ENV', 'dev') == 'test':
+        overrides = {
+            key.lower(): value
+            for key, value in dotenv_values(BASE_DIR / '.env.testing').items()
+        }
+
+    return Settings(**overrides)
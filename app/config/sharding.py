@@ -0,0 +1,82 @@
+import bisect
+import hashlib
+from contextvars import ContextVar
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+PRIMARY_SHARD = 'shard-0'
+
+current_tenant: ContextVar[str | None] = ContextVar(
+    'current_tenant', default=None
+)
+
+
+class HashRing:
+    # every node owns many points of the ring, so adding a shard only
+    # moves the tenants that land on its points
+    def __init__(self, nodes: list[str], virtual_nodes: int = 100):
+        self.nodes = nodes
+        self._points = sorted(
+            (_hash(f'{node}#{index}'), node)
+            for node in nodes
+            for index in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in self._points]
+
+    def node_for(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, _hash(key))
+
+        return self._points[index % len(self._points)][1]
+
+
+def _hash(key: str) -> int:
+    # unlike hash(), the same in every process
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+
+    return int.from_bytes(digest, 'big')
+
+
+# the primary database is the first shard, the others come from
+# DATABASE_SHARD_URLS; only ever append to it, the names follow the order
+SHARD_URLS = {
+    f'shard-{index}': url
+    for index, url in enumerate([
+        settings.database_url,
+        *settings.database_shard_urls,
+    ])
+}
+
+shard_ring = HashRing(list(SHARD_URLS), settings.shard_virtual_nodes)
+
+
+def parse_tenant_shards(items: list[str]) -> dict[str, str]:
+    tenant_shards = {}
+
+    for item in items:
+        tenant, _, shard = (part.strip() for part in item.partition('='))
+
+        if shard not in SHARD_URLS:
+            raise ValueError(f'unknown shard {shard!r} for tenant {tenant!r}')
+
+        tenant_shards[tenant] = shard
+
+    return tenant_shards
+
+
+# appending a shard moves some tenants on the ring, pinned tenants stay on
+# the shard holding their users
+TENANT_SHARDS = parse_tenant_shards(settings.tenant_shards)
+
+
+def current_tenant_id() -> str:
+    return current_tenant.get() or settings.default_tenant
+
+
+def shard_for(tenant: str) -> str:
+    return TENANT_SHARDS.get(tenant) or shard_ring.node_for(tenant)
+
+
+def current_shard() -> str:
+    return shard_for(current_tenant_id())
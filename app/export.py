@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator, Sequence
+
+from sqlalchemy import Row, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.models.user import User
+from app.repositories.user_repository import in_current_tenant
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.version,
+    User.is_admin,
+    User.created_at,
+    User.updated_at,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+
+def export_query(since: datetime | None = None) -> Select:
+    # plain columns, not entities, so no ORM objects pile up in the session
+    query = select(*EXPORT_COLUMNS).where(in_current_tenant())
+
+    if since is None:
+        return query.order_by(User.id)
+
+    return query.where(User.updated_at >= since).order_by(
+        User.updated_at, User.id
+    )
+
+
+def format_rows(rows: Sequence[Row], export_format: str) -> str:
+    if export_format == 'csv':
+        return _format_csv(rows)
+
+    return ''.join(
+        json.dumps(_serialize(row), separators=(',', ':')) + '\n'
+        for row in rows
+    )
+
+
+def format_header(export_format: str) -> str:
+    if export_format == 'csv':
+        return _format_csv([EXPORT_FIELDS])
+
+    return ''
+
+
+def iter_export(
+    session: Session,
+    export_format: str,
+    since: datetime | None = None,
+    batch_size: int | None = None,
+) -> Iterator[str]:
+    batch_size = batch_size or get_settings().export_batch_size
+    result = session.execute(
+        export_query(since).execution_options(yield_per=batch_size)
+    )
+
+    yield format_header(export_format)
+
+    for rows in result.partitions():
+        yield format_rows(rows, export_format)
+
+
+async def aiter_export(
+    session: AsyncSession,
+    export_format: str,
+    since: datetime | None = None,
+    batch_size: int | None = None,
+) -> AsyncIterator[str]:
+    batch_size = batch_size or get_settings().export_batch_size
+    result = await session.stream(
+        export_query(since).execution_options(yield_per=batch_size)
+    )
+
+    yield format_header(export_format)
+
+    async for rows in result.partitions():
+        yield format_rows(rows, export_format)
+
+
+def _serialize(row: Row) -> dict:
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in zip(EXPORT_FIELDS, row)
+    }
+
+
+def _format_csv(rows: Iterable) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+
+    for row in rows:
+        writer.writerow(
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        )
+
+    return buffer.getvalue()
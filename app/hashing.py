@@ -0,0 +1,203 @@
+import asyncio
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from app.config.settings import get_settings
+
+if TYPE_CHECKING:
+    from app.admission import AdmissionLimiter
+
+settings = get_settings()
+
+_pwd_context: PasswordHash | None = None
+
+
+def create_password_hash(
+    time_cost: int | None = None,
+    memory_cost: int | None = None,
+    parallelism: int | None = None,
+) -> PasswordHash:
+    # read when called, so the spawned workers follow the current settings
+    costs = get_settings()
+
+    return PasswordHash((
+        Argon2Hasher(
+            time_cost=time_cost or costs.argon2_time_cost,
+            memory_cost=memory_cost or costs.argon2_memory_cost,
+            parallelism=parallelism or costs.argon2_parallelism,
+        ),
+    ))
+
+
+def _init_worker():
+    global _pwd_context  # noqa: PLW0603
+    _pwd_context = create_password_hash()
+
+
+def _ready() -> bool:
+    return _pwd_context is not None
+
+
+def _hash(password: str) -> str:
+    return _pwd_context.hash(password)
+
+
+def _hash_many(passwords: list[str]) -> list[str]:
+    return [_pwd_context.hash(password) for password in passwords]
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return _pwd_context.verify(password, hashed_password)
+
+
+def _verify_and_update(
+    password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return _pwd_context.verify_and_update(password, hashed_password)
+
+
+class HashingUnavailableError(Exception):
+    pass
+
+
+class HashingEngine:
+    def __init__(self, max_workers: int, max_pending: int, timeout: float):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def hash_many(
+        self, passwords: list[str], limiter: 'AdmissionLimiter | None' = None
+    ) -> list[str]:
+        if not passwords:
+            return []
+
+        if limiter is not None:
+            return await self._hash_many_admitted(passwords, limiter)
+
+        # one task per worker instead of one per password
+        size = math.ceil(len(passwords) / self.max_workers)
+        chunks = [
+            passwords[start : start + size]
+            for start in range(0, len(passwords), size)
+        ]
+        results = await asyncio.gather(*[
+            self._submit(_hash_many, chunk, timeout=self.timeout * len(chunk))
+            for chunk in chunks
+        ])
+
+        return [password_hash for chunk in results for password_hash in chunk]
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(_verify, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await self._submit(
+            _verify_and_update, password, hashed_password
+        )
+
+    async def _hash_many_admitted(
+        self, passwords: list[str], limiter: 'AdmissionLimiter'
+    ) -> list[str]:
+        # a slot per hash, so the limiter bounds bulk hashes like the others
+        # and a login waiting for a slot gets the next one that frees up
+        password_hashes = [None] * len(passwords)
+        indexes = iter(range(len(passwords)))
+
+        async def hash_next():
+            for index in indexes:
+                async with limiter.slot(patient=True):
+                    password_hashes[index] = await self._submit(
+                        _hash, passwords[index]
+                    )
+
+        await asyncio.gather(*[
+            hash_next() for _ in range(min(self.max_workers, len(passwords)))
+        ])
+
+        return password_hashes
+
+    async def warm_up(self):
+        # spawning takes longer than a wait in the admission queue, so the
+        # processes start with the app and not on the first burst of logins
+        executor = self._get_executor()
+
+        await asyncio.gather(*[
+            asyncio.wrap_future(executor.submit(_ready))
+            for _ in range(self.max_workers)
+        ])
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(self, fn, *args, timeout: float | None = None):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingUnavailableError('hashing queue is full')
+            self._pending += 1
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+
+            try:
+                return await asyncio.wait_for(
+                    asyncio.wrap_future(future), timeout or self.timeout
+                )
+            except TimeoutError as exc:
+                future.cancel()
+                raise HashingUnavailableError('hashing timed out') from exc
+        except BrokenProcessPool as exc:
+            self.shutdown()
+            raise HashingUnavailableError('hashing pool is broken') from exc
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn avoids forking the event loop and its threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                )
+
+            return self._executor
+
+
+hashing_engine = HashingEngine(
+    max_workers=settings.hashing_workers,
+    max_pending=settings.hashing_max_pending,
+    timeout=settings.hashing_timeout,
+)
+# imports hash thousands of passwords, on their own processes so the logins
+# never queue behind them
+import_hashing_engine = HashingEngine(
+    max_workers=settings.import_hashing_workers,
+    max_pending=settings.import_hashing_workers,
+    timeout=settings.hashing_timeout,
+)
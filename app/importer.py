@@ -0,0 +1,167 @@
+import json
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Iterable
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.admission import AdmissionLimiter, hashing_limiter
+from app.config.settings import get_settings
+from app.hashing import HashingEngine, import_hashing_engine
+from app.models.user import User
+from app.repositories.user_repository import in_current_tenant
+from app.schemas.user_schema import UserCreateInput
+
+UNIQUE_FIELDS = ('username', 'email')
+
+
+@dataclass
+class ImportProgress:
+    processed: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+
+    def event(self, name: str) -> dict:
+        return {'event': name, **asdict(self)}
+
+
+async def aiter_import(
+    session: AsyncSession,
+    lines: Iterable[str | bytes],
+    batch_size: int | None = None,
+    engine: HashingEngine = import_hashing_engine,
+    limiter: AdmissionLimiter | None = hashing_limiter,
+) -> AsyncIterator[dict]:
+    batch_size = batch_size or get_settings().import_batch_size
+    progress = ImportProgress()
+    batch: list[tuple[int, UserCreateInput]] = []
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        progress.processed += 1
+
+        try:
+            batch.append((line_number, UserCreateInput.parse_raw(line)))
+        except ValidationError as exc:
+            progress.invalid += 1
+            yield _row_event(line_number, 'invalid', errors=exc.errors())
+
+        if len(batch) >= batch_size:
+            async for event in _import_batch(
+                session, batch, progress, engine, limiter
+            ):
+                yield event
+
+            batch = []
+
+    if batch:
+        async for event in _import_batch(
+            session, batch, progress, engine, limiter
+        ):
+            yield event
+
+    yield progress.event('summary')
+
+
+async def _import_batch(
+    session: AsyncSession,
+    batch: list[tuple[int, UserCreateInput]],
+    progress: ImportProgress,
+    engine: HashingEngine,
+    limiter: AdmissionLimiter | None,
+) -> AsyncIterator[dict]:
+    rows = []
+
+    for line_number, data, field in await _find_duplicates(session, batch):
+        if field is None:
+            rows.append((line_number, data))
+            continue
+
+        progress.duplicates += 1
+        yield _row_event(line_number, 'duplicate', field=field)
+
+    password_hashes = await engine.hash_many(
+        [data.password for _, data in rows], limiter
+    )
+    values = [
+        {**data.dict(), 'password': password_hash}
+        for (_, data), password_hash in zip(rows, password_hashes)
+    ]
+
+    try:
+        if values:
+            await session.execute(insert(User), values)
+
+        await session.commit()
+        progress.created += len(values)
+    except IntegrityError:
+        # a concurrent writer took some of the names, retry row by row
+        await session.rollback()
+
+        for (line_number, _), row in zip(rows, values):
+            try:
+                async with session.begin_nested():
+                    await session.execute(insert(User), [row])
+
+                progress.created += 1
+            except IntegrityError:
+                progress.duplicates += 1
+                yield _row_event(line_number, 'duplicate')
+
+        await session.commit()
+
+    yield progress.event('progress')
+
+
+async def _find_duplicates(
+    session: AsyncSession, batch: list[tuple[int, UserCreateInput]]
+) -> list[tuple[int, UserCreateInput, str | None]]:
+    taken = {field: set() for field in UNIQUE_FIELDS}
+    existing = await session.execute(
+        select(User.username, User.email).where(
+            in_current_tenant(),
+            or_(
+                User.username.in_([data.username for _, data in batch]),
+                User.email.in_([data.email for _, data in batch]),
+            ),
+        )
+    )
+
+    for username, email in existing:
+        taken['username'].add(username)
+        taken['email'].add(email)
+
+    results = []
+
+    for line_number, data in batch:
+        field = next(
+            (
+                field
+                for field in UNIQUE_FIELDS
+                if getattr(data, field) in taken[field]
+            ),
+            None,
+        )
+
+        # rows later in the file lose against earlier ones
+        if field is None:
+            for unique_field in UNIQUE_FIELDS:
+                taken[unique_field].add(getattr(data, unique_field))
+
+        results.append((line_number, data, field))
+
+    return results
+
+
+def _row_event(line_number: int, status: str, **details) -> dict:
+    return {'event': 'row', 'line': line_number, 'status': status, **details}
+
+
+def encode_event(event: dict) -> str:
+    # validation error contexts may hold values json cannot encode
+    return json.dumps(event, separators=(',', ':'), default=str) + '\n'
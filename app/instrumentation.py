@@ -0,0 +1,177 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.config.settings import get_settings
+from app.metrics import db_pool_checkouts_per_request
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('app.slow_query')
+
+settings = get_settings()
+
+EXPLAINABLE_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    slowest_duration: float = 0.0
+    slowest_statement: str | None = None
+    checkouts: int = 0
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+
+        if duration >= self.slowest_duration:
+            self.slowest_duration = duration
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.duration * 1000:.3f};desc="{self.count} queries", '
+            f'db-slowest;dur={self.slowest_duration * 1000:.3f}'
+        )
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar(
+    'query_stats', default=None
+)
+
+
+def instrument_engine(engine: Engine):
+    if event.contains(engine, 'after_cursor_execute', _after_cursor_execute):
+        return
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'checkout', _on_checkout)
+
+
+@contextmanager
+def record_queries(engine: Engine):
+    stats = QueryStats()
+
+    def before_cursor_execute(conn, cursor, statement, params, context, *_):
+        context.recorded_query_start = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, params, context, *_):
+        duration = time.perf_counter() - context.recorded_query_start
+        stats.record(statement, duration)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    try:
+        yield stats
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        event.remove(engine, 'after_cursor_execute', after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, params, context, *_):
+    context.query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, *_):
+    duration = time.perf_counter() - context.query_start
+    stats = query_stats.get()
+
+    if stats is not None:
+        stats.record(statement, duration)
+
+    if duration * 1000 >= settings.slow_query_threshold_ms:
+        plan = None
+
+        if not context.executemany:
+            plan = _explain_query_plan(conn, statement, parameters)
+
+        slow_query_logger.warning(
+            json.dumps({
+                'duration_ms': round(duration * 1000, 3),
+                'statement': statement,
+                'plan': plan,
+            })
+        )
+
+
+def _on_checkout(*args):
+    stats = query_stats.get()
+
+    if stats is not None:
+        stats.checkouts += 1
+
+
+def _explain_query_plan(conn, statement: str, parameters) -> list | None:
+    is_explainable = (
+        statement.lstrip().upper().startswith(EXPLAINABLE_STATEMENTS)
+    )
+
+    if conn.dialect.name != 'sqlite' or not is_explainable:
+        return None
+
+    cursor = conn.connection.cursor()
+
+    try:
+        cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception:  # noqa: BLE001
+        return None
+    finally:
+        cursor.close()
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+
+        async def send_with_server_timing(message):
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', stats.server_timing())
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            query_stats.reset(token)
+
+            route = scope.get('route')
+            db_pool_checkouts_per_request.labels(
+                scope['method'], getattr(route, 'path', '<unmatched>')
+            ).observe(stats.checkouts)
+            logger.info(
+                json.dumps({
+                    'method': scope['method'],
+                    'route': getattr(route, 'path', scope['path']),
+                    'db_queries': stats.count,
+                    'db_checkouts': stats.checkouts,
+                    'db_time_ms': round(stats.duration * 1000, 3),
+                    'db_slowest_ms': round(stats.slowest_duration * 1000, 3),
+                    'db_slowest_statement': stats.slowest_statement,
+                })
+            )
+
+
+if settings.slow_query_log_file:
+    slow_query_logger.addHandler(
+        logging.FileHandler(settings.slow_query_log_file)
+    )
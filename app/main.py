@@ -1,35 +1,143 @@
+import asyncio
+from http import HTTPStatus
+
 from fastapi import FastAPI, Request
 from fastapi.exceptions import HTTPException, RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 
-from app.routers import auth
-from app.schemas.response_schema import ErrorResponse
+from app.admission import InFlightLimitMiddleware, OverloadedError
+from app.config.database import dispose_async_engines
+from app.hashing import (
+    HashingUnavailableError,
+    hashing_engine,
+    import_hashing_engine,
+)
+from app.instrumentation import QueryStatsMiddleware
+from app.metrics import (
+    CONTENT_TYPE,
+    MetricsMiddleware,
+    expose_metrics,
+    mark_process_dead,
+)
+from app.responses import error_response
+from app.routers import auth, users
+from app.security import Security
+from app.tenancy import TenantMiddleware
+from app.throttling import ThrottledError
+from app.watchdog import loop_watchdog
 
 app = FastAPI()
 
+app.add_middleware(TenantMiddleware)
+app.add_middleware(InFlightLimitMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router)
+app.include_router(users.router)
 
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(
     request: Request, exc: RequestValidationError
 ):
-    content = ErrorResponse(message='validation error', errors=exc.errors())
-
-    return JSONResponse(status_code=422, content=content.dict())
+    # the previous schema coerced an empty error list into an object
+    return error_response(
+        'validation error', exc.errors() or {}, status_code=422
+    )
 
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     match exc.status_code:
         case 401:
-            content = ErrorResponse(message='unauthorized error', errors={})
+            message = 'unauthorized error'
+        case 403:
+            message = 'forbidden error'
         case _:
-            content = ErrorResponse(message='bad request error', errors={})
+            message = 'bad request error'
+
+    return error_response(message, {}, status_code=exc.status_code)
+
+
+@app.exception_handler(HashingUnavailableError)
+async def hashing_unavailable_exception_handler(
+    request: Request, exc: HashingUnavailableError
+):
+    return error_response(
+        'service unavailable error',
+        {},
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '1'},
+    )
+
+
+@app.exception_handler(OverloadedError)
+async def overloaded_exception_handler(request: Request, exc: OverloadedError):
+    return error_response(
+        'service unavailable error',
+        {},
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(ThrottledError)
+async def throttled_exception_handler(request: Request, exc: ThrottledError):
+    return error_response(
+        'too many requests error',
+        {},
+        status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        headers={'Retry-After': str(exc.retry_after)},
+    )
+
+
+@app.on_event('startup')
+async def start_loop_watchdog():
+    await loop_watchdog.start()
 
-    return JSONResponse(status_code=exc.status_code, content=content.dict())
+
+@app.on_event('startup')
+def precompute_wrong_password_hash():
+    # keeps the first login for an unknown email from paying for it
+    Security.wrong_password_hash()
+
+
+@app.on_event('startup')
+async def warm_up_hashing_engines():
+    # runs in every worker forked by app.serve, each has its own pools
+    await asyncio.gather(
+        hashing_engine.warm_up(), import_hashing_engine.warm_up()
+    )
+
+
+@app.on_event('shutdown')
+async def stop_loop_watchdog():
+    await loop_watchdog.stop()
+
+
+@app.on_event('shutdown')
+def shutdown_hashing_engine():
+    hashing_engine.shutdown()
+    import_hashing_engine.shutdown()
+
+
+@app.on_event('shutdown')
+async def dispose_async_engine():
+    # pooled aiosqlite connections run on threads that keep the process alive
+    await dispose_async_engines()
+
+
+@app.on_event('shutdown')
+def mark_metrics_process_dead():
+    mark_process_dead()
 
 
 @app.get('/')
 def root():
     return {'hello': 'world'}
+
+
+@app.get('/metrics', include_in_schema=False)
+def metrics():
+    return Response(content=expose_metrics(), media_type=CONTENT_TYPE)
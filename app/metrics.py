@@ -0,0 +1,185 @@
+import os
+import time
+from pathlib import Path
+
+from sqlalchemy import event
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+# prometheus_client picks between in-process and per-pid file values when it
+# is imported, so the directory has to be exported before
+if settings.metrics_multiproc_dir:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = settings.metrics_multiproc_dir
+
+from prometheus_client import (  # noqa: E402
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# the charset is added by the response
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+
+def expose_metrics() -> bytes:
+    if not settings.metrics_multiproc_dir:
+        return generate_latest(REGISTRY)
+
+    # every worker writes its own files, a fresh registry sums them up
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(
+        registry, settings.metrics_multiproc_dir
+    )
+
+    return generate_latest(registry)
+
+
+def clear_multiproc_dir():
+    # files left by a previous run would be summed with the new workers
+    if settings.metrics_multiproc_dir:
+        path = Path(settings.metrics_multiproc_dir)
+        path.mkdir(parents=True, exist_ok=True)
+
+        for file in path.glob('*.db'):
+            file.unlink()
+
+
+def mark_process_dead(pid: int | None = None):
+    # gauges of a dead worker must stop counting towards the total
+    if settings.metrics_multiproc_dir:
+        multiprocess.mark_process_dead(
+            pid or os.getpid(), settings.metrics_multiproc_dir
+        )
+
+
+http_requests_total = Counter(
+    'http_requests_total',
+    'Total HTTP requests by route template and status code.',
+    ('method', 'route', 'status'),
+)
+http_request_duration_seconds = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by route template.',
+    ('method', 'route'),
+)
+http_requests_in_flight = Gauge(
+    'http_requests_in_flight',
+    'HTTP requests currently being served.',
+    multiprocess_mode='livesum',
+)
+password_hashes_total = Counter(
+    'password_hashes_total',
+    'Password hash and verify operations.',
+    ('operation',),
+)
+token_decodes_total = Counter(
+    'token_decodes_total',
+    'Access token decodes by outcome.',
+    ('outcome',),
+)
+db_pool_checkouts_total = Counter(
+    'db_pool_checkouts_total',
+    'Connections checked out from the database pool.',
+    ('engine',),
+)
+db_pool_checkouts_per_request = Histogram(
+    'db_pool_checkouts_per_request',
+    'Connections checked out while serving a request, by route template.',
+    ('method', 'route'),
+    buckets=(0, 1, 2, 3, 5, 10),
+)
+db_pool_overflow = Gauge(
+    'db_pool_overflow',
+    'Connections open beyond the database pool size.',
+    ('engine',),
+    multiprocess_mode='livesum',
+)
+cache_requests_total = Counter(
+    'cache_requests_total',
+    'Cache lookups by cache and result.',
+    ('cache', 'result'),
+)
+single_flight_calls_total = Counter(
+    'single_flight_calls_total',
+    'Calls run by a single-flight group, or coalesced into one in flight.',
+    ('flight', 'result'),
+)
+admission_in_flight = Gauge(
+    'admission_in_flight',
+    'Work items currently admitted by a limiter.',
+    ('limiter',),
+    multiprocess_mode='livesum',
+)
+admission_queue_depth = Gauge(
+    'admission_queue_depth',
+    'Work items waiting for a limiter slot.',
+    ('limiter',),
+    multiprocess_mode='livesum',
+)
+admission_rejections_total = Counter(
+    'admission_rejections_total',
+    'Work items shed by a limiter, by reason.',
+    ('limiter', 'reason'),
+)
+login_throttled_total = Counter(
+    'login_throttled_total',
+    'Login attempts rejected by a throttling limiter.',
+    ('limiter',),
+)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started_at = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+
+            await send(message)
+
+        http_requests_in_flight.inc()
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+
+            # raw paths would explode the label cardinality
+            route = scope.get('route')
+            route_path = getattr(route, 'path', '<unmatched>')
+            method = scope['method']
+
+            http_requests_total.labels(method, route_path, status_code).inc()
+            http_request_duration_seconds.labels(method, route_path).observe(
+                time.perf_counter() - started_at
+            )
+
+
+def instrument_pool(engine, name: str):
+    checkouts = db_pool_checkouts_total.labels(name)
+    overflow = db_pool_overflow.labels(name)
+
+    def on_checkout(*args):
+        checkouts.inc(1.0)
+
+        if hasattr(engine.pool, 'overflow'):
+            overflow.set(max(engine.pool.overflow(), 0))
+
+    event.listen(engine, 'checkout', on_checkout)
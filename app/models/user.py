@@ -1,21 +1,58 @@
 from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import DateTime, Index, UniqueConstraint, false, func
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.config.database import table_registry
+from app.config.sharding import current_tenant_id
+
+# CURRENT_TIMESTAMP has no fractional seconds, bound values must match it
+# or keyset comparisons on created_at would skip rows sharing a second
+TIMESTAMP = DateTime().with_variant(
+    sqlite.DATETIME(
+        storage_format=(
+            '%(year)04d-%(month)02d-%(day)02d '
+            '%(hour)02d:%(minute)02d:%(second)02d'
+        )
+    ),
+    'sqlite',
+)
 
 
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    # tenants sharing a shard share the table, every lookup is by tenant
+    __table_args__ = (
+        UniqueConstraint(
+            'tenant_id', 'username', name='uq_users_tenant_id_username'
+        ),
+        UniqueConstraint(
+            'tenant_id', 'email', name='uq_users_tenant_id_email'
+        ),
+        Index(
+            'ix_users_tenant_id_created_at_id', 'tenant_id', 'created_at', 'id'
+        ),
+        Index('ix_users_tenant_id_updated_at', 'tenant_id', 'updated_at'),
+    )
+
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
-    username: Mapped[str] = mapped_column(unique=True)
+    username: Mapped[str]
     password: Mapped[str]
-    email: Mapped[str] = mapped_column(unique=True)
+    email: Mapped[str]
+    tenant_id: Mapped[str] = mapped_column(
+        default_factory=current_tenant_id, insert_default=current_tenant_id
+    )
+    version: Mapped[int] = mapped_column(
+        init=False, default=1, server_default='1'
+    )
+    is_admin: Mapped[bool] = mapped_column(
+        init=False, default=False, server_default=false()
+    )
     created_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now()
+        TIMESTAMP, init=False, server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now(), onupdate=func.now()
+        TIMESTAMP, init=False, server_default=func.now(), onupdate=func.now()
     )
@@ -0,0 +1,41 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+# ids are compared against a 64-bit INTEGER column
+MAX_ID = 2**63 - 1
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), id]).encode()
+
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+
+        if type(id) is not int or not 1 <= id <= MAX_ID:
+            raise InvalidCursorError(cursor)
+
+        return datetime.fromisoformat(created_at), id
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise InvalidCursorError(cursor) from exc
+
+
+def prefix_upper_bound(prefix: str) -> str | None:
+    # the smallest string greater than every string starting with prefix,
+    # so prefix filters become index range scans instead of LIKE scans
+    prefix = prefix.rstrip(chr(0x10FFFF))
+
+    if not prefix:
+        return None
+
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
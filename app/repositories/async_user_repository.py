@@ -0,0 +1,131 @@
+from datetime import datetime
+from typing import Iterable, List
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import user_cache, user_cache_key
+from app.models.user import User
+from app.repositories.user_repository import (
+    in_current_tenant,
+    users_page_query,
+)
+from app.schemas.user_schema import UserCreateInput, UserUpdateInput
+
+
+class AsyncUserRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_all_users(self) -> List[User]:
+        result = await self.session.scalars(
+            select(User).where(in_current_tenant())
+        )
+        return result.all()
+
+    async def get_tenant_ids(self) -> List[str]:
+        # the one query across tenants, to pin them to this shard
+        result = await self.session.scalars(
+            select(User.tenant_id).distinct().order_by(User.tenant_id)
+        )
+
+        return result.all()
+
+    async def get_users_page(
+        self,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+        username_prefix: str | None = None,
+        email_prefix: str | None = None,
+    ) -> List[User]:
+        query = users_page_query(limit, after, username_prefix, email_prefix)
+        result = await self.session.scalars(query)
+
+        return result.all()
+
+    async def create_user(self, data: UserCreateInput) -> User:
+        user = await self.session.scalar(
+            insert(User).values(**data.dict()).returning(User)
+        )
+        await self.session.commit()
+
+        return user
+
+    async def get_user_by_id(self, user_id: int) -> User | None:
+        return await self.get_user_by({'id': user_id})
+
+    async def get_users_by_ids(self, user_ids: Iterable[int]) -> List[User]:
+        result = await self.session.scalars(
+            select(User).where(in_current_tenant(), User.id.in_(set(user_ids)))
+        )
+
+        return result.all()
+
+    async def get_user_by(self, params: dict) -> User | None:
+        return await self.session.scalar(
+            select(User)
+            .where(in_current_tenant())
+            .filter_by(**params)
+            .limit(1)
+        )
+
+    async def update_user(
+        self, user_id: int, data: UserUpdateInput
+    ) -> User | None:
+        user = await self.session.scalar(
+            update(User)
+            .where(in_current_tenant(), User.id == user_id)
+            .values(**data.dict(exclude_unset=True), version=User.version + 1)
+            .returning(User)
+        )
+        await self.session.commit()
+
+        if user is None:
+            return None
+
+        user_cache.delete(user_cache_key(user_id))
+
+        return user
+
+    async def set_admin(self, email: str, is_admin: bool) -> User | None:
+        # a profile change, claims-only tokens issued from now on carry it
+        user = await self.session.scalar(
+            update(User)
+            .where(in_current_tenant(), User.email == email)
+            .values(is_admin=is_admin, version=User.version + 1)
+            .returning(User)
+        )
+        await self.session.commit()
+
+        if user is None:
+            return None
+
+        user_cache.delete(user_cache_key(user.id))
+
+        return user
+
+    async def update_password_hash(self, user_id: int, password_hash: str):
+        # not a profile change, so the version is left alone
+        await self.session.execute(
+            update(User)
+            .where(in_current_tenant(), User.id == user_id)
+            .values(password=password_hash)
+        )
+        await self.session.commit()
+
+        user_cache.delete(user_cache_key(user_id))
+
+    async def delete_user(self, user_id: int) -> True:
+        deleted_id = await self.session.scalar(
+            delete(User)
+            .where(in_current_tenant(), User.id == user_id)
+            .returning(User.id)
+        )
+        await self.session.commit()
+
+        if deleted_id is None:
+            return None
+
+        user_cache.delete(user_cache_key(user_id))
+
+        return True
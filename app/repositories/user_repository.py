@@ -1,54 +1,159 @@
-from typing import List
-
+from datetime import datetime
+from typing import Iterable, List
+
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    delete,
+    insert,
+    select,
+    tuple_,
+    update,
+)
 from sqlalchemy.orm import Session
 
+from app.cache import user_cache, user_cache_key
+from app.config.sharding import current_tenant_id
 from app.models.user import User
+from app.pagination import prefix_upper_bound
 from app.schemas.user_schema import UserCreateInput, UserUpdateInput
 
 
+def in_current_tenant() -> ColumnElement[bool]:
+    # tenants sharing a shard share the table, so every query is scoped
+    return User.tenant_id == current_tenant_id()
+
+
+def users_page_query(
+    limit: int,
+    after: tuple[datetime, int] | None = None,
+    username_prefix: str | None = None,
+    email_prefix: str | None = None,
+) -> Select:
+    query = select(User).where(in_current_tenant())
+
+    if after is not None:
+        query = query.where(tuple_(User.created_at, User.id) > after)
+
+    for column, prefix in (
+        (User.username, username_prefix),
+        (User.email, email_prefix),
+    ):
+        if not prefix:
+            continue
+
+        query = query.where(column >= prefix)
+        upper_bound = prefix_upper_bound(prefix)
+
+        if upper_bound is not None:
+            query = query.where(column < upper_bound)
+
+    return query.order_by(User.created_at, User.id).limit(limit)
+
+
 class UserRepository:
     def __init__(self, session: Session):
         self.session = session
 
     def get_all_users(self) -> List[User]:
-        return self.session.query(User).all()
+        return self.session.query(User).filter(in_current_tenant()).all()
+
+    def get_tenant_ids(self) -> List[str]:
+        # the one query across tenants, to pin them to this shard
+        return self.session.scalars(
+            select(User.tenant_id).distinct().order_by(User.tenant_id)
+        ).all()
+
+    def get_users_page(
+        self,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+        username_prefix: str | None = None,
+        email_prefix: str | None = None,
+    ) -> List[User]:
+        query = users_page_query(limit, after, username_prefix, email_prefix)
+
+        return self.session.scalars(query).all()
 
     def create_user(self, data: UserCreateInput) -> User:
-        user = User(**data.dict())
-        return self.__save_and_refresh(user, True)
+        user = self.session.scalar(
+            insert(User).values(**data.dict()).returning(User)
+        )
+        self.session.commit()
+
+        return user
 
     def get_user_by_id(self, user_id: int) -> User | None:
         return self.get_user_by({'id': user_id})
 
+    def get_users_by_ids(self, user_ids: Iterable[int]) -> List[User]:
+        return self.session.scalars(
+            select(User).where(in_current_tenant(), User.id.in_(set(user_ids)))
+        ).all()
+
     def get_user_by(self, params: dict) -> User | None:
-        return self.session.query(User).filter_by(**params).first()
+        return (
+            self.session.query(User)
+            .filter(in_current_tenant())
+            .filter_by(**params)
+            .first()
+        )
 
     def update_user(self, user_id: int, data: UserUpdateInput) -> User | None:
-        user = self.get_user_by_id(user_id)
+        user = self.session.scalar(
+            update(User)
+            .where(in_current_tenant(), User.id == user_id)
+            .values(**data.dict(exclude_unset=True), version=User.version + 1)
+            .returning(User)
+        )
+        self.session.commit()
 
         if user is None:
             return None
 
-        for key, value in data.dict(exclude_unset=True).items():
-            setattr(user, key, value)
+        user_cache.delete(user_cache_key(user_id))
 
-        return self.__save_and_refresh(user)
+        return user
 
-    def delete_user(self, user_id: int) -> True:
-        user = self.get_user_by_id(user_id)
+    def set_admin(self, email: str, is_admin: bool) -> User | None:
+        # a profile change, claims-only tokens issued from now on carry it
+        user = self.session.scalar(
+            update(User)
+            .where(in_current_tenant(), User.email == email)
+            .values(is_admin=is_admin, version=User.version + 1)
+            .returning(User)
+        )
+        self.session.commit()
 
         if user is None:
             return None
 
-        self.session.delete(user)
-        self.session.commit()
+        user_cache.delete(user_cache_key(user.id))
 
-        return True
+        return user
+
+    def update_password_hash(self, user_id: int, password_hash: str):
+        # not a profile change, so the version is left alone
+        self.session.execute(
+            update(User)
+            .where(in_current_tenant(), User.id == user_id)
+            .values(password=password_hash)
+        )
+        self.session.commit()
 
-    def __save_and_refresh(self, user: User, add=False) -> User:
-        if add:
-            self.session.add(user)
+        user_cache.delete(user_cache_key(user_id))
 
+    def delete_user(self, user_id: int) -> True:
+        deleted_id = self.session.scalar(
+            delete(User)
+            .where(in_current_tenant(), User.id == user_id)
+            .returning(User.id)
+        )
         self.session.commit()
-        self.session.refresh(user)
-        return user
+
+        if deleted_id is None:
+            return None
+
+        user_cache.delete(user_cache_key(user_id))
+
+        return True
@@ -0,0 +1,61 @@
+import json
+from datetime import date, time
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=str)
+
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(',', ':'),
+        default=_default,
+    ).encode('utf-8')
+
+
+def _default(value: Any) -> str:
+    # match orjson, which renders dates and times natively as ISO 8601
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+
+    return str(value)
+
+
+class FastJSONResponse(JSONResponse):
+    # content is expected to be plain data, it is not validated or encoded
+    # through pydantic and jsonable_encoder
+    def render(self, content: Any) -> bytes:  # noqa: PLR6301
+        return dumps(content)
+
+
+def success_response(
+    data: dict, status_code: int = 200, headers: dict | None = None
+) -> FastJSONResponse:
+    return FastJSONResponse(
+        {'status': 'success', 'data': data},
+        status_code=status_code,
+        headers=headers,
+    )
+
+
+def error_response(
+    message: str,
+    errors: dict | list,
+    status_code: int,
+    headers: dict | None = None,
+) -> FastJSONResponse:
+    return FastJSONResponse(
+        {'status': 'fail', 'message': message, 'errors': errors},
+        status_code=status_code,
+        headers=headers,
+    )
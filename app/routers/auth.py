@@ -1,34 +1,84 @@
+import hmac
 from http import HTTPStatus
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.config.database import get_session
-from app.models.user import User
+from app.config.database import get_async_session
+from app.config.settings import Settings, get_settings
+from app.responses import success_response
 from app.schemas.response_schema import SuccessResponse
-from app.schemas.user_schema import UserCreateInput, UserLoginInput, UserPublic
-from app.services.user_service import UserService
+from app.schemas.user_schema import (
+    TokenIntrospectionInput,
+    TokenRefreshInput,
+    UserCreateInput,
+    UserLoginInput,
+    UserPrincipal,
+    serialize_user_public,
+)
+from app.services.async_user_service import AsyncUserService
+from app.throttling import client_ip, login_throttle
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl='auth/token', auto_error=False
+)
 
 
-async def get_current_user(
+async def get_current_principal(
     token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    user_service = UserService(session=session)
+    user_service = AsyncUserService(session=session)
 
-    user = user_service.get_user_from_token(access_token=token)
+    principal = await user_service.get_principal_from_token(access_token=token)
 
-    if user is None:
+    if principal is None:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
         )
 
-    return user
+    return principal
+
+
+async def get_current_admin(
+    principal: UserPrincipal = Depends(get_current_principal),
+):
+    if not principal.is_admin:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+        )
+
+    return principal
+
+
+async def get_introspection_caller(
+    secret: str | None = Header(None, alias='X-Introspect-Secret'),
+    token: str | None = Depends(optional_oauth2_scheme),
+    session: AsyncSession = Depends(get_async_session),
+    app_settings: Settings = Depends(get_settings),
+):
+    # internal services send the shared secret, people an admin token
+    if (
+        secret is not None
+        and app_settings.introspect_secret
+        and hmac.compare_digest(
+            secret.encode(), app_settings.introspect_secret.encode()
+        )
+    ):
+        return None
+
+    if token is None:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+        )
+
+    principal = await get_current_principal(token=token, session=session)
+
+    return await get_current_admin(principal=principal)
 
 
 @router.post(
@@ -36,16 +86,20 @@ async def get_current_user(
     status_code=HTTPStatus.CREATED,
     response_model=SuccessResponse,
 )
-def register_user(
-    data: UserCreateInput, session: Session = Depends(get_session)
+async def register_user(
+    data: UserCreateInput, session: AsyncSession = Depends(get_async_session)
 ):
-    user_service = UserService(session=session)
+    user_service = AsyncUserService(session=session)
 
-    user, token = user_service.register_user(data=data)
+    user, token = await user_service.register_user(data=data)
 
-    data = {'user': UserPublic(**user.__dict__), 'access_token': token}
+    data = {
+        'user': serialize_user_public(user),
+        'access_token': token,
+        'refresh_token': user_service.security.create_refresh_token(user.id),
+    }
 
-    return SuccessResponse(data=data)
+    return success_response(data, status_code=HTTPStatus.CREATED)
 
 
 @router.post(
@@ -53,10 +107,21 @@ def register_user(
     status_code=HTTPStatus.OK,
     response_model=SuccessResponse,
 )
-def login_user(data: UserLoginInput, session: Session = Depends(get_session)):
-    user_service = UserService(session=session)
+async def login_user(
+    data: UserLoginInput,
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+):
+    # throttled before any password hash is verified
+    ip = client_ip(
+        request.client.host if request.client else None,
+        request.headers.get('x-forwarded-for'),
+    )
+    await login_throttle.hit_async(data.email, ip)
+
+    user_service = AsyncUserService(session=session)
 
-    result = user_service.login_user(data=data)
+    result = await user_service.login_user(data=data)
 
     if not result:
         raise HTTPException(
@@ -65,9 +130,13 @@ def login_user(data: UserLoginInput, session: Session = Depends(get_session)):
 
     user, token = result
 
-    data = {'user': UserPublic(**user.__dict__), 'access_token': token}
+    data = {
+        'user': serialize_user_public(user),
+        'access_token': token,
+        'refresh_token': user_service.security.create_refresh_token(user.id),
+    }
 
-    return SuccessResponse(data=data)
+    return success_response(data)
 
 
 @router.get(
@@ -75,5 +144,47 @@ def login_user(data: UserLoginInput, session: Session = Depends(get_session)):
     status_code=HTTPStatus.OK,
     response_model=SuccessResponse,
 )
-def me(user: User = Depends(get_current_user)):
-    return SuccessResponse(data={'user': UserPublic(**user.__dict__)})
+async def me(principal: UserPrincipal = Depends(get_current_principal)):
+    return success_response({'user': serialize_user_public(principal)})
+
+
+@router.post(
+    '/refresh/',
+    status_code=HTTPStatus.OK,
+    response_model=SuccessResponse,
+)
+async def refresh_token(
+    data: TokenRefreshInput,
+    session: AsyncSession = Depends(get_async_session),
+):
+    user_service = AsyncUserService(session=session)
+
+    result = await user_service.refresh_tokens(data.refresh_token)
+
+    if not result:
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+        )
+
+    access_token, refresh_token = result
+
+    data = {'access_token': access_token, 'refresh_token': refresh_token}
+
+    return success_response(data)
+
+
+@router.post(
+    '/introspect/',
+    status_code=HTTPStatus.OK,
+    response_model=SuccessResponse,
+    dependencies=[Depends(get_introspection_caller)],
+)
+async def introspect_tokens(
+    data: TokenIntrospectionInput,
+    session: AsyncSession = Depends(get_async_session),
+):
+    user_service = AsyncUserService(session=session)
+
+    results = await user_service.introspect_tokens(data.tokens)
+
+    return success_response({'results': results})
@@ -0,0 +1,111 @@
+from datetime import datetime
+from http import HTTPStatus
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic.error_wrappers import ErrorWrapper
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import get_async_session
+from app.config.settings import Settings, get_settings
+from app.export import EXPORT_MEDIA_TYPES, aiter_export
+from app.importer import aiter_import, encode_event
+from app.pagination import InvalidCursorError
+from app.responses import success_response
+from app.routers.auth import get_current_admin
+from app.schemas.response_schema import SuccessResponse
+from app.schemas.user_schema import serialize_user_public
+from app.services.async_user_service import AsyncUserService
+
+settings = get_settings()
+
+router = APIRouter(
+    prefix='/users', tags=['users'], dependencies=[Depends(get_current_admin)]
+)
+
+
+@router.get(
+    '/',
+    status_code=HTTPStatus.OK,
+    response_model=SuccessResponse,
+)
+async def list_users(
+    limit: int = Query(
+        settings.users_page_size, ge=1, le=settings.users_max_page_size
+    ),
+    cursor: str | None = Query(None),
+    username_prefix: str | None = Query(None, max_length=255),
+    email_prefix: str | None = Query(None, max_length=255),
+    session: AsyncSession = Depends(get_async_session),
+):
+    user_service = AsyncUserService(session=session)
+
+    try:
+        users, next_cursor = await user_service.get_users_page(
+            limit, cursor, username_prefix, email_prefix
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+        )
+
+    data = {
+        'users': [serialize_user_public(user) for user in users],
+        'next_cursor': next_cursor,
+    }
+
+    return success_response(data)
+
+
+@router.get('/export/', status_code=HTTPStatus.OK)
+async def export_users(
+    export_format: Literal['ndjson', 'csv'] = Query('ndjson', alias='format'),
+    since: datetime | None = Query(None),
+    session: AsyncSession = Depends(get_async_session),
+    app_settings: Settings = Depends(get_settings),
+):
+    return StreamingResponse(
+        aiter_export(
+            session, export_format, since, app_settings.export_batch_size
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="users.{export_format}"'
+            )
+        },
+    )
+
+
+@router.post('/import/', status_code=HTTPStatus.OK)
+async def import_users(
+    request: Request,
+    batch_size: int | None = Query(None, ge=1),
+    session: AsyncSession = Depends(get_async_session),
+    app_settings: Settings = Depends(get_settings),
+):
+    batch_size = batch_size or app_settings.import_batch_size
+    max_batch_size = app_settings.import_max_batch_size
+
+    if batch_size > max_batch_size:
+        raise RequestValidationError([
+            ErrorWrapper(
+                ValueError(
+                    'ensure this value is less than or equal to '
+                    f'{max_batch_size}'
+                ),
+                loc=('query', 'batch_size'),
+            )
+        ])
+
+    # the body is read up front, a streaming response listens on receive()
+    # for disconnects and would race with request.stream()
+    lines = (await request.body()).splitlines()
+
+    async def events():
+        async for event in aiter_import(session, lines, batch_size):
+            yield encode_event(event)
+
+    return StreamingResponse(events(), media_type='application/x-ndjson')
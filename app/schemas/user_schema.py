@@ -1,4 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, conlist
+
+from app.config.settings import get_settings
+
+settings = get_settings()
 
 
 class UserCreateInput(BaseModel):
@@ -22,3 +26,29 @@ class UserPublic(BaseModel):
     id: int
     username: str
     email: EmailStr
+
+
+USER_PUBLIC_FIELDS = tuple(UserPublic.__fields__)
+
+
+def serialize_user_public(user) -> dict:
+    # rows and principals are trusted, skip building a UserPublic
+    return {field: getattr(user, field) for field in USER_PUBLIC_FIELDS}
+
+
+class UserPrincipal(BaseModel):
+    id: int
+    username: str
+    email: EmailStr
+    version: int
+    is_admin: bool = False
+
+
+class TokenRefreshInput(BaseModel):
+    refresh_token: str = Field()
+
+
+class TokenIntrospectionInput(BaseModel):
+    tokens: conlist(
+        str, min_items=1, max_items=settings.introspect_max_tokens
+    ) = Field()
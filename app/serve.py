@@ -0,0 +1,244 @@
+import argparse
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+import uvicorn
+
+from app.config.database import async_engines, sync_engines
+from app.config.settings import get_settings
+from app.main import app
+from app.metrics import clear_multiproc_dir, mark_process_dead
+from app.security import Security
+
+# a worker exiting sooner than this after being forked failed to boot, and
+# restarting it would only fail again
+WORKER_BOOT_TIMEOUT = 5
+WORKER_KILL_MARGIN = 5
+SUPERVISOR_POLL_INTERVAL = 0.5
+
+logger = logging.getLogger('uvicorn.error')
+
+
+def pick_loop() -> str:
+    return 'uvloop' if importlib.util.find_spec('uvloop') else 'asyncio'
+
+
+def pick_http() -> str:
+    return 'httptools' if importlib.util.find_spec('httptools') else 'h11'
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+
+    return sock
+
+
+def create_config(args: argparse.Namespace) -> uvicorn.Config:
+    # computed before forking, so every worker inherits it
+    Security.wrong_password_hash()
+
+    return uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        loop=pick_loop(),
+        http=pick_http(),
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        limit_concurrency=args.limit_concurrency,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=args.log_level,
+    )
+
+
+def run_worker(config: uvicorn.Config, sock: socket.socket):
+    # connections opened by the supervisor must not be shared across forks
+    for database_engine in sync_engines:
+        database_engine.dispose(close=False)
+
+    for database_engine in async_engines:
+        database_engine.sync_engine.dispose(close=False)
+
+    # uvicorn installs its own handlers, which drain before exiting
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        sock: socket.socket,
+        workers: int,
+        graceful_timeout: float,
+    ):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.exit_code = 0
+        self._pids: dict[int, float] = {}
+        self._stopping = threading.Event()
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        signal.signal(signal.SIGINT, self._handle_exit)
+
+        logger.info(
+            'Starting %s workers (loop=%s, http=%s)',
+            self.workers,
+            self.config.loop,
+            self.config.http,
+        )
+
+        clear_multiproc_dir()
+
+        for _ in range(self.workers):
+            self._spawn()
+
+        while not self._stopping.wait(SUPERVISOR_POLL_INTERVAL):
+            self._reap()
+
+        self._drain()
+
+        return self.exit_code
+
+    def _handle_exit(self, signum, frame):
+        self._stopping.set()
+
+    def _spawn(self):
+        # the app was imported before forking, so workers share its pages
+        # copy-on-write instead of importing everything again
+        pid = os.fork()
+
+        if pid == 0:
+            exit_code = 0
+
+            try:
+                run_worker(self.config, self.sock)
+            except BaseException:
+                logger.exception('Worker %s crashed', os.getpid())
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        self._pids[pid] = time.monotonic()
+
+    def _reap(self):
+        while self._pids:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+
+            if pid == 0:
+                return
+
+            started_at = self._pids.pop(pid, None)
+
+            if started_at is None:
+                continue
+
+            mark_process_dead(pid)
+            exit_code = os.waitstatus_to_exitcode(status)
+
+            if time.monotonic() - started_at < WORKER_BOOT_TIMEOUT:
+                logger.error(
+                    'Worker %s failed to boot (exit code %s)', pid, exit_code
+                )
+                self.exit_code = 1
+                self._stopping.set()
+                return
+
+            logger.warning(
+                'Worker %s exited (exit code %s), restarting', pid, exit_code
+            )
+            self._spawn()
+
+    def _drain(self):
+        # each worker stops accepting, finishes its in-flight requests and
+        # closes idle keep-alive connections before exiting
+        for pid in self._pids:
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout
+        deadline += WORKER_KILL_MARGIN
+
+        while self._pids and time.monotonic() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+
+            if pid == 0:
+                time.sleep(0.1)
+                continue
+
+            self._pids.pop(pid, None)
+            mark_process_dead(pid)
+
+        for pid in self._pids:
+            logger.warning('Worker %s did not drain in time, killing', pid)
+            self._signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            mark_process_dead(pid)
+
+        self._pids.clear()
+
+    @staticmethod
+    def _signal(pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def main(argv: list[str] | None = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog='python -m app.serve')
+    parser.add_argument('--host', default=settings.serve_host)
+    parser.add_argument('--port', type=int, default=settings.serve_port)
+    parser.add_argument('--workers', type=int, default=settings.serve_workers)
+    parser.add_argument('--backlog', type=int, default=settings.serve_backlog)
+    parser.add_argument(
+        '--keep-alive', type=int, default=settings.serve_keep_alive
+    )
+    parser.add_argument(
+        '--limit-concurrency',
+        type=int,
+        default=settings.serve_limit_concurrency,
+    )
+    parser.add_argument(
+        '--graceful-timeout',
+        type=int,
+        default=settings.serve_graceful_timeout,
+    )
+    parser.add_argument('--log-level', default=settings.serve_log_level)
+    args = parser.parse_args(argv)
+
+    if args.workers != settings.serve_workers:
+        # the hashing pools were sized when the app was imported
+        logger.warning(
+            'Hashing pools are sized for %s workers, set SERVE_WORKERS=%s '
+            'to size them for %s',
+            settings.serve_workers,
+            args.workers,
+            args.workers,
+        )
+
+    config = create_config(args)
+
+    with bind_socket(args.host, args.port, args.backlog) as sock:
+        return Supervisor(
+            config, sock, args.workers, args.graceful_timeout
+        ).run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import detached_copy, user_cache, user_cache_key
+from app.coalescing import AsyncSingleFlight
+from app.config.sharding import current_tenant
+from app.models.user import User
+from app.pagination import decode_cursor, encode_cursor
+from app.repositories.async_user_repository import AsyncUserRepository
+from app.schemas.user_schema import (
+    UserCreateInput,
+    UserLoginInput,
+    UserPrincipal,
+    UserUpdateInput,
+)
+from app.security import Security
+from app.services.user_service import (
+    introspection_payload,
+    introspection_result,
+    principal_from_claims,
+)
+
+user_lookups = AsyncSingleFlight('user')
+
+
+class AsyncUserService:
+    def __init__(self, session: AsyncSession):
+        self.user_repo = AsyncUserRepository(session=session)
+        self.security = Security()
+
+    async def get_all_users(self) -> List[User]:
+        return await self.user_repo.get_all_users()
+
+    async def get_users_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        username_prefix: str | None = None,
+        email_prefix: str | None = None,
+    ) -> Tuple[List[User], str | None]:
+        after = decode_cursor(cursor) if cursor else None
+
+        # one extra row tells whether there is a next page
+        users = await self.user_repo.get_users_page(
+            limit + 1, after, username_prefix, email_prefix
+        )
+
+        if len(users) <= limit:
+            return users, None
+
+        users = users[:limit]
+        last_user = users[-1]
+
+        return users, encode_cursor(last_user.created_at, last_user.id)
+
+    async def register_user(self, data: UserCreateInput) -> Tuple[User, str]:
+        data.password = await self.security.get_password_hash_async(
+            data.password
+        )
+        user = await self.user_repo.create_user(data)
+        access_token = self.security.create_user_access_token(user)
+
+        return user, access_token
+
+    async def login_user(
+        self, data: UserLoginInput
+    ) -> Tuple[User, str] | False:
+        user = await self.user_repo.get_user_by({'email': data.email})
+
+        # this step is necessary to prevent user enumeration attacks
+        password_hash = self.security.wrong_password_hash()
+
+        if user:
+            password_hash = user.password
+
+        (
+            is_valid,
+            updated_hash,
+        ) = await self.security.verify_and_update_password_async(
+            data.password, password_hash
+        )
+
+        if not is_valid:
+            return False
+
+        # hashes made with older argon2 parameters are upgraded on login
+        if updated_hash is not None:
+            await self.user_repo.update_password_hash(user.id, updated_hash)
+
+        access_token = self.security.create_user_access_token(user)
+
+        return user, access_token
+
+    async def get_user_from_token(self, access_token: str) -> User | None:
+        payload = Security.decode_access_token(access_token)
+
+        if type(payload) is not dict:
+            return None
+
+        user_id = payload.get('sub')
+        user = user_cache.get(user_cache_key(user_id))
+
+        if user is None:
+            user = await self.get_user_by_id(user_id)
+
+            if user is not None:
+                user_cache.set(user_cache_key(user_id), user)
+
+        return user
+
+    async def get_principal_from_token(
+        self, access_token: str
+    ) -> UserPrincipal | None:
+        payload = Security.decode_access_token(access_token)
+
+        if type(payload) is not dict:
+            return None
+
+        # claims-mode tokens carry the whole profile, no lookup needed
+        if 'ver' in payload:
+            return principal_from_claims(payload)
+
+        user = await self.get_user_from_token(access_token)
+
+        if user is None:
+            return None
+
+        return UserPrincipal(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            version=user.version,
+            is_admin=user.is_admin,
+        )
+
+    async def refresh_tokens(
+        self, refresh_token: str
+    ) -> Tuple[str, str] | None:
+        payload = Security.decode_refresh_token(refresh_token)
+
+        if type(payload) is not dict:
+            return None
+
+        # refresh tokens come in the body, so the tenant of the request was
+        # not taken from them and has to match
+        tenant = current_tenant.get()
+
+        if tenant is not None and payload.get('tnt', tenant) != tenant:
+            return None
+
+        user = await self.get_user_by_id(payload.get('sub'))
+
+        if user is None:
+            return None
+
+        access_token = self.security.create_user_access_token(user)
+        new_refresh_token = self.security.create_refresh_token(user.id)
+
+        return access_token, new_refresh_token
+
+    async def introspect_tokens(self, tokens: List[str]) -> List[dict]:
+        payloads = [introspection_payload(token) for token in tokens]
+
+        # claims-mode tokens are answered from their claims, the others from
+        # their users, all loaded at once
+        users = await self.get_users_by_ids({
+            payload['sub']
+            for payload in payloads
+            if payload is not None and 'ver' not in payload
+        })
+
+        return [introspection_result(payload, users) for payload in payloads]
+
+    async def get_users_by_ids(
+        self, user_ids: Iterable[int]
+    ) -> Dict[int, User]:
+        users = {}
+        missing_ids = []
+
+        for user_id in user_ids:
+            user = user_cache.get(user_cache_key(user_id))
+
+            if user is None:
+                missing_ids.append(user_id)
+            else:
+                users[user_id] = user
+
+        if not missing_ids:
+            return users
+
+        for user in await self.user_repo.get_users_by_ids(missing_ids):
+            # cached, so detached from this session like get_user_by_id's
+            detached_user = detached_copy(user)
+            user_cache.set(user_cache_key(user.id), detached_user)
+            users[user.id] = detached_user
+
+        return users
+
+    async def get_user_by_id(self, user_id: int) -> User | None:
+        return await user_lookups.do(
+            user_cache_key(user_id), lambda: self._load_detached_user(user_id)
+        )
+
+    async def _load_detached_user(self, user_id: int) -> User | None:
+        # shared by every coalesced caller, so it must not belong to the
+        # session of the one that ran the query
+        user = await self.user_repo.get_user_by_id(user_id)
+
+        return detached_copy(user) if user is not None else None
+
+    async def update_user(
+        self, user_id: int, data: UserUpdateInput
+    ) -> User | None:
+        return await self.user_repo.update_user(user_id, data)
+
+    async def delete_user(self, user_id: int) -> True:
+        return await self.user_repo.delete_user(user_id)
@@ -1,16 +1,69 @@
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Tuple
 
 from sqlalchemy.orm import Session
 
+from app.cache import detached_copy, user_cache, user_cache_key
+from app.coalescing import SingleFlight
+from app.config.sharding import current_tenant
 from app.models.user import User
+from app.pagination import decode_cursor, encode_cursor
 from app.repositories.user_repository import UserRepository
 from app.schemas.user_schema import (
     UserCreateInput,
     UserLoginInput,
+    UserPrincipal,
     UserUpdateInput,
+    serialize_user_public,
 )
 from app.security import Security
 
+user_lookups = SingleFlight('user')
+
+
+def principal_from_claims(payload: dict) -> UserPrincipal:
+    return UserPrincipal(
+        id=payload['sub'],
+        username=payload['username'],
+        email=payload['email'],
+        version=payload['ver'],
+        is_admin=payload.get('adm', False),
+    )
+
+
+def introspection_payload(token: str) -> dict | None:
+    payload = Security.decode_access_token(token)
+
+    if type(payload) is not dict:
+        return None
+
+    # like refresh tokens, these come in the body and not from the tenant of
+    # the request, so it has to match
+    tenant = current_tenant.get()
+
+    if tenant is not None and payload.get('tnt', tenant) != tenant:
+        return None
+
+    return payload
+
+
+def introspection_result(payload: dict | None, users: Dict[int, User]) -> dict:
+    if payload is None:
+        return {'active': False}
+
+    if 'ver' in payload:
+        user = principal_from_claims(payload)
+    else:
+        user = users.get(payload['sub'])
+
+    if user is None:
+        return {'active': False}
+
+    return {
+        'active': True,
+        'claims': payload,
+        'user': serialize_user_public(user),
+    }
+
 
 class UserService:
     def __init__(self, session: Session):
@@ -20,10 +73,32 @@ class UserService:
     def get_all_users(self) -> List[User]:
         return self.user_repo.get_all_users()
 
+    def get_users_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        username_prefix: str | None = None,
+        email_prefix: str | None = None,
+    ) -> Tuple[List[User], str | None]:
+        after = decode_cursor(cursor) if cursor else None
+
+        # one extra row tells whether there is a next page
+        users = self.user_repo.get_users_page(
+            limit + 1, after, username_prefix, email_prefix
+        )
+
+        if len(users) <= limit:
+            return users, None
+
+        users = users[:limit]
+        last_user = users[-1]
+
+        return users, encode_cursor(last_user.created_at, last_user.id)
+
     def register_user(self, data: UserCreateInput) -> Tuple[User, str]:
         data.password = self.security.get_password_hash(data.password)
         user = self.user_repo.create_user(data)
-        access_token = self.security.create_access_token(data={'sub': user.id})
+        access_token = self.security.create_user_access_token(user)
 
         return user, access_token
 
@@ -36,12 +111,18 @@ class UserService:
         if user:
             password_hash = user.password
 
-        is_valid = self.security.verify_password(data.password, password_hash)
+        is_valid, updated_hash = self.security.verify_and_update_password(
+            data.password, password_hash
+        )
 
         if not is_valid:
             return False
 
-        access_token = self.security.create_access_token(data={'sub': user.id})
+        # hashes made with older argon2 parameters are upgraded on login
+        if updated_hash is not None:
+            self.user_repo.update_password_hash(user.id, updated_hash)
+
+        access_token = self.security.create_user_access_token(user)
 
         return user, access_token
 
@@ -51,12 +132,112 @@ class UserService:
         if type(payload) is not dict:
             return None
 
-        user = self.get_user_by_id(payload.get('sub'))
+        user_id = payload.get('sub')
+        user = user_cache.get(user_cache_key(user_id))
+
+        if user is None:
+            user = self.get_user_by_id(user_id)
+
+            if user is not None:
+                user_cache.set(user_cache_key(user_id), user)
 
         return user
 
+    def get_principal_from_token(
+        self, access_token: str
+    ) -> UserPrincipal | None:
+        payload = Security.decode_access_token(access_token)
+
+        if type(payload) is not dict:
+            return None
+
+        # claims-mode tokens carry the whole profile, no lookup needed
+        if 'ver' in payload:
+            return principal_from_claims(payload)
+
+        user = self.get_user_from_token(access_token)
+
+        if user is None:
+            return None
+
+        return UserPrincipal(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            version=user.version,
+            is_admin=user.is_admin,
+        )
+
+    def refresh_tokens(self, refresh_token: str) -> Tuple[str, str] | None:
+        payload = Security.decode_refresh_token(refresh_token)
+
+        if type(payload) is not dict:
+            return None
+
+        # refresh tokens come in the body, so the tenant of the request was
+        # not taken from them and has to match
+        tenant = current_tenant.get()
+
+        if tenant is not None and payload.get('tnt', tenant) != tenant:
+            return None
+
+        user = self.get_user_by_id(payload.get('sub'))
+
+        if user is None:
+            return None
+
+        access_token = self.security.create_user_access_token(user)
+        new_refresh_token = self.security.create_refresh_token(user.id)
+
+        return access_token, new_refresh_token
+
+    def introspect_tokens(self, tokens: List[str]) -> List[dict]:
+        payloads = [introspection_payload(token) for token in tokens]
+
+        # claims-mode tokens are answered from their claims, the others from
+        # their users, all loaded at once
+        users = self.get_users_by_ids({
+            payload['sub']
+            for payload in payloads
+            if payload is not None and 'ver' not in payload
+        })
+
+        return [introspection_result(payload, users) for payload in payloads]
+
+    def get_users_by_ids(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        users = {}
+        missing_ids = []
+
+        for user_id in user_ids:
+            user = user_cache.get(user_cache_key(user_id))
+
+            if user is None:
+                missing_ids.append(user_id)
+            else:
+                users[user_id] = user
+
+        if not missing_ids:
+            return users
+
+        for user in self.user_repo.get_users_by_ids(missing_ids):
+            # cached, so detached from this session like get_user_by_id's
+            detached_user = detached_copy(user)
+            user_cache.set(user_cache_key(user.id), detached_user)
+            users[user.id] = detached_user
+
+        return users
+
     def get_user_by_id(self, user_id: int) -> User | None:
-        return self.user_repo.get_user_by_id(user_id)
+        return user_lookups.do(
+            user_cache_key(user_id), lambda: self._load_detached_user(user_id)
+        )
+
+    def _load_detached_user(self, user_id: int) -> User | None:
+        # shared by every coalesced caller, so it must not belong to the
+        # session of the one that ran the query
+        user = self.user_repo.get_user_by_id(user_id)
+
+        return detached_copy(user) if user is not None else None
 
     def update_user(self, user_id: int, data: UserUpdateInput) -> User | None:
         return self.user_repo.update_user(user_id, data)
@@ -0,0 +1,63 @@
+import re
+from http import HTTPStatus
+
+from starlette.datastructures import Headers
+
+from app.config.settings import get_settings
+from app.config.sharding import current_tenant
+from app.responses import error_response
+from app.security import Security
+
+settings = get_settings()
+
+TENANT_PATTERN = re.compile(r'[a-z0-9][a-z0-9-]{0,62}')
+
+
+def resolve_tenant(headers: Headers) -> str:
+    # the token claim wins, so a token only ever works for its own tenant
+    scheme, _, token = headers.get('authorization', '').partition(' ')
+
+    if scheme.lower() == 'bearer' and token:
+        payload = Security.decode_access_token(token)
+
+        if isinstance(payload, dict) and 'tnt' in payload:
+            return payload['tnt']
+
+    if settings.tenant_header in headers:
+        return headers[settings.tenant_header].lower()
+
+    host = headers.get('host', '').split(':')[0]
+    suffix = f'.{settings.tenant_domain}'
+
+    if settings.tenant_domain and host.endswith(suffix):
+        return host.removesuffix(suffix)
+
+    return settings.default_tenant
+
+
+class TenantMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        tenant = resolve_tenant(Headers(scope=scope))
+
+        if not TENANT_PATTERN.fullmatch(tenant):
+            response = error_response(
+                'invalid tenant',
+                {'tenant': 'must be lowercase letters, digits and dashes'},
+                status_code=HTTPStatus.BAD_REQUEST,
+            )
+            await response(scope, receive, send)
+            return
+
+        token = current_tenant.set(tenant)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant.reset(token)
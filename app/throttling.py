@@ -0,0 +1,297 @@
+import ipaddress
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Protocol
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config.settings import get_settings
+from app.metrics import login_throttled_total
+
+settings = get_settings()
+
+WINDOW_BUCKETS = 30
+SQLITE_PURGE_EVERY = 1000
+
+
+TRUSTED_PROXIES = tuple(
+    ipaddress.ip_network(proxy, strict=False)
+    for proxy in settings.trusted_proxies
+)
+
+
+class ThrottledError(Exception):
+    def __init__(self, key: str, retry_after: int):
+        super().__init__(key)
+        self.key = key
+        self.retry_after = retry_after
+
+
+class ThrottleBackend(Protocol):
+    # whether hit() may wait on I/O and so must stay off the event loop
+    blocking: bool
+
+    def hit(self, key: str, bucket: int, buckets: int) -> tuple[int, int]:
+        # records one hit and returns the window total and its oldest
+        # non-empty bucket
+        ...
+
+    def clear(self): ...
+
+
+def _advance(counts: array, last_bucket: int, bucket: int) -> int:
+    # zero the slots that left the window, returns how much was dropped
+    if bucket - last_bucket >= len(counts):
+        dropped = sum(counts)
+        counts[:] = array(counts.typecode, [0]) * len(counts)
+        return dropped
+
+    dropped = 0
+
+    for expired in range(last_bucket + 1, bucket + 1):
+        slot = expired % len(counts)
+        dropped += counts[slot]
+        counts[slot] = 0
+
+    return dropped
+
+
+def _oldest_bucket(counts: array, bucket: int) -> int:
+    for oldest in range(bucket - len(counts) + 1, bucket + 1):
+        if counts[oldest % len(counts)]:
+            return oldest
+
+    return bucket
+
+
+class _Window:
+    __slots__ = ('last_bucket', 'total', 'counts')
+
+    def __init__(self, bucket: int, buckets: int):
+        self.last_bucket = bucket
+        self.total = 0
+        self.counts = array('I', bytes(4 * buckets))
+
+
+class MemoryThrottleBackend:
+    blocking = False
+
+    def __init__(self, max_keys: int | None = None):
+        self.max_keys = max_keys or get_settings().login_throttle_max_keys
+        self._windows: OrderedDict[str, _Window] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, bucket: int, buckets: int) -> tuple[int, int]:
+        with self._lock:
+            window = self._windows.get(key)
+
+            if window is None:
+                window = self._windows[key] = _Window(bucket, buckets)
+
+                # the least recently hit keys are the idle ones
+                while len(self._windows) > self.max_keys:
+                    self._windows.popitem(last=False)
+            else:
+                self._windows.move_to_end(key)
+
+            window.total -= _advance(window.counts, window.last_bucket, bucket)
+            window.last_bucket = bucket
+            window.counts[bucket % buckets] += 1
+            window.total += 1
+
+            return window.total, _oldest_bucket(window.counts, bucket)
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+
+class SQLiteThrottleBackend:
+    # shares the windows between worker processes through one file
+    blocking = True
+
+    def __init__(self, path: str | None = None):
+        self.path = path or get_settings().login_throttle_sqlite_path
+        self._local = threading.local()
+        self._hits = 0
+
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS login_throttle ('
+                'key TEXT PRIMARY KEY, last_bucket INTEGER NOT NULL, '
+                'counts BLOB NOT NULL)'
+            )
+
+    def hit(self, key: str, bucket: int, buckets: int) -> tuple[int, int]:
+        conn = self._connect()
+
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT last_bucket, counts FROM login_throttle WHERE key = ?',
+                (key,),
+            ).fetchone()
+            counts = array('I', bytes(4 * buckets))
+
+            if row is not None and len(row[1]) == len(counts) * 4:
+                counts = array('I', row[1])
+                _advance(counts, row[0], bucket)
+
+            counts[bucket % buckets] += 1
+            conn.execute(
+                'INSERT INTO login_throttle (key, last_bucket, counts) '
+                'VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                'last_bucket = excluded.last_bucket, counts = excluded.counts',
+                (key, bucket, counts.tobytes()),
+            )
+
+        self._hits += 1
+
+        if self._hits % SQLITE_PURGE_EVERY == 0:
+            self.purge(bucket - buckets)
+
+        return sum(counts), _oldest_bucket(counts, bucket)
+
+    def purge(self, before_bucket: int):
+        with self._connect() as conn:
+            conn.execute(
+                'DELETE FROM login_throttle WHERE last_bucket <= ?',
+                (before_bucket,),
+            )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM login_throttle')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+
+        # a forked worker must not reuse the connection of its parent
+        if conn is None or self._local.pid != os.getpid():
+            # autocommit mode, transactions are opened explicitly
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+
+        return conn
+
+
+class SlidingWindowLimiter:
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        window: float,
+        backend: ThrottleBackend,
+        buckets: int = WINDOW_BUCKETS,
+    ):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.backend = backend
+        self.buckets = buckets
+        self.bucket_width = window / buckets
+        # wall clock time, so windows line up between worker processes
+        self.clock: Callable[[], float] = time.time
+        self._throttled = login_throttled_total.labels(name)
+
+    def hit(self, key: str):
+        # a limit of 0 turns the limiter off
+        if self.limit <= 0:
+            return
+
+        now = self.clock()
+        bucket = int(now // self.bucket_width)
+        total, oldest_bucket = self.backend.hit(
+            f'{self.name}:{key}', bucket, self.buckets
+        )
+
+        if total > self.limit:
+            # the oldest hits leave the window once their bucket expires
+            expires_at = (oldest_bucket + self.buckets) * self.bucket_width
+            retry_after = max(math.ceil(expires_at - now), 1)
+
+            self._throttled.inc()
+            raise ThrottledError(f'{self.name}:{key}', retry_after)
+
+
+class LoginThrottle:
+    def __init__(self, backend: ThrottleBackend):
+        self.backend = backend
+        self.email_limiter = SlidingWindowLimiter(
+            'email',
+            settings.login_throttle_email_limit,
+            settings.login_throttle_email_window,
+            backend,
+        )
+        self.ip_limiter = SlidingWindowLimiter(
+            'ip',
+            settings.login_throttle_ip_limit,
+            settings.login_throttle_ip_window,
+            backend,
+        )
+
+    def hit(self, email: str, client_ip: str | None):
+        if client_ip is not None:
+            self.ip_limiter.hit(client_ip)
+
+        self.email_limiter.hit(email.lower())
+
+    async def hit_async(self, email: str, client_ip: str | None):
+        # the SQLite backend waits up to its busy timeout for the file lock
+        if self.backend.blocking:
+            await run_in_threadpool(self.hit, email, client_ip)
+        else:
+            self.hit(email, client_ip)
+
+
+def client_ip(
+    client_host: str | None,
+    forwarded_for: str | None,
+    proxies: tuple = TRUSTED_PROXIES,
+) -> str | None:
+    if not forwarded_for or not _is_trusted(client_host, proxies):
+        return client_host
+
+    # every proxy appends the address it got the request from, so the client
+    # is the last one that no trusted proxy added
+    addresses = [
+        address.strip()
+        for address in forwarded_for.split(',')
+        if address.strip()
+    ]
+
+    for address in reversed(addresses):
+        if not _is_trusted(address, proxies):
+            return address
+
+    return addresses[0] if addresses else client_host
+
+
+def _is_trusted(address: str | None, proxies: tuple) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+
+    return any(ip in network for network in proxies)
+
+
+def create_throttle_backend(name: str | None = None):
+    if (name or get_settings().login_throttle_backend) == 'sqlite':
+        return SQLiteThrottleBackend()
+
+    return MemoryThrottleBackend()
+
+
+login_throttle = LoginThrottle(create_throttle_backend())
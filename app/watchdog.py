@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_DIRS = tuple(
+    os.path.abspath(sysconfig.get_paths()[name])
+    for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')
+)
+WATCHDOG_FILE = os.path.abspath(__file__)
+
+
+@dataclass
+class BlockingReport:
+    duration: float
+    route: str | None
+    function: str | None
+    stack: str
+
+
+class LoopWatchdog:
+    def __init__(self, enabled: bool, threshold: float):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.reports: list[BlockingReport] = []
+        self._loop_thread_id: int | None = None
+        self._last_beat = 0.0
+        self._heartbeat_task: asyncio.Task | None = None
+        self._monitor_thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @property
+    def interval(self) -> float:
+        return self.threshold / 4
+
+    async def start(self):
+        if not self.enabled or self._heartbeat_task is not None:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._monitor_thread = threading.Thread(
+            target=self._monitor, name='loop-watchdog', daemon=True
+        )
+        self._monitor_thread.start()
+
+    async def stop(self):
+        if self._heartbeat_task is None:
+            return
+
+        self._stopped.set()
+        self._heartbeat_task.cancel()
+        self._monitor_thread.join()
+
+        self._heartbeat_task = None
+        self._monitor_thread = None
+
+    async def _heartbeat(self):
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _monitor(self):
+        reported_beat = None
+
+        while not self._stopped.wait(self.interval):
+            last_beat = self._last_beat
+            lag = time.monotonic() - last_beat - self.interval
+
+            # report each stall once, while the loop is still stuck in it
+            if lag < self.threshold or last_beat == reported_beat:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+
+            if frame is not None:
+                reported_beat = last_beat
+                self._report(lag, frame)
+
+    def _report(self, lag: float, frame):
+        stack = traceback.extract_stack(frame)
+        report = BlockingReport(
+            duration=lag,
+            route=_find_route(frame),
+            function=_find_caller(stack),
+            stack=''.join(traceback.format_list(stack)),
+        )
+        self.reports.append(report)
+
+        logger.warning(
+            'event loop blocked for more than %.3fs on route %s in %s\n%s',
+            report.duration,
+            report.route,
+            report.function,
+            report.stack,
+        )
+
+
+def _find_route(frame) -> str | None:
+    while frame is not None:
+        scope = frame.f_locals.get('scope')
+
+        if isinstance(scope, dict) and scope.get('type') == 'http':
+            route = scope.get('route')
+            return getattr(route, 'path', scope.get('path'))
+
+        frame = frame.f_back
+
+    return None
+
+
+def _find_caller(stack: traceback.StackSummary) -> str | None:
+    for frame_summary in reversed(stack):
+        filename = os.path.abspath(frame_summary.filename)
+
+        if filename != WATCHDOG_FILE and not filename.startswith(LIBRARY_DIRS):
+            return frame_summary.name
+
+    return None
+
+
+loop_watchdog = LoopWatchdog(
+    enabled=get_settings().debug,
+    threshold=get_settings().loop_watchdog_threshold,
+)
@@ -0,0 +1,2 @@
+# imported before any benchmark module, and so before the app settings
+from benchmarks import _env  # noqa: F401
@@ -0,0 +1,16 @@
+import os
+
+BENCHMARK_DATABASE_URL = 'sqlite:///./database-benchmark.sqlite'
+
+# benchmarks drop and refill their database, so they never run against the
+# databases of the shell or of .env; blank values fall back to the defaults
+os.environ['DATABASE_URL'] = BENCHMARK_DATABASE_URL
+os.environ['ASYNC_DATABASE_URL'] = ''
+os.environ['DATABASE_REPLICA_URLS'] = ''
+os.environ['DATABASE_SHARD_URLS'] = ''
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+
+# every login comes from one address and a few accounts, throttling would
+# answer most of them with 429
+os.environ['LOGIN_THROTTLE_EMAIL_LIMIT'] = '0'
+os.environ['LOGIN_THROTTLE_IP_LIMIT'] = '0'
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.cache import detached_copy, user_cache, user_cache_key
+from app.config.database import AsyncSessionLocal, async_engine
+from app.instrumentation import record_queries
+from app.security import Security
+from app.services.async_user_service import AsyncUserService
+from benchmarks.run import seed_users
+
+
+async def direct_lookup(token: str):
+    # get_user_from_token as it was before the lookups were coalesced
+    async with AsyncSessionLocal() as session:
+        service = AsyncUserService(session)
+        user_id = Security.decode_access_token(token)['sub']
+        user = user_cache.get(user_cache_key(user_id))
+
+        if user is None:
+            user = await service.user_repo.get_user_by_id(user_id)
+
+            if user is not None:
+                user_cache.set(user_cache_key(user_id), detached_copy(user))
+
+        return user
+
+
+async def coalesced_lookup(token: str):
+    async with AsyncSessionLocal() as session:
+        return await AsyncUserService(session).get_user_from_token(token)
+
+
+LOOKUPS = {'direct': direct_lookup, 'coalesced': coalesced_lookup}
+
+
+async def run(name: str, tokens: list[str], bursts: int, fan_out: int):
+    lookup = LOOKUPS[name]
+    latencies = []
+
+    with record_queries(async_engine.sync_engine) as stats:
+        for index in range(bursts):
+            # a cold cache, as when a client's first screen fans out
+            user_cache.clear()
+            token = tokens[index % len(tokens)]
+
+            started_at = time.perf_counter()
+            await asyncio.gather(*[lookup(token) for _ in range(fan_out)])
+            latencies.append(time.perf_counter() - started_at)
+
+    await async_engine.dispose()
+
+    return {
+        'lookup': name,
+        'bursts': bursts,
+        'fan_out': fan_out,
+        'queries_per_burst': round(stats.count / bursts, 2),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='User lookups under a burst of requests with one token'
+    )
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--bursts', type=int, default=200)
+    parser.add_argument('--fan-out', type=int, default=20)
+    args = parser.parse_args()
+
+    tokens = [user['token'] for user in seed_users(args.users)]
+    results = [
+        asyncio.run(run(name, tokens, args.bursts, args.fan_out))
+        for name in LOOKUPS
+    ]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config.database import (
+    create_database_engine,
+    table_registry,
+)
+from app.models.user import User
+
+
+def default_engine(database_url: str):
+    # the engine as it was built before the pragmas and pool options
+    return create_engine(
+        database_url, connect_args={'check_same_thread': False}
+    )
+
+
+ENGINES = {'default': default_engine, 'tuned': create_database_engine}
+
+
+def seed(engine, users: int):
+    table_registry.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add_all(
+            User(
+                username=f'seed{index}',
+                password='benchmark-password',
+                email=f'seed{index}@benchmark.com',
+            )
+            for index in range(users)
+        )
+        session.commit()
+
+
+def worker(engine, operations: int, write_ratio: float, users: int) -> dict:
+    name = threading.current_thread().name
+    latencies, errors = [], 0
+
+    for index in range(operations):
+        started_at = time.perf_counter()
+
+        try:
+            with Session(engine) as session:
+                if random.random() < write_ratio:
+                    session.add(
+                        User(
+                            username=f'{name}-{index}',
+                            password='benchmark-password',
+                            email=f'{name}-{index}@benchmark.com',
+                        )
+                    )
+                    session.commit()
+                else:
+                    session.get(User, random.randint(1, users))
+                    session.scalar(select(func.count()).select_from(User))
+        except OperationalError:
+            # "database is locked" once the busy timeout runs out
+            errors += 1
+
+        latencies.append(time.perf_counter() - started_at)
+
+    return {'latencies': latencies, 'errors': errors}
+
+
+def run(name: str, args, directory: str) -> dict:
+    database_url = f'sqlite:///{os.path.join(directory, f"{name}.sqlite")}'
+    engine = ENGINES[name](database_url)
+    seed(engine, args.users)
+
+    started_at = time.perf_counter()
+
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        results = list(
+            executor.map(
+                lambda _: worker(
+                    engine, args.operations, args.write_ratio, args.users
+                ),
+                range(args.concurrency),
+            )
+        )
+
+    elapsed = time.perf_counter() - started_at
+    engine.dispose()
+
+    latencies = sorted(
+        latency for result in results for latency in result['latencies']
+    )
+    quantiles = statistics.quantiles(latencies, n=100)
+
+    return {
+        'engine': name,
+        'operations': len(latencies),
+        'ops_per_second': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(quantiles[49] * 1000, 2),
+        'p99_ms': round(quantiles[98] * 1000, 2),
+        'lock_errors': sum(result['errors'] for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Mixed reads and writes from concurrent threads against '
+        'the default and the tuned SQLite engine'
+    )
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--operations', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    # every engine gets its own file, WAL mode sticks to a database
+    with tempfile.TemporaryDirectory() as directory:
+        results = [run(name, args, directory) for name in ENGINES]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from sqlalchemy import insert
+
+from app.config.database import (
+    SessionLocal,
+    engine,
+    table_registry,
+)
+from app.export import iter_export
+from app.models.user import User
+from app.repositories.user_repository import UserRepository
+
+SEED_BATCH_SIZE = 10000
+CHECKPOINTS = 10
+
+
+def seed_users(number: int):
+    table_registry.metadata.drop_all(engine)
+    table_registry.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        for start in range(0, number, SEED_BATCH_SIZE):
+            conn.execute(
+                insert(User),
+                [
+                    {
+                        'username': f'export{index}',
+                        'email': f'export{index}@benchmark.com',
+                        'password': 'benchmark-password-hash',
+                    }
+                    for index in range(
+                        start, min(start + SEED_BATCH_SIZE, number)
+                    )
+                ],
+            )
+
+
+def current_rss_mb() -> float:
+    with open('/proc/self/statm', encoding='utf-8') as file:
+        pages = int(file.read().split()[1])
+
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode: str, rows: int, export_format: str) -> dict:
+    started_rss = current_rss_mb()
+    checkpoint_every = max(rows // CHECKPOINTS, 1)
+    samples = []
+    # the csv header is a line but not a row
+    exported = -1 if export_format == 'csv' else 0
+    started_at = time.perf_counter()
+
+    with SessionLocal() as session, open(
+        os.devnull, 'w', encoding='utf-8'
+    ) as output:
+        if mode == 'stream':
+            for chunk in iter_export(session, export_format):
+                output.write(chunk)
+                exported += chunk.count('\n')
+
+                if exported // checkpoint_every > len(samples):
+                    samples.append(round(current_rss_mb(), 1))
+        else:
+            users = UserRepository(session=session).get_all_users()
+            exported = len(users)
+            samples.append(round(current_rss_mb(), 1))
+
+    return {
+        'mode': mode,
+        'rows': exported,
+        'seconds': round(time.perf_counter() - started_at, 3),
+        'start_rss_mb': round(started_rss, 1),
+        'rss_mb_samples': samples,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Memory usage of the streaming users export'
+    )
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--format', choices=('ndjson', 'csv'), default='csv')
+    parser.add_argument(
+        '--compare-all',
+        action='store_true',
+        help='also measure loading every user with get_all_users()',
+    )
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--measure', choices=('stream', 'all'))
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.rows, args.format)))
+        return
+
+    if not args.skip_seed:
+        seed_users(args.rows)
+
+    modes = ['stream', 'all'] if args.compare_all else ['stream']
+    results = []
+
+    # each mode runs in a fresh process so peak RSS is not shared
+    for mode in modes:
+        output = subprocess.check_output([
+            sys.executable,
+            '-m',
+            'benchmarks.export',
+            '--measure',
+            mode,
+            '--rows',
+            str(args.rows),
+            '--format',
+            args.format,
+        ])
+        results.append(json.loads(output))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
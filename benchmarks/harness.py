@@ -0,0 +1,119 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+
+RequestFactory = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    requests: int
+    errors: int
+    seconds: float
+    latencies: list[float] = field(default_factory=list, repr=False)
+
+    def summary(self) -> dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'seconds': round(self.seconds, 4),
+            # failed requests, e.g. throttled ones, are often the fastest
+            'throughput': round(
+                (self.requests - self.errors) / self.seconds, 2
+            ),
+            'p50_ms': round(percentile(self.latencies, 50) * 1000, 3),
+            'p95_ms': round(percentile(self.latencies, 95) * 1000, 3),
+            'p99_ms': round(percentile(self.latencies, 99) * 1000, 3),
+        }
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+
+    return ordered[rank]
+
+
+async def run_scenario(
+    scenario: str,
+    client: httpx.AsyncClient,
+    make_request: RequestFactory,
+    requests: int,
+    concurrency: int,
+) -> ScenarioResult:
+    latencies = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+
+            started_at = time.perf_counter()
+            response = await make_request(client, index)
+
+            if not response.is_success:
+                errors += 1
+                continue
+
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    return ScenarioResult(
+        scenario=scenario,
+        requests=requests,
+        errors=errors,
+        seconds=time.perf_counter() - started_at,
+        latencies=latencies,
+    )
+
+
+def find_regressions(
+    results: dict, baseline: dict, threshold: float
+) -> list[str]:
+    regressions = []
+
+    for scenario, summary in results.items():
+        expected = baseline.get(scenario)
+
+        if expected is None:
+            continue
+
+        if summary['throughput'] < expected['throughput'] * (1 - threshold):
+            regressions.append(
+                f'{scenario}: throughput {summary["throughput"]} req/s '
+                f'is below baseline {expected["throughput"]} req/s'
+            )
+
+        for key in ('p95_ms', 'p99_ms'):
+            if summary[key] > expected[key] * (1 + threshold):
+                regressions.append(
+                    f'{scenario}: {key} {summary[key]} '
+                    f'is above baseline {expected[key]}'
+                )
+
+    return regressions
+
+
+def find_failures(results: dict) -> list[str]:
+    # failed requests are left out of the figures, so they must not pass
+    # unnoticed either
+    return [
+        f'{scenario}: {summary["errors"]} of {summary["requests"]} '
+        'requests failed'
+        for scenario, summary in results.items()
+        if summary['errors']
+    ]
@@ -0,0 +1,56 @@
+import argparse
+import asyncio
+import json
+import time
+
+from app.config.settings import available_cpus
+from app.hashing import HashingEngine
+from app.security import Security
+
+
+async def run(workers: int, requests: int, password_hash: str) -> dict:
+    engine = HashingEngine(
+        max_workers=workers, max_pending=requests, timeout=600
+    )
+
+    # warm up every worker so process start-up is not measured
+    await asyncio.gather(*[
+        engine.verify('123456789', password_hash) for _ in range(workers)
+    ])
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*[
+        engine.verify('123456789', password_hash) for _ in range(requests)
+    ])
+    elapsed = time.perf_counter() - started_at
+
+    engine.shutdown()
+
+    return {
+        'workers': workers,
+        'requests': requests,
+        'seconds': round(elapsed, 4),
+        'logins_per_second': round(requests / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Login verification throughput per hashing worker count'
+    )
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--max-workers', type=int, default=available_cpus())
+    args = parser.parse_args()
+
+    password_hash = Security.get_password_hash('123456789')
+
+    results = [
+        asyncio.run(run(workers, args.requests, password_hash))
+        for workers in range(1, args.max_workers + 1)
+    ]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
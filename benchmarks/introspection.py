@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.cache import user_cache
+from app.config.database import AsyncSessionLocal, async_engine
+from app.instrumentation import record_queries
+from app.services.async_user_service import AsyncUserService
+from benchmarks.run import seed_users
+
+
+async def per_token(service: AsyncUserService, tokens: list[str]):
+    # what an internal service did before, one lookup per token
+    return [await service.get_user_from_token(token) for token in tokens]
+
+
+async def batched(service: AsyncUserService, tokens: list[str]):
+    return await service.introspect_tokens(tokens)
+
+
+INTROSPECTIONS = {'per_token': per_token, 'batched': batched}
+
+
+async def run(name: str, tokens: list[str], rounds: int, batch_size: int):
+    introspect = INTROSPECTIONS[name]
+    latencies = []
+
+    with record_queries(async_engine.sync_engine) as stats:
+        for index in range(rounds):
+            # a cold cache, the worst case for a batch of distinct users
+            user_cache.clear()
+            start = index * batch_size % len(tokens)
+            batch = (tokens * 2)[start : start + batch_size]
+
+            started_at = time.perf_counter()
+            async with AsyncSessionLocal() as session:
+                await introspect(AsyncUserService(session), batch)
+            latencies.append(time.perf_counter() - started_at)
+
+    await async_engine.dispose()
+
+    return {
+        'introspection': name,
+        'rounds': rounds,
+        'batch_size': batch_size,
+        'queries_per_batch': round(stats.count / rounds, 2),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Introspection of a batch of tokens of distinct users'
+    )
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args()
+
+    tokens = [user['token'] for user in seed_users(args.users)]
+    results = [
+        asyncio.run(run(name, tokens, args.rounds, args.batch_size))
+        for name in INTROSPECTIONS
+    ]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
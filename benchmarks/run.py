@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+
+from app.config.database import (
+    SessionLocal,
+    engine,
+    table_registry,
+)
+from app.main import app
+from app.repositories.user_repository import UserRepository
+from app.schemas.user_schema import UserCreateInput
+from app.security import Security
+from benchmarks.harness import find_failures, find_regressions, run_scenario
+
+PASSWORD = 'benchmark-password'
+SCENARIOS = ('register', 'login', 'me', 'mixed')
+MIXED_LOGIN_RATIO = 0.1
+MIXED_REGISTER_RATIO = 0.05
+
+
+def seed_users(number: int) -> list[dict]:
+    table_registry.metadata.drop_all(engine)
+    table_registry.metadata.create_all(engine)
+
+    password_hash = Security.get_password_hash(PASSWORD)
+    users = []
+
+    with SessionLocal() as session:
+        user_repo = UserRepository(session=session)
+
+        for index in range(number):
+            user = user_repo.create_user(
+                UserCreateInput(
+                    username=f'seed{index}',
+                    email=f'seed{index}@benchmark.com',
+                    password=password_hash,
+                )
+            )
+            users.append({
+                'email': user.email,
+                'token': Security.create_user_access_token(user),
+            })
+
+    return users
+
+
+def request_factories(users: list[dict], run_id: str) -> dict:
+    def register(client, index):
+        return client.post(
+            '/auth/register/',
+            json={
+                'username': f'{run_id}-user{index}',
+                'email': f'{run_id}-user{index}@benchmark.com',
+                'password': PASSWORD,
+            },
+        )
+
+    def login(client, index):
+        user = users[index % len(users)]
+        return client.post(
+            '/auth/login/', json={'email': user['email'], 'password': PASSWORD}
+        )
+
+    def me(client, index):
+        user = users[index % len(users)]
+        return client.get(
+            '/auth/me/', headers={'Authorization': f'Bearer {user["token"]}'}
+        )
+
+    def mixed(client, index):
+        draw = random.random()
+
+        if draw < MIXED_REGISTER_RATIO:
+            return register(client, f'mixed{index}')
+
+        if draw < MIXED_REGISTER_RATIO + MIXED_LOGIN_RATIO:
+            return login(client, index)
+
+        return me(client, index)
+
+    return {'register': register, 'login': login, 'me': me, 'mixed': mixed}
+
+
+@asynccontextmanager
+async def in_process_client():
+    await app.router.startup()
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url='http://benchmark'
+        ) as client:
+            yield client
+    finally:
+        await app.router.shutdown()
+
+
+@contextmanager
+def uvicorn_server(command: str | None):
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    command = command or (
+        f'{sys.executable} -m uvicorn app.main:app --port {{port}} '
+        '--log-level warning'
+    )
+    # a new session lets us stop the shell and every server process
+    process = subprocess.Popen(  # noqa: S602
+        command.format(port=port),
+        shell=True,
+        env=os.environ.copy(),
+        start_new_session=True,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+
+    try:
+        wait_until_ready(base_url)
+        yield base_url
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def wait_until_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f'{base_url}/')
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+    raise RuntimeError(f'server at {base_url} did not start in {timeout}s')
+
+
+async def run_all(args, users: list[dict], client: httpx.AsyncClient):
+    factories = request_factories(users, run_id=f'run{int(time.time())}')
+    results = {}
+
+    for scenario in args.scenarios:
+        result = await run_scenario(
+            scenario,
+            client,
+            factories[scenario],
+            requests=args.requests,
+            concurrency=args.concurrency,
+        )
+        results[scenario] = result.summary()
+
+    return results
+
+
+async def run_in_process(args, users: list[dict]) -> dict:
+    async with in_process_client() as client:
+        return await run_all(args, users, client)
+
+
+async def run_against(args, users: list[dict], base_url: str) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        return await run_all(args, users, client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Auth endpoints benchmark')
+    parser.add_argument(
+        '--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument(
+        '--server',
+        action='store_true',
+        help='run against a real uvicorn process instead of in-process',
+    )
+    parser.add_argument(
+        '--server-cmd',
+        help='command starting the server, with a {port} placeholder',
+    )
+    parser.add_argument('--url', help='run against an already running server')
+    parser.add_argument('--output', help='write the JSON report to a file')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='tolerated relative regression versus the baseline',
+    )
+    args = parser.parse_args()
+
+    users = seed_users(args.users)
+
+    if args.url:
+        results = asyncio.run(run_against(args, users, args.url))
+    elif args.server or args.server_cmd:
+        with uvicorn_server(args.server_cmd) as base_url:
+            results = asyncio.run(run_against(args, users, base_url))
+    else:
+        results = asyncio.run(run_in_process(args, users))
+
+    report = json.dumps(results, indent=2)
+    print(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(report)
+
+    failures = find_failures(results)
+
+    for failure in failures:
+        print(f'FAILURE {failure}', file=sys.stderr)
+
+    if failures:
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+        regressions = find_regressions(results, baseline, args.threshold)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import json
+import timeit
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.user import User
+from app.responses import success_response
+from app.schemas.response_schema import SuccessResponse
+from app.schemas.user_schema import (
+    UserPublic,
+    serialize_user_public,
+)
+
+TOKEN = 'header.' + 'p' * 180 + '.signature'
+
+
+def make_user() -> User:
+    user = User(
+        username='benchmark', email='benchmark@test.com', password='hash'
+    )
+    user.id = 1
+
+    return user
+
+
+def run_until_complete(coroutine):
+    # serialize_response never suspends, no event loop needed to drive it
+    try:
+        coroutine.send(None)
+    except StopIteration as exc:
+        return exc.value
+
+    raise RuntimeError('coroutine suspended')
+
+
+def pydantic_pipeline(response_field, user: User) -> bytes:
+    # what a route returning SuccessResponse with response_model costs
+    content = SuccessResponse(
+        data={
+            'user': UserPublic(**user.__dict__),
+            'access_token': TOKEN,
+            'refresh_token': TOKEN,
+        }
+    )
+    encoded = run_until_complete(
+        serialize_response(field=response_field, response_content=content)
+    )
+
+    return JSONResponse(encoded).body
+
+
+def fast_pipeline(user: User) -> bytes:
+    data = {
+        'user': serialize_user_public(user),
+        'access_token': TOKEN,
+        'refresh_token': TOKEN,
+    }
+
+    return success_response(data).body
+
+
+def measure(fn, number: int) -> dict:
+    seconds = min(timeit.repeat(fn, number=number, repeat=5))
+
+    return {
+        'iterations': number,
+        'us_per_response': round(seconds / number * 1_000_000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Per-response serialization cost of the auth payloads'
+    )
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    user = make_user()
+    response_field = create_response_field(
+        name='response', type_=SuccessResponse
+    )
+
+    pydantic = measure(
+        lambda: pydantic_pipeline(response_field, user), args.iterations
+    )
+    fast = measure(lambda: fast_pipeline(user), args.iterations)
+
+    if json.loads(pydantic_pipeline(response_field, user)) != json.loads(
+        fast_pipeline(user)
+    ):
+        raise RuntimeError('both pipelines must render the same payload')
+
+    print(json.dumps({'pydantic': pydantic, 'fast': fast}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
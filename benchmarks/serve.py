@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from app.config.settings import available_cpus
+from benchmarks.run import (
+    SCENARIOS,
+    run_against,
+    seed_users,
+    uvicorn_server,
+)
+
+
+def server_commands(workers: int) -> dict:
+    return {
+        # what the dockerfile used to run
+        'uvicorn-reload': (
+            f'{sys.executable} -m uvicorn app.main:app --host 127.0.0.1 '
+            '--port {port} --reload --log-level warning'
+        ),
+        'serve': (
+            f'{sys.executable} -m app.serve --host 127.0.0.1 --port {{port}} '
+            f'--workers {workers} --log-level warning'
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='The previous uvicorn command against python -m app.serve'
+    )
+    parser.add_argument(
+        '--scenarios', nargs='+', choices=SCENARIOS, default=['me', 'login']
+    )
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=available_cpus())
+    args = parser.parse_args()
+
+    users = seed_users(args.users)
+    results = {}
+
+    for name, command in server_commands(args.workers).items():
+        with uvicorn_server(command) as base_url:
+            results[name] = asyncio.run(run_against(args, users, base_url))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config.database import (
+    create_database_engine,
+    table_registry,
+)
+from app.config.sharding import HashRing
+from app.models.user import User
+
+
+def run(shards: int, args, directory: str) -> dict:
+    engines = {
+        f'shard-{index}': create_database_engine(
+            f'sqlite:///{os.path.join(directory, f"{shards}-{index}.sqlite")}'
+        )
+        for index in range(shards)
+    }
+
+    for engine in engines.values():
+        table_registry.metadata.create_all(engine)
+
+    ring = HashRing(list(engines))
+    tenants = [f'restaurant-{index}' for index in range(args.tenants)]
+
+    def writer(worker: int) -> int:
+        errors = 0
+
+        for index in range(args.writes):
+            tenant = tenants[(worker * args.writes + index) % len(tenants)]
+            name = f'{worker}-{index}'
+
+            try:
+                with Session(engines[ring.node_for(tenant)]) as session:
+                    session.execute(
+                        insert(User).values(
+                            username=name,
+                            email=f'{name}@{tenant}.com',
+                            password='benchmark-password',
+                        )
+                    )
+                    session.commit()
+            except OperationalError:
+                errors += 1
+
+        return errors
+
+    started_at = time.perf_counter()
+
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        errors = sum(executor.map(writer, range(args.concurrency)))
+
+    elapsed = time.perf_counter() - started_at
+
+    for engine in engines.values():
+        engine.dispose()
+
+    writes = args.concurrency * args.writes
+
+    return {
+        'shards': shards,
+        'writes': writes,
+        'writes_per_second': round(writes / elapsed, 2),
+        'lock_errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='User insert throughput as tenants spread over shards'
+    )
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--tenants', type=int, default=100)
+    parser.add_argument('--writes', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [run(shards, args, directory) for shards in args.shards]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
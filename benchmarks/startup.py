@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORTTIME_PREFIX = 'import time:'
+
+
+def parse_importtime(output: str) -> dict[str, tuple[int, int]]:
+    # "import time: self [us] | cumulative | imported package" lines, the
+    # package name is indented by its nesting depth
+    modules = {}
+
+    for line in output.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+
+        self_us, cumulative_us, name = line[len(IMPORTTIME_PREFIX) :].split(
+            '|'
+        )
+
+        if not self_us.strip().isdigit():
+            continue
+
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+
+    return modules
+
+
+def import_once(module: str) -> dict[str, tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=os.environ.copy(),
+    )
+
+    return parse_importtime(result.stderr)
+
+
+def measure(module: str, runs: int, top: int) -> dict:
+    # the first import also writes the bytecode caches, leave it out
+    import_once(module)
+    samples = [import_once(module) for _ in range(runs)]
+    cumulative = [sample[module][1] for sample in samples]
+    slowest = sorted(
+        samples[-1].items(), key=lambda item: item[1][0], reverse=True
+    )
+
+    return {
+        'module': module,
+        'runs': runs,
+        'cumulative_ms': round(statistics.median(cumulative) / 1000, 2),
+        'modules': len(samples[-1]),
+        'slowest_self_ms': {
+            name: round(self_us / 1000, 2)
+            for name, (self_us, _) in slowest[:top]
+        },
+    }
+
+
+def find_startup_regression(
+    report: dict, baseline: dict, threshold: float
+) -> str | None:
+    limit = baseline['cumulative_ms'] * (1 + threshold)
+
+    if report['cumulative_ms'] <= limit:
+        return None
+
+    return (
+        f'{report["module"]}: import takes {report["cumulative_ms"]} ms, '
+        f'above baseline {baseline["cumulative_ms"]} ms'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Cold-start import cost measured with -X importtime'
+    )
+    parser.add_argument('--module', default='app.main')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', help='write the JSON report to a file')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.2,
+        help='tolerated relative regression versus the baseline',
+    )
+    args = parser.parse_args()
+
+    report = measure(args.module, args.runs, args.top)
+    output = json.dumps(report, indent=2)
+    print(output)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+        regression = find_startup_regression(report, baseline, args.threshold)
+
+        if regression:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
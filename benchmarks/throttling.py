@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app.config.settings import get_settings
+from app.throttling import (
+    MemoryThrottleBackend,
+    SlidingWindowLimiter,
+    SQLiteThrottleBackend,
+    ThrottledError,
+)
+
+
+def run(name: str, backend, requests: int, keys: int) -> dict:
+    # a limit nobody reaches, so only the bookkeeping is measured
+    limiter = SlidingWindowLimiter(
+        'email',
+        requests + 1,
+        get_settings().login_throttle_email_window,
+        backend,
+    )
+    emails = [f'user{index}@benchmark.com' for index in range(keys)]
+
+    started_at = time.perf_counter()
+
+    for index in range(requests):
+        try:
+            limiter.hit(emails[index % keys])
+        except ThrottledError:
+            pass
+
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        'backend': name,
+        'requests': requests,
+        'keys': keys,
+        'us_per_check': round(elapsed / requests * 1_000_000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Login throttling overhead per request'
+    )
+    parser.add_argument('--requests', type=int, default=100_000)
+    parser.add_argument('--keys', type=int, default=10_000)
+    args = parser.parse_args()
+
+    results = [
+        run(
+            'memory',
+            MemoryThrottleBackend(max_keys=args.keys),
+            args.requests,
+            args.keys,
+        )
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SQLiteThrottleBackend(
+            os.path.join(directory, 'throttle.sqlite')
+        )
+        # the disk-backed store is much slower, keep its run short
+        results.append(
+            run('sqlite', backend, max(args.requests // 10, 1), args.keys)
+        )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import json
+import time
+
+from app.config.database import (
+    SessionLocal,
+    engine,
+    table_registry,
+)
+from app.instrumentation import record_queries
+from app.models.user import User
+from app.repositories.user_repository import UserRepository
+from app.schemas.user_schema import (
+    UserCreateInput,
+    UserUpdateInput,
+)
+
+
+class LegacyUserRepository:
+    # the select + write + refresh paths the repository used before RETURNING
+    def __init__(self, session):
+        self.session = session
+
+    def create_user(self, data: UserCreateInput) -> User:
+        user = User(**data.dict())
+        self.session.add(user)
+        self.session.commit()
+        self.session.refresh(user)
+        return user
+
+    def update_user(self, user_id: int, data: UserUpdateInput) -> User | None:
+        user = self.session.get(User, user_id)
+
+        for key, value in data.dict(exclude_unset=True).items():
+            setattr(user, key, value)
+
+        user.version += 1
+        self.session.commit()
+        self.session.refresh(user)
+        return user
+
+    def delete_user(self, user_id: int) -> True:
+        user = self.session.get(User, user_id)
+        self.session.delete(user)
+        self.session.commit()
+        return True
+
+
+def run(name: str, repository_class, writes: int) -> dict:
+    table_registry.metadata.drop_all(engine)
+    table_registry.metadata.create_all(engine)
+
+    results = {}
+
+    # a fresh session per write, as every request gets its own session
+    def timed(operation, call):
+        with record_queries(engine) as stats:
+            started_at = time.perf_counter()
+
+            for index in range(writes):
+                with SessionLocal() as session:
+                    call(repository_class(session=session), index)
+
+            elapsed = time.perf_counter() - started_at
+
+        results[operation] = {
+            'writes': writes,
+            'seconds': round(elapsed, 4),
+            'writes_per_second': round(writes / elapsed, 2),
+            'queries_per_write': round(stats.count / writes, 2),
+        }
+
+    user_ids = []
+
+    timed(
+        'create',
+        lambda repo, index: user_ids.append(
+            repo.create_user(
+                UserCreateInput(
+                    username=f'{name}{index}',
+                    email=f'{name}{index}@benchmark.com',
+                    password='benchmark-password',
+                )
+            ).id
+        ),
+    )
+    timed(
+        'update',
+        lambda repo, index: repo.update_user(
+            user_ids[index], UserUpdateInput(username=f'{name}-updated{index}')
+        ),
+    )
+    timed('delete', lambda repo, index: repo.delete_user(user_ids[index]))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='User write throughput before and after RETURNING'
+    )
+    parser.add_argument('--writes', type=int, default=1000)
+    args = parser.parse_args()
+
+    results = {
+        'legacy': run('legacy', LegacyUserRepository, args.writes),
+        'returning': run('returning', UserRepository, args.writes),
+    }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,16 @@
-import os
 from logging.config import fileConfig
 
 from alembic import context
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import create_engine, pool
 
-from app.helpers import load_env
 from app.config.database import table_registry
+from app.config.sharding import SHARD_URLS
 from app.models.user import User
 
-load_env()
-
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
-config.set_main_option('sqlalchemy.url', os.getenv('DATABASE_URL'))
-
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -33,6 +28,17 @@ target_metadata = table_registry.metadata
 # ... etc.
 
 
+def shard_urls() -> dict[str, str]:
+    # every shard by default, `alembic -x shard=shard-1 upgrade head`
+    # migrates a single one
+    shard = context.get_x_argument(as_dictionary=True).get('shard')
+
+    if shard is None:
+        return SHARD_URLS
+
+    return {shard: SHARD_URLS[shard]}
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -45,16 +51,16 @@ def run_migrations_offline() -> None:
     script output.
 
     """
-    url = config.get_main_option('sqlalchemy.url')
-    context.configure(
-        url=url,
-        target_metadata=target_metadata,
-        literal_binds=True,
-        dialect_opts={'paramstyle': 'named'},
-    )
+    for url in shard_urls().values():
+        context.configure(
+            url=url,
+            target_metadata=target_metadata,
+            literal_binds=True,
+            dialect_opts={'paramstyle': 'named'},
+        )
 
-    with context.begin_transaction():
-        context.run_migrations()
+        with context.begin_transaction():
+            context.run_migrations()
 
 
 def run_migrations_online() -> None:
@@ -64,19 +70,18 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix='sqlalchemy.',
-        poolclass=pool.NullPool,
-    )
+    for url in shard_urls().values():
+        connectable = create_engine(url, poolclass=pool.NullPool)
 
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+        with connectable.connect() as connection:
+            context.configure(
+                connection=connection, target_metadata=target_metadata
+            )
 
-        with context.begin_transaction():
-            context.run_migrations()
+            with context.begin_transaction():
+                context.run_migrations()
+
+        connectable.dispose()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,31 @@
+"""add version to users
+
+Revision ID: 4f1d2c9b7a3e
+Revises: ad33693e8cfd
+Create Date: 2026-10-18 09:12:31.418203
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1d2c9b7a3e'
+down_revision: Union[str, None] = 'ad33693e8cfd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column(
+            'version', sa.Integer(), server_default='1', nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,38 @@
+"""add users listing indexes
+
+Revision ID: 8b3e5a1f0c27
+Revises: 4f1d2c9b7a3e
+Create Date: 2026-10-18 14:37:05.926114
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3e5a1f0c27'
+down_revision: Union[str, None] = '4f1d2c9b7a3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column(
+            'is_admin', sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+    )
+    # keyset pagination order; the username and email prefix filters are
+    # served by the indexes backing their unique constraints
+    op.create_index(
+        'ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
+
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('is_admin')
@@ -0,0 +1,27 @@
+"""add users updated_at index
+
+Revision ID: c6a9d2e4b815
+Revises: 8b3e5a1f0c27
+Create Date: 2026-10-18 16:05:48.301557
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6a9d2e4b815'
+down_revision: Union[str, None] = '8b3e5a1f0c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # incremental exports read users changed since the last sync
+    op.create_index(
+        'ix_users_updated_at', 'users', ['updated_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_updated_at', table_name='users')
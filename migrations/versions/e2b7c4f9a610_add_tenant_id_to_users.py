@@ -0,0 +1,88 @@
+"""add tenant_id to users
+
+Revision ID: e2b7c4f9a610
+Revises: c6a9d2e4b815
+Create Date: 2026-10-18 21:40:12.518304
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.config.settings import get_settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c4f9a610'
+down_revision: Union[str, None] = 'c6a9d2e4b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# the unique constraints of the first migration have no name in SQLite
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+
+def upgrade() -> None:
+    # the rows carry no tenant yet, they all go to the default one; move the
+    # users of other tenants with an UPDATE before they log in again
+    op.add_column(
+        'users',
+        sa.Column(
+            'tenant_id',
+            sa.String(),
+            server_default=get_settings().default_tenant,
+            nullable=False,
+        ),
+    )
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_users_updated_at', table_name='users')
+
+    with op.batch_alter_table(
+        'users', naming_convention=NAMING_CONVENTION
+    ) as batch_op:
+        batch_op.alter_column('tenant_id', server_default=None)
+        batch_op.drop_constraint('uq_users_email', type_='unique')
+        batch_op.drop_constraint('uq_users_username', type_='unique')
+        batch_op.create_unique_constraint(
+            'uq_users_tenant_id_username', ['tenant_id', 'username']
+        )
+        batch_op.create_unique_constraint(
+            'uq_users_tenant_id_email', ['tenant_id', 'email']
+        )
+
+    op.create_index(
+        'ix_users_tenant_id_created_at_id',
+        'users',
+        ['tenant_id', 'created_at', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_users_tenant_id_updated_at',
+        'users',
+        ['tenant_id', 'updated_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    # fails when two tenants share an email or a username
+    op.drop_index('ix_users_tenant_id_updated_at', table_name='users')
+    op.drop_index('ix_users_tenant_id_created_at_id', table_name='users')
+
+    with op.batch_alter_table(
+        'users', naming_convention=NAMING_CONVENTION
+    ) as batch_op:
+        batch_op.drop_constraint('uq_users_tenant_id_email', type_='unique')
+        batch_op.drop_constraint(
+            'uq_users_tenant_id_username', type_='unique'
+        )
+        batch_op.create_unique_constraint('uq_users_username', ['username'])
+        batch_op.create_unique_constraint('uq_users_email', ['email'])
+        batch_op.drop_column('tenant_id')
+
+    op.create_index(
+        'ix_users_updated_at', 'users', ['updated_at'], unique=False
+    )
+    op.create_index(
+        'ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False
+    )
@@ -0,0 +1,181 @@
+import asyncio
+from http import HTTPStatus
+
+import httpx
+import pytest
+
+from app import admission
+from app.admission import (
+    AdmissionLimiter,
+    InFlightLimitMiddleware,
+    OverloadedError,
+)
+
+
+def make_limiter(max_concurrent=1, max_queue=1, queue_timeout=5):
+    return AdmissionLimiter(
+        'test',
+        max_concurrent=max_concurrent,
+        max_queue=max_queue,
+        queue_timeout=queue_timeout,
+    )
+
+
+@pytest.mark.asyncio
+async def test_should_hand_released_slots_to_waiters_in_order():
+    # arrange
+    limiter = make_limiter(max_queue=2)
+    order = []
+
+    async def work(name):
+        async with limiter.slot():
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await limiter.acquire()
+
+    # act
+    tasks = [asyncio.create_task(work(name)) for name in ('first', 'second')]
+    await asyncio.sleep(0)
+    waiting = limiter.waiting
+    limiter.release()
+    await asyncio.gather(*tasks)
+
+    # assert
+    assert waiting == len(tasks)
+    assert order == ['first', 'second']
+    assert limiter.active == 0
+    assert limiter.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_should_wake_waiters_running_on_another_event_loop():
+    # arrange
+    limiter = make_limiter()
+    await limiter.acquire()
+
+    # act
+    waiter = asyncio.create_task(
+        asyncio.to_thread(asyncio.run, limiter.acquire())
+    )
+
+    while not limiter.waiting:
+        await asyncio.sleep(0.001)
+
+    limiter.release()
+    await waiter
+
+    # assert
+    assert limiter.active == 1
+    assert limiter.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_should_reject_work_when_the_queue_is_full():
+    # arrange
+    limiter = make_limiter(max_queue=0)
+    await limiter.acquire()
+
+    # act
+    with pytest.raises(OverloadedError) as exc_info:
+        await limiter.acquire()
+
+    # assert
+    assert exc_info.value.reason == 'queue_full'
+    assert exc_info.value.retry_after >= 1
+    assert limiter.active == 1
+
+
+@pytest.mark.asyncio
+async def test_should_reject_waiters_past_the_queue_deadline():
+    # arrange
+    limiter = make_limiter(queue_timeout=0.01)
+    await limiter.acquire()
+
+    # act
+    with pytest.raises(OverloadedError) as exc_info:
+        await limiter.acquire()
+
+    limiter.release()
+
+    # assert
+    assert exc_info.value.reason == 'timeout'
+    assert limiter.waiting == 0
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_should_back_off_instead_of_failing_when_patient(monkeypatch):
+    # arrange
+    limiter = make_limiter(max_queue=0)
+    await limiter.acquire()
+    backoffs = []
+
+    async def release_while_backing_off(seconds):
+        backoffs.append(seconds)
+        limiter.release()
+
+    monkeypatch.setattr(admission.asyncio, 'sleep', release_while_backing_off)
+
+    # act
+    async with limiter.slot(patient=True):
+        active = limiter.active
+
+    # assert
+    assert backoffs == [1]
+    assert active == 1
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_should_shed_requests_beyond_the_in_flight_limit():
+    # arrange
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({'type': 'http.response.start', 'status': 200})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    middleware = InFlightLimitMiddleware(app, max_in_flight=1)
+    transport = httpx.ASGITransport(app=middleware)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://test'
+    ) as client:
+        # act
+        admitted = asyncio.create_task(client.get('/auth/login/'))
+        await asyncio.sleep(0.01)
+
+        shed = await client.get('/auth/me/')
+        exempt = asyncio.create_task(client.get('/metrics'))
+        await asyncio.sleep(0.01)
+
+        release.set()
+        admitted_response = await admitted
+        await exempt
+
+    # assert
+    assert admitted_response.status_code == HTTPStatus.OK
+    assert shed.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert shed.headers['retry-after'] == '1'
+    assert middleware.in_flight == 0
+
+
+def test_should_return_503_with_retry_after_when_hashing_is_saturated(
+    monkeypatch, client, user
+):
+    # arrange
+    monkeypatch.setattr(admission.hashing_limiter, 'max_concurrent', 0)
+    monkeypatch.setattr(admission.hashing_limiter, 'max_queue', 0)
+
+    # act
+    response = client.post(
+        '/auth/login/',
+        json={'email': user.email, 'password': user.clean_password},
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json()['message'] == 'service unavailable error'
+    assert int(response.headers['retry-after']) >= 1
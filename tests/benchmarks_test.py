@@ -0,0 +1,119 @@
+import os
+
+from benchmarks.harness import (
+    ScenarioResult,
+    find_failures,
+    find_regressions,
+    percentile,
+)
+from benchmarks.startup import find_startup_regression, parse_importtime
+
+
+def test_should_calculate_nearest_rank_percentiles():
+    # arrange
+    values = [float(value) for value in range(1, 101)]
+
+    # act
+    p50 = percentile(values, 50)
+    p99 = percentile(values, 99)
+
+    # assert
+    assert p50 == values[49]
+    assert p99 == values[98]
+    assert percentile([], 50) == 0.0
+
+
+def test_should_summarize_a_scenario_result():
+    # arrange
+    result = ScenarioResult(
+        scenario='me', requests=4, errors=1, seconds=2, latencies=[0.1] * 4
+    )
+
+    # act
+    summary = result.summary()
+
+    # assert
+    assert summary['throughput'] == (result.requests - 1) / result.seconds
+    assert summary['errors'] == result.errors
+    assert summary['p50_ms'] == summary['p99_ms']
+
+
+def test_should_find_regressions_beyond_the_threshold():
+    # arrange
+    baseline = {
+        'me': {'throughput': 100, 'p95_ms': 10, 'p99_ms': 20},
+        'login': {'throughput': 10, 'p95_ms': 100, 'p99_ms': 200},
+    }
+    results = {
+        'me': {'throughput': 95, 'p95_ms': 10.5, 'p99_ms': 21},
+        'login': {'throughput': 8, 'p95_ms': 100, 'p99_ms': 250},
+        'register': {'throughput': 1, 'p95_ms': 1, 'p99_ms': 1},
+    }
+
+    # act
+    regressions = find_regressions(results, baseline, threshold=0.1)
+
+    # assert
+    assert regressions == [
+        'login: throughput 8 req/s is below baseline 10 req/s',
+        'login: p99_ms 250 is above baseline 200',
+    ]
+
+
+def test_should_report_scenarios_with_failed_requests():
+    # arrange
+    results = {
+        'me': {'requests': 60, 'errors': 0},
+        'login': {'requests': 60, 'errors': 30},
+    }
+
+    # act
+    failures = find_failures(results)
+
+    # assert
+    assert failures == ['login: 30 of 60 requests failed']
+
+
+def test_should_parse_importtime_output():
+    # arrange
+    output = (
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       120 |        120 |     app.config.settings\n'
+        'import time:      5000 |      65000 | app.main\n'
+        'unrelated line\n'
+    )
+
+    # act
+    modules = parse_importtime(output)
+
+    # assert
+    assert modules == {
+        'app.config.settings': (120, 120),
+        'app.main': (5000, 65000),
+    }
+
+
+def test_should_find_startup_regressions_beyond_the_threshold():
+    # arrange
+    baseline = {'module': 'app.main', 'cumulative_ms': 100}
+
+    # act
+    within = find_startup_regression(
+        {'module': 'app.main', 'cumulative_ms': 115}, baseline, 0.2
+    )
+    beyond = find_startup_regression(
+        {'module': 'app.main', 'cumulative_ms': 130}, baseline, 0.2
+    )
+
+    # assert
+    assert within is None
+    assert 'app.main' in beyond
+
+
+def test_should_always_benchmark_against_the_benchmark_database():
+    # arrange
+    # act
+    database_url = os.environ['DATABASE_URL']
+
+    # assert
+    assert database_url == 'sqlite:///./database-benchmark.sqlite'
@@ -0,0 +1,107 @@
+import time
+
+from factories import UserFactory
+from sqlalchemy import inspect
+
+from app.cache import TTLCache, detached_copy
+
+
+def test_should_return_a_cached_value_and_count_hits_and_misses():
+    # arrange
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('key', 'value')
+
+    # act
+    hit = cache.get('key')
+    miss = cache.get('missing')
+
+    # assert
+    assert hit == 'value'
+    assert miss is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 10}
+
+
+def test_should_expire_values_after_their_ttl():
+    # arrange
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('key', 'value', ttl=0.01)
+
+    # act
+    time.sleep(0.02)
+    value = cache.get('key')
+
+    # assert
+    assert value is None
+    assert cache.stats()['size'] == 0
+
+
+def test_should_never_keep_a_value_longer_than_the_cache_ttl():
+    # arrange
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set('key', 'value', ttl=60)
+
+    # act
+    time.sleep(0.02)
+
+    # assert
+    assert cache.get('key') is None
+
+
+def test_should_evict_the_least_recently_used_value():
+    # arrange
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('first', 'a')
+    cache.set('second', 'b')
+    cache.get('first')
+
+    # act
+    cache.set('third', 'c')
+
+    # assert
+    assert cache.get('first') == 'a'
+    assert cache.get('second') is None
+    assert cache.get('third') == 'c'
+
+
+def test_should_delete_and_clear_values():
+    # arrange
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('first', 1)
+    cache.set('second', 2)
+
+    # act
+    cache.delete('first')
+
+    # assert
+    assert cache.get('first') is None
+
+    cache.clear()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 10}
+
+
+def test_should_create_a_detached_copy_of_a_user(user):
+    # arrange
+    # act
+    copy = detached_copy(user)
+
+    # assert
+    state = inspect(copy)
+    assert state.detached
+    assert copy is not user
+    assert copy.id == user.id
+    assert copy.email == user.email
+    assert copy.created_at == user.created_at
+
+
+def test_detached_copy_dont_depend_on_the_original_session(session):
+    # arrange
+    user = UserFactory()
+    session.add(user)
+    session.commit()
+    copy = detached_copy(session.get(type(user), user.id))
+
+    # act
+    session.close()
+
+    # assert
+    assert copy.username == user.username
@@ -0,0 +1,104 @@
+from app.calibration import (
+    MIN_MEMORY_COST,
+    ONE_PASS_MEMORY_COST,
+    Argon2Parameters,
+    calibrate,
+)
+from app.cli import main
+
+
+def fake_measure(cost_per_pass: float):
+    # a pass over 64 MiB takes cost_per_pass seconds, linear in both costs
+    measured = []
+
+    def measure(parameters: Argon2Parameters) -> float:
+        measured.append(parameters)
+        return (
+            parameters.time_cost
+            * cost_per_pass
+            * (parameters.memory_cost / 65536)
+        )
+
+    return measure, measured
+
+
+def test_should_add_passes_until_the_budget_is_spent():
+    # arrange
+    measure, _ = fake_measure(cost_per_pass=0.06)
+
+    # act
+    parameters, elapsed = calibrate(
+        0.25, max_memory_cost=65536, parallelism=4, measure=measure
+    )
+
+    # assert
+    assert parameters == Argon2Parameters(4, 65536, 4)
+    assert elapsed <= 0.25  # noqa: PLR2004
+
+
+def test_should_halve_the_memory_when_one_pass_is_over_the_budget():
+    # arrange
+    measure, measured = fake_measure(cost_per_pass=0.4)
+
+    # act
+    parameters, _ = calibrate(
+        0.25, max_memory_cost=65536, parallelism=1, measure=measure
+    )
+
+    # assert
+    assert [item.memory_cost for item in measured[:2]] == [65536, 32768]
+    assert parameters == Argon2Parameters(2, 32768, 1)
+
+
+def test_should_not_go_below_the_minimum_memory_cost():
+    # arrange
+    measure, _ = fake_measure(cost_per_pass=10)
+
+    # act
+    parameters, elapsed = calibrate(
+        0.25, max_memory_cost=65536, parallelism=1, measure=measure
+    )
+
+    # assert
+    assert parameters.time_cost == 2  # noqa: PLR2004
+    assert MIN_MEMORY_COST <= parameters.memory_cost < MIN_MEMORY_COST * 2
+    assert elapsed > 0.25  # noqa: PLR2004
+
+
+def test_should_pair_less_than_46_mib_with_two_passes_at_least():
+    # arrange
+    measure, measured = fake_measure(cost_per_pass=0.01)
+
+    # act
+    parameters, _ = calibrate(
+        0.25,
+        max_memory_cost=ONE_PASS_MEMORY_COST - 1024,
+        parallelism=1,
+        measure=measure,
+    )
+
+    # assert
+    assert all(item.time_cost >= 2 for item in measured)  # noqa: PLR2004
+    assert parameters.time_cost >= 2  # noqa: PLR2004
+
+
+def test_should_print_the_calibrated_settings_from_the_cli(capsys):
+    # act
+    main([
+        'calibrate-hashing',
+        '--target-ms',
+        '1',
+        '--max-memory-cost',
+        str(MIN_MEMORY_COST),
+        '--parallelism',
+        '1',
+        '--samples',
+        '1',
+    ])
+
+    # assert
+    output = capsys.readouterr().out
+
+    assert 'ARGON2_TIME_COST=2\n' in output
+    assert f'ARGON2_MEMORY_COST={MIN_MEMORY_COST}\n' in output
+    assert 'ARGON2_PARALLELISM=1\n' in output
@@ -0,0 +1,79 @@
+import pytest
+from factories import UserFactory
+
+from app.cli import main
+from app.models.user import User
+
+
+def test_should_grant_the_admin_role_from_the_cli(session, user, capsys):
+    # arrange
+    # act
+    main(['grant-admin', user.email])
+
+    # assert
+    session.expire_all()
+    assert session.get(User, user.id).is_admin
+    assert capsys.readouterr().out == f'{user.email} is an admin\n'
+
+
+def test_should_revoke_the_admin_role_from_the_cli(session, user):
+    # arrange
+    main(['grant-admin', user.email])
+
+    # act
+    main(['grant-admin', user.email, '--revoke'])
+
+    # assert
+    session.expire_all()
+    assert not session.get(User, user.id).is_admin
+
+
+def test_should_fail_to_grant_the_admin_role_to_an_unknown_email(session):
+    # arrange
+    # act
+    with pytest.raises(SystemExit) as exc_info:
+        main(['grant-admin', 'nobody@test.com'])
+
+    # assert
+    assert exc_info.value.code == (
+        'no user with the email nobody@test.com in the default tenant'
+    )
+
+
+def test_dont_grant_the_admin_role_in_another_tenant(session, user):
+    # act
+    with pytest.raises(SystemExit):
+        main(['grant-admin', user.email, '--tenant', 'pizzeria'])
+
+    # assert
+    session.expire_all()
+    assert not session.get(User, user.id).is_admin
+
+
+def test_should_grant_the_admin_role_in_the_given_tenant(session):
+    # arrange
+    user = UserFactory(tenant_id='pizzeria')
+    session.add(user)
+    session.commit()
+
+    # act
+    main(['grant-admin', user.email, '--tenant', 'pizzeria'])
+
+    # assert
+    session.expire_all()
+    assert session.get(User, user.id).is_admin
+
+
+def test_should_print_the_shard_of_every_tenant(session, user, capsys):
+    # arrange
+    session.add(UserFactory(tenant_id='pizzeria'))
+    session.commit()
+
+    # act
+    main(['pin-tenants'])
+
+    # assert
+    assert (
+        capsys.readouterr().out
+        == 'TENANT_SHARDS=default=shard-0,pizzeria=shard-0\n'
+    )
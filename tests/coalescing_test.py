@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.coalescing import AsyncSingleFlight, SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_should_run_concurrent_calls_for_a_key_once():
+    # arrange
+    flight = AsyncSingleFlight('test')
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f'{key}-value'
+
+    # act
+    results = await asyncio.gather(
+        *[flight.do('a', lambda: load('a')) for _ in range(20)],
+        flight.do('b', lambda: load('b')),
+    )
+
+    # assert
+    assert results == ['a-value'] * 20 + ['b-value']
+    assert calls == ['a', 'b']
+    assert flight.stats() == {'executed': 2, 'coalesced': 19, 'in_flight': 0}
+
+
+@pytest.mark.asyncio
+async def test_should_share_the_error_and_run_again_afterwards():
+    # arrange
+    flight = AsyncSingleFlight('test')
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    async def succeed():
+        return 'value'
+
+    # act
+    results = await asyncio.gather(
+        flight.do('key', fail), flight.do('key', fail), return_exceptions=True
+    )
+    retried = await flight.do('key', succeed)
+
+    # assert
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert retried == 'value'
+
+
+@pytest.mark.asyncio
+async def test_should_not_cancel_the_call_when_a_follower_is_cancelled():
+    # arrange
+    flight = AsyncSingleFlight('test')
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return 'value'
+
+    leader = asyncio.create_task(flight.do('key', load))
+    follower = asyncio.create_task(flight.do('key', load))
+    await asyncio.sleep(0)
+
+    # act
+    follower.cancel()
+
+    # assert
+    assert await leader == 'value'
+    assert follower.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_should_call_again_when_the_leader_is_cancelled():
+    # arrange
+    flight = AsyncSingleFlight('test')
+    calls = []
+
+    async def load():
+        calls.append('load')
+        await asyncio.sleep(0.02)
+        return 'value'
+
+    leader = asyncio.create_task(flight.do('key', load))
+    followers = [asyncio.create_task(flight.do('key', load)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    # act
+    leader.cancel()
+    results = await asyncio.gather(*followers)
+
+    # assert
+    assert leader.cancelled()
+    assert results == ['value'] * 3
+    assert calls == ['load', 'load']
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_should_coalesce_calls_from_concurrent_threads():
+    # arrange
+    flight = SingleFlight('test')
+    workers = 8
+    barrier = threading.Barrier(workers)
+    calls = []
+
+    def load():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        return 'value'
+
+    def call():
+        barrier.wait()
+        return flight.do('key', load)
+
+    # act
+    with ThreadPoolExecutor(workers) as executor:
+        results = list(executor.map(lambda _: call(), range(workers)))
+
+    # assert
+    assert results == ['value'] * workers
+    assert len(calls) == 1
+    assert flight.stats()['coalesced'] == workers - 1
@@ -0,0 +1,114 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.config import database
+from app.config.database import (
+    LazyAsyncSession,
+    create_async_database_engine,
+    create_database_engine,
+)
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f'sqlite:///{tmp_path / "pragmas.sqlite"}'
+
+
+def read_pragmas(connection) -> dict:
+    return {
+        name: connection.execute(text(f'PRAGMA {name}')).scalar()
+        for name in database.sqlite_pragmas()
+    }
+
+
+def test_should_apply_the_pragmas_to_every_sync_connection(database_url):
+    # arrange
+    engine = create_database_engine(database_url)
+
+    # act
+    with engine.connect() as connection:
+        pragmas = read_pragmas(connection)
+
+    # assert
+    assert isinstance(engine.pool, QueuePool)
+    assert pragmas == {
+        'journal_mode': 'wal',
+        'synchronous': 1,
+        'busy_timeout': database.settings.sqlite_busy_timeout,
+        'cache_size': database.settings.sqlite_cache_size,
+        'mmap_size': database.settings.sqlite_mmap_size,
+        'temp_store': 2,
+    }
+
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_should_pool_and_tune_async_sqlite_connections(database_url):
+    # arrange
+    engine = create_async_database_engine(
+        database.get_async_database_url(database_url)
+    )
+
+    # act
+    async with engine.connect() as connection:
+        pragmas = await connection.run_sync(read_pragmas)
+
+    # assert
+    assert isinstance(engine.pool, AsyncAdaptedQueuePool)
+    assert engine.pool.size() == database.settings.database_pool_size
+    assert engine.pool._pre_ping is database.settings.database_pool_pre_ping
+    assert pragmas['journal_mode'] == 'wal'
+    assert pragmas['busy_timeout'] == database.settings.sqlite_busy_timeout
+
+    await engine.dispose()
+
+
+def test_should_size_only_the_queue_pools(monkeypatch, database_url):
+    # arrange
+    monkeypatch.setattr(
+        database,
+        'settings',
+        database.settings.copy(
+            update={'database_pool_size': 2, 'database_max_overflow': 1}
+        ),
+    )
+
+    # act
+    pooled = create_database_engine(database_url)
+    unpooled = create_database_engine(database_url, poolclass=NullPool)
+    in_memory = create_database_engine('sqlite://')
+
+    # assert
+    assert pooled.pool.size() == 2  # noqa: PLR2004
+    assert pooled.pool._max_overflow == 1
+    assert isinstance(unpooled.pool, NullPool)
+    assert not isinstance(in_memory.pool, QueuePool)
+
+
+@pytest.mark.asyncio
+async def test_should_only_open_the_session_once_it_is_used(
+    async_session_factory,
+):
+    # arrange
+    opened = []
+
+    def session_factory():
+        opened.append(async_session_factory())
+        return opened[-1]
+
+    unused = LazyAsyncSession(session_factory)
+    used = LazyAsyncSession(session_factory)
+
+    # act
+    await unused.close()
+    result = await used.execute(text('SELECT 1'))
+
+    # assert
+    assert not unused.started
+    assert used.started
+    assert result.scalar() == 1
+    assert len(opened) == 1
+
+    await used.close()
@@ -0,0 +1,163 @@
+import shutil
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import (
+    create_async_database_engine,
+    create_database_engine,
+    get_async_database_url,
+    table_registry,
+)
+from app.config.routing import ReplicaSet, RoutingSession
+from app.models.user import User
+
+
+@pytest.fixture
+def database_files(tmp_path):
+    # stand-in replicas: copies of the primary, each renaming the user so a
+    # read tells which database answered it
+    primary = tmp_path / 'primary.sqlite'
+    engine = create_database_engine(f'sqlite:///{primary}')
+    table_registry.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        connection.execute(
+            User.__table__.insert().values(
+                username='primary', email='user@replica.com', password='x'
+            )
+        )
+
+    engine.dispose()
+    files = {'primary': primary}
+
+    for name in ('replica-0', 'replica-1'):
+        files[name] = tmp_path / f'{name}.sqlite'
+        shutil.copy(primary, files[name])
+        replica = create_database_engine(f'sqlite:///{files[name]}')
+
+        with replica.begin() as connection:
+            connection.execute(update(User).values(username=name))
+
+        replica.dispose()
+
+    return files
+
+
+def routing_sessionmaker(database_files, **options):
+    engine = create_database_engine(f'sqlite:///{database_files["primary"]}')
+    replicas = ReplicaSet(
+        [
+            create_database_engine(f'sqlite:///{database_files[name]}')
+            for name in ('replica-0', 'replica-1')
+        ],
+        **options,
+    )
+
+    return sessionmaker(
+        bind=engine, class_=RoutingSession, info={'replicas': replicas}
+    )
+
+
+def read_username(session) -> str:
+    return session.scalar(select(User.username))
+
+
+def test_should_spread_sessions_over_the_replicas(database_files):
+    # arrange
+    session_factory = routing_sessionmaker(database_files)
+
+    # act
+    usernames = []
+
+    for _ in range(4):
+        with session_factory() as session:
+            usernames.append(read_username(session))
+            # a session keeps reading from the replica it picked
+            usernames.append(read_username(session))
+
+    # assert
+    assert usernames == (['replica-0'] * 2 + ['replica-1'] * 2) * 2
+
+
+def test_should_read_its_writes_from_the_primary(database_files):
+    # arrange
+    session_factory = routing_sessionmaker(database_files)
+
+    with session_factory() as session:
+        # act
+        before_write = read_username(session)
+        session.execute(update(User).values(email='updated@replica.com'))
+        session.commit()
+        after_write = read_username(session)
+
+    # assert
+    assert before_write == 'replica-0'
+    assert after_write == 'primary'
+
+
+def test_should_pick_the_least_busy_replica(database_files):
+    # arrange
+    session_factory = routing_sessionmaker(
+        database_files, selection='least_busy'
+    )
+    busy_session = session_factory()
+    read_username(busy_session)
+
+    # act
+    with session_factory() as session:
+        username = read_username(session)
+
+    # assert
+    assert username == 'replica-1'
+
+    busy_session.close()
+
+
+def test_should_fall_back_to_the_primary_when_replicas_fail(
+    tmp_path, database_files
+):
+    # arrange
+    database_files['replica-1'] = tmp_path / 'missing' / 'replica-1.sqlite'
+    session_factory = routing_sessionmaker(database_files)
+    replicas = session_factory.kw['info']['replicas']
+    replicas.mark_down(replicas.engines[0])
+
+    # act
+    with session_factory() as session, pytest.raises(OperationalError):
+        read_username(session)
+
+    with session_factory() as session:
+        username = read_username(session)
+
+    # assert
+    assert replicas.healthy() == []
+    assert username == 'primary'
+
+
+@pytest.mark.asyncio
+async def test_should_route_async_reads_to_the_replicas(database_files):
+    # arrange
+    def async_url(name):
+        return get_async_database_url(f'sqlite:///{database_files[name]}')
+
+    engine = create_async_database_engine(async_url('primary'))
+    replica = create_async_database_engine(async_url('replica-0'))
+    session_factory = async_sessionmaker(
+        bind=engine,
+        sync_session_class=RoutingSession,
+        info={'replicas': ReplicaSet([replica.sync_engine])},
+    )
+
+    # act
+    async with session_factory() as session:
+        username = await session.scalar(select(User.username))
+
+    # assert
+    assert username == 'replica-0'
+
+    await engine.dispose()
+    await replica.dispose()
@@ -0,0 +1,149 @@
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from app.config.settings import Settings, available_cpus, get_settings
+
+
+def test_should_fall_back_to_the_defaults_on_blank_values():
+    # act
+    settings = Settings(
+        database_url='sqlite:///./blank.sqlite',
+        hashing_workers='',
+        hashing_timeout='',
+        metrics_multiproc_dir='',
+    )
+
+    # assert
+    assert settings.hashing_workers == max(
+        1, available_cpus() // settings.serve_workers
+    )
+    assert (
+        settings.hashing_timeout
+        == Settings.__fields__['hashing_timeout'].default
+    )
+    assert settings.metrics_multiproc_dir is None
+
+
+def test_should_derive_the_hashing_limits_from_the_workers():
+    # act
+    settings = Settings(
+        database_url='sqlite:///./derived.sqlite', hashing_workers=3
+    )
+
+    # assert
+    assert settings.hashing_max_pending == 3 * 8
+    assert settings.hashing_max_concurrent == 3  # noqa: PLR2004
+    assert settings.hashing_queue_size == 3 * 4
+    assert settings.import_hashing_workers == 1
+
+
+def test_should_share_the_cores_out_between_the_server_workers():
+    # act
+    settings = Settings(
+        database_url='sqlite:///./derived.sqlite',
+        serve_workers=available_cpus(),
+    )
+    shared = Settings(
+        database_url='sqlite:///./derived.sqlite',
+        serve_workers=available_cpus() * 2,
+    )
+
+    # assert
+    assert settings.hashing_workers == 1
+    assert settings.hashing_max_concurrent == 1
+    assert shared.hashing_workers == 1
+
+
+def test_should_size_the_workers_from_the_cores_the_process_may_use(
+    monkeypatch,
+):
+    # arrange
+    monkeypatch.setattr(os, 'cpu_count', lambda: 64)
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: {0, 1})
+
+    # act
+    settings = Settings(database_url='sqlite:///./derived.sqlite')
+
+    # assert
+    assert settings.serve_workers == 2  # noqa: PLR2004
+    assert settings.hashing_workers == 1
+
+
+def test_should_read_typed_values_from_the_environment(monkeypatch):
+    # arrange
+    monkeypatch.setenv('DATABASE_URL', 'sqlite:///./env.sqlite')
+    monkeypatch.setenv('AUTH_CLAIMS_MODE', 'true')
+    monkeypatch.setenv('SERVE_LIMIT_CONCURRENCY', '0')
+
+    # act
+    settings = Settings()
+
+    # assert
+    assert settings.database_url == 'sqlite:///./env.sqlite'
+    assert settings.auth_claims_mode is True
+    assert settings.serve_limit_concurrency is None
+
+
+def test_should_split_comma_separated_replica_urls(monkeypatch):
+    # arrange
+    monkeypatch.setenv('DATABASE_URL', 'sqlite:///./env.sqlite')
+    monkeypatch.setenv(
+        'DATABASE_REPLICA_URLS',
+        'sqlite:///./replica-0.sqlite, sqlite:///./replica-1.sqlite',
+    )
+
+    monkeypatch.setenv('TRUSTED_PROXIES', '10.0.0.0/8,127.0.0.1')
+
+    # act
+    settings = Settings()
+
+    # assert
+    assert settings.trusted_proxies == ['10.0.0.0/8', '127.0.0.1']
+    assert settings.database_replica_urls == [
+        'sqlite:///./replica-0.sqlite',
+        'sqlite:///./replica-1.sqlite',
+    ]
+    assert (
+        Settings(
+            database_url='x', database_replica_urls=''
+        ).database_replica_urls
+        == []
+    )
+
+
+def test_should_reject_invalid_values():
+    # act / assert
+    with pytest.raises(ValidationError):
+        Settings(
+            database_url='sqlite:///./invalid.sqlite',
+            login_throttle_backend='redis',
+        )
+
+
+def test_should_be_immutable():
+    # arrange
+    settings = get_settings()
+
+    # act / assert
+    with pytest.raises(TypeError):
+        settings.secret_key = 'changed'
+
+
+def test_should_load_the_settings_once():
+    # act / assert
+    assert get_settings() is get_settings()
+
+
+def test_should_prefer_the_testing_values_over_the_environment(monkeypatch):
+    # arrange
+    monkeypatch.setenv('DATABASE_URL', 'sqlite:///./developer.sqlite')
+
+    # act
+    # bypasses the cache, the shared instance must stay untouched
+    settings = get_settings.__wrapped__()
+
+    # assert
+    assert settings.database_url == get_settings().database_url
+    assert settings.database_url != 'sqlite:///./developer.sqlite'
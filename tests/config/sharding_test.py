@@ -0,0 +1,78 @@
+import pytest
+
+from app.config import sharding
+from app.config.sharding import HashRing, current_tenant
+
+
+def test_should_spread_keys_over_every_node():
+    # arrange
+    ring = HashRing(['shard-0', 'shard-1', 'shard-2'])
+    tenants = [f'restaurant-{index}' for index in range(3000)]
+
+    # act
+    nodes = [ring.node_for(tenant) for tenant in tenants]
+
+    # assert
+    for node in ring.nodes:
+        assert nodes.count(node) > len(tenants) / 6
+
+
+def test_should_only_move_the_keys_taken_by_a_new_node():
+    # arrange
+    before = HashRing(['shard-0', 'shard-1', 'shard-2'])
+    after = HashRing(['shard-0', 'shard-1', 'shard-2', 'shard-3'])
+    tenants = [f'restaurant-{index}' for index in range(3000)]
+
+    # act
+    moved = [
+        tenant
+        for tenant in tenants
+        if before.node_for(tenant) != after.node_for(tenant)
+    ]
+
+    # assert
+    assert all(after.node_for(tenant) == 'shard-3' for tenant in moved)
+    assert len(moved) < len(tenants) / 2
+
+
+def test_should_pick_the_shard_of_the_current_tenant(monkeypatch):
+    # arrange
+    ring = HashRing(['shard-0', 'shard-1'])
+    monkeypatch.setattr(sharding, 'shard_ring', ring)
+    token = current_tenant.set('pizzeria')
+
+    # act
+    shard = sharding.current_shard()
+
+    # assert
+    assert shard == ring.node_for('pizzeria')
+
+    current_tenant.reset(token)
+
+
+def test_should_keep_pinned_tenants_on_their_shard(monkeypatch):
+    # arrange
+    ring = HashRing(['shard-0', 'shard-1'])
+    moved = next(
+        f'restaurant-{index}'
+        for index in range(100)
+        if ring.node_for(f'restaurant-{index}') == 'shard-1'
+    )
+    monkeypatch.setattr(sharding, 'shard_ring', ring)
+    monkeypatch.setattr(sharding, 'TENANT_SHARDS', {moved: 'shard-0'})
+
+    # act
+    shard = sharding.shard_for(moved)
+
+    # assert
+    assert shard == 'shard-0'
+
+
+def test_should_parse_the_pinned_tenants():
+    # act
+    tenant_shards = sharding.parse_tenant_shards(['pizzeria = shard-0'])
+
+    # assert
+    assert tenant_shards == {'pizzeria': 'shard-0'}
+    with pytest.raises(ValueError, match='unknown shard'):
+        sharding.parse_tenant_shards(['pizzeria=shard-9'])
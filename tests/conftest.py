@@ -1,44 +1,97 @@
-import os
-
 import pytest
+import pytest_asyncio
 from factories import UserFactory
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import Session
-from sqlalchemy.pool import StaticPool
-
-from app.config.database import get_session, table_registry
-from app.helpers import load_env
+from sqlalchemy.pool import NullPool, StaticPool
+
+from app.cache import token_cache, user_cache
+from app.config.database import (
+    LazyAsyncSession,
+    create_async_database_engine,
+    create_database_engine,
+    get_async_database_url,
+    get_async_session,
+    get_session,
+    table_registry,
+)
+from app.config.settings import get_settings
+from app.instrumentation import instrument_engine
 from app.main import app
+from app.security import Security
+from app.throttling import login_throttle
+from app.watchdog import loop_watchdog as app_loop_watchdog
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    # ids are reused between tests, so cached users would leak across them
+    # and login attempts would pile up in the throttling windows
+    token_cache.clear()
+    user_cache.clear()
+    login_throttle.backend.clear()
 
 
-@pytest.fixture(scope='session', autouse=True)
-def _set_test_env():
-    os.environ['ENV'] = 'test'
+@pytest.fixture
+def loop_watchdog(monkeypatch):
+    # must be requested before `client` so it starts with the app
+    monkeypatch.setattr(app_loop_watchdog, 'enabled', True)
+    app_loop_watchdog.reports.clear()
 
-    load_env()
+    return app_loop_watchdog
 
 
 @pytest.fixture
-def client(session):
+def client(session, async_session_factory):
     def get_session_override():
         return session
 
+    async def get_async_session_override():
+        async_session = LazyAsyncSession(async_session_factory)
+        try:
+            yield async_session
+        finally:
+            await async_session.close()
+
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_async_session] = (
+            get_async_session_override
+        )
         yield client
 
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def override_settings(client):
+    # routes receive the settings through Depends(get_settings)
+    def override(**values):
+        settings = get_settings().copy(update=values)
+        app.dependency_overrides[get_settings] = lambda: settings
+
+    return override
+
+
+@pytest.fixture
+def use_claims_mode(monkeypatch):
+    # read from get_settings() whenever a token is issued
+    def use():
+        monkeypatch.setenv('AUTH_CLAIMS_MODE', 'true')
+        get_settings.cache_clear()
+
+    yield use
+
+    get_settings.cache_clear()
+
+
 @pytest.fixture
 def session():
-    SQLALCHEMY_DATABASE_URL = os.getenv('DATABASE_URL')
+    SQLALCHEMY_DATABASE_URL = get_settings().database_url
 
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL,
-        connect_args={'check_same_thread': False},
-        poolclass=StaticPool,
+    engine = create_database_engine(
+        SQLALCHEMY_DATABASE_URL, poolclass=StaticPool
     )
     table_registry.metadata.create_all(engine)
 
@@ -48,6 +101,32 @@ def session():
     table_registry.metadata.drop_all(engine)
 
 
+@pytest.fixture
+def async_engine(session):
+    SQLALCHEMY_DATABASE_URL = get_async_database_url(
+        get_settings().database_url
+    )
+
+    # connections must not outlive the event loop that opened them
+    engine = create_async_database_engine(
+        SQLALCHEMY_DATABASE_URL, poolclass=NullPool
+    )
+    instrument_engine(engine.sync_engine)
+
+    return engine
+
+
+@pytest.fixture
+def async_session_factory(async_engine):
+    return async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def async_session(async_session_factory):
+    async with async_session_factory() as async_session:
+        yield async_session
+
+
 @pytest.fixture
 def user(session):
     user = UserFactory()
@@ -61,6 +140,14 @@ def user(session):
     return user
 
 
+@pytest.fixture
+def admin_token(session, user):
+    user.is_admin = True
+    session.commit()
+
+    return Security.create_user_access_token(user)
+
+
 @pytest.fixture
 def token(client, user):
     response = client.post(
@@ -0,0 +1,109 @@
+import csv
+import json
+from datetime import datetime
+
+from factories import UserFactory
+from sqlalchemy import update
+
+from app.cli import main
+from app.export import EXPORT_FIELDS, format_header, format_rows, iter_export
+from app.models.user import User
+
+
+def create_many_users(session, number=5):
+    users = UserFactory.create_batch(number)
+
+    session.add_all(users)
+    session.commit()
+
+    return users
+
+
+def test_should_format_rows_as_ndjson_and_csv():
+    # arrange
+    created_at = datetime(2024, 7, 1, 12, 30)
+    rows = [(1, 'user', 'user@test.com', 1, False, created_at, created_at)]
+
+    # act
+    ndjson = format_rows(rows, 'ndjson')
+    csv_text = format_header('csv') + format_rows(rows, 'csv')
+
+    # assert
+    assert json.loads(ndjson) == {
+        'id': 1,
+        'username': 'user',
+        'email': 'user@test.com',
+        'version': 1,
+        'is_admin': False,
+        'created_at': created_at.isoformat(),
+        'updated_at': created_at.isoformat(),
+    }
+    assert csv_text.splitlines() == [
+        ','.join(EXPORT_FIELDS),
+        f'1,user,user@test.com,1,False,{created_at.isoformat()},'
+        f'{created_at.isoformat()}',
+    ]
+
+
+def test_should_export_users_in_batches(session):
+    # arrange
+    users = create_many_users(session)
+    batch_size = 2
+
+    # act
+    chunks = list(iter_export(session, 'ndjson', batch_size=batch_size))
+
+    # assert
+    exported = [json.loads(line) for line in ''.join(chunks).splitlines()]
+
+    assert [user['id'] for user in exported] == [user.id for user in users]
+    assert 'password' not in exported[0]
+    assert len(chunks) == 1 + -(-len(users) // batch_size)
+
+
+def test_should_export_only_users_updated_since(session):
+    # arrange
+    users = create_many_users(session)
+    since = datetime(2024, 1, 1)
+
+    session.execute(
+        update(User)
+        .where(User.id != users[0].id)
+        .values(updated_at=datetime(2023, 1, 1))
+    )
+    session.commit()
+
+    # act
+    exported = ''.join(iter_export(session, 'ndjson', since=since))
+
+    # assert
+    assert [json.loads(line)['id'] for line in exported.splitlines()] == [
+        users[0].id
+    ]
+
+
+def test_should_export_users_to_a_csv_file_from_the_cli(session, tmp_path):
+    # arrange
+    users = create_many_users(session)
+    output = tmp_path / 'users.csv'
+
+    # act
+    main(['export-users', '--format', 'csv', '--output', str(output)])
+
+    # assert
+    with open(output, encoding='utf-8', newline='') as file:
+        exported = list(csv.DictReader(file))
+
+    assert [row['email'] for row in exported] == [user.email for user in users]
+
+
+def test_should_export_users_to_stdout_from_the_cli(session, capsys):
+    # arrange
+    users = create_many_users(session, number=1)
+
+    # act
+    main(['export-users'])
+
+    # assert
+    exported = json.loads(capsys.readouterr().out)
+    assert exported['id'] == users[0].id
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionLimiter
+from app.hashing import (
+    HashingEngine,
+    HashingUnavailableError,
+    create_password_hash,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = HashingEngine(max_workers=1, max_pending=4, timeout=30)
+
+    yield engine
+
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_should_hash_and_verify_a_password_in_the_pool(engine):
+    # arrange
+    raw_password = '123456789'
+
+    # act
+    hashed_password = await engine.hash(raw_password)
+
+    # assert
+    assert hashed_password != raw_password
+    assert await engine.verify(raw_password, hashed_password)
+    assert not await engine.verify('invalid_password', hashed_password)
+    assert engine.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_should_hash_many_passwords_in_order(engine):
+    # arrange
+    raw_passwords = ['first-password', 'second-password', 'third-password']
+
+    # act
+    hashed_passwords = await engine.hash_many(raw_passwords)
+
+    # assert
+    assert len(hashed_passwords) == len(raw_passwords)
+
+    for raw_password, hashed_password in zip(raw_passwords, hashed_passwords):
+        assert await engine.verify(raw_password, hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_should_take_a_limiter_slot_for_every_bulk_hash():
+    # arrange
+    engine = HashingEngine(max_workers=2, max_pending=4, timeout=30)
+    limiter = AdmissionLimiter(
+        'test', max_concurrent=1, max_queue=4, queue_timeout=30
+    )
+    raw_passwords = ['first-password', 'second-password', 'third-password']
+    active = []
+
+    async def watch_limiter():
+        while True:
+            active.append(limiter.active)
+            await asyncio.sleep(0.001)
+
+    watcher = asyncio.create_task(watch_limiter())
+
+    # act
+    try:
+        hashed_passwords = await engine.hash_many(raw_passwords, limiter)
+    finally:
+        watcher.cancel()
+        engine.shutdown()
+
+    # assert
+    assert max(active) == 1
+    assert limiter.active == 0
+
+    for raw_password, hashed_password in zip(raw_passwords, hashed_passwords):
+        assert create_password_hash().verify(raw_password, hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_should_return_an_upgraded_hash_for_stale_parameters(engine):
+    # arrange
+    stale_context = create_password_hash(
+        time_cost=1, memory_cost=8192, parallelism=1
+    )
+    stale_hash = stale_context.hash('123456789')
+    current_hash = await engine.hash('123456789')
+
+    # act
+    stale_valid, upgraded_hash = await engine.verify_and_update(
+        '123456789', stale_hash
+    )
+    current_valid, same_hash = await engine.verify_and_update(
+        '123456789', current_hash
+    )
+
+    # assert
+    assert stale_valid
+    assert upgraded_hash is not None
+    assert await engine.verify('123456789', upgraded_hash)
+    assert current_valid
+    assert same_hash is None
+
+
+@pytest.mark.asyncio
+async def test_should_reject_work_when_the_queue_is_full():
+    # arrange
+    engine = HashingEngine(max_workers=1, max_pending=0, timeout=30)
+
+    # act / assert
+    with pytest.raises(HashingUnavailableError):
+        await engine.hash('123456789')
+
+    assert engine.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_should_raise_when_hashing_exceeds_the_timeout():
+    # arrange
+    engine = HashingEngine(max_workers=1, max_pending=4, timeout=0.001)
+
+    # act / assert
+    with pytest.raises(HashingUnavailableError):
+        await engine.hash('123456789')
+
+    assert engine.pending == 0
+
+    engine.shutdown()
@@ -0,0 +1,145 @@
+import json
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+
+from app import importer
+from app.cli import main
+from app.hashing import HashingEngine
+from app.importer import aiter_import, encode_event
+from app.models.user import User
+from app.security import Security
+
+
+@pytest_asyncio.fixture
+async def hashing_engine():
+    engine = HashingEngine(max_workers=2, max_pending=4, timeout=30)
+
+    yield engine
+
+    engine.shutdown()
+
+
+def user_line(name: str, **fields) -> str:
+    return json.dumps({
+        'username': name,
+        'email': f'{name}@import.com',
+        'password': 'import-password',
+        **fields,
+    })
+
+
+async def collect(async_session, lines, hashing_engine, batch_size=2):
+    return [
+        event
+        async for event in aiter_import(
+            async_session, lines, batch_size, hashing_engine
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_should_import_users_in_batches(async_session, hashing_engine):
+    # arrange
+    lines = [user_line(f'import{index}') for index in range(3)]
+
+    # act
+    events = await collect(async_session, lines, hashing_engine)
+
+    # assert
+    progress = [event for event in events if event['event'] == 'progress']
+    summary = events[-1]
+
+    assert [event['created'] for event in progress] == [2, 3]
+    assert summary == {
+        'event': 'summary',
+        'processed': len(lines),
+        'created': len(lines),
+        'duplicates': 0,
+        'invalid': 0,
+    }
+
+    user = await async_session.scalar(
+        select(User).filter_by(username='import0')
+    )
+    assert Security.verify_password('import-password', user.password)
+
+
+@pytest.mark.asyncio
+async def test_should_report_invalid_and_duplicate_rows(
+    async_session, hashing_engine, user
+):
+    # arrange
+    lines = [
+        user_line('import0'),
+        '{not json',
+        '',
+        user_line('import1', email='not-an-email'),
+        user_line(user.username),
+        user_line('import2', email='import0@import.com'),
+        user_line('import3'),
+    ]
+
+    # act
+    events = await collect(async_session, lines, hashing_engine)
+
+    # assert
+    rows = {
+        event['line']: event for event in events if event['event'] == 'row'
+    }
+
+    assert rows[2]['status'] == 'invalid'
+    assert rows[4]['status'] == 'invalid'
+    assert json.loads(encode_event(rows[4]))['errors'][0]['loc'] == ['email']
+    assert rows[5] == {
+        'event': 'row',
+        'line': 5,
+        'status': 'duplicate',
+        'field': 'username',
+    }
+    assert rows[6]['field'] == 'email'
+    assert events[-1]['created'] == len(lines) - len(rows) - 1
+
+    imported = await async_session.scalar(
+        select(func.count()).select_from(User)
+    )
+    assert imported == events[-1]['created'] + 1
+
+
+@pytest.mark.asyncio
+async def test_should_import_row_by_row_when_the_batch_conflicts(
+    monkeypatch, async_session, hashing_engine, user
+):
+    # arrange
+    async def find_no_duplicates(session, batch):
+        return [(line_number, data, None) for line_number, data in batch]
+
+    monkeypatch.setattr(importer, '_find_duplicates', find_no_duplicates)
+    lines = [user_line('import0'), user_line(user.username)]
+
+    # act
+    events = await collect(async_session, lines, hashing_engine)
+
+    # assert
+    assert {'event': 'row', 'line': 2, 'status': 'duplicate'} in events
+    assert events[-1]['created'] == 1
+
+    imported = await async_session.scalar(
+        select(User).filter_by(username='import0')
+    )
+    assert imported is not None
+
+
+def test_should_import_users_from_the_cli(session, tmp_path, capsys):
+    # arrange
+    source = tmp_path / 'users.ndjson'
+    source.write_text(user_line('import0') + '\n', encoding='utf-8')
+
+    # act
+    main(['import-users', str(source), '--workers', '1'])
+
+    # assert
+    events = [json.loads(line) for line in capsys.readouterr().out.split()]
+    assert events[-1]['created'] == 1
+    assert session.scalar(select(User).filter_by(username='import0'))
@@ -0,0 +1,125 @@
+import json
+import logging
+from http import HTTPStatus
+
+from sqlalchemy import create_engine, text
+
+from app import instrumentation
+from app.instrumentation import (
+    QueryStats,
+    instrument_engine,
+    query_stats,
+    record_queries,
+)
+from app.security import Security
+
+
+def test_should_count_the_queries_issued_by_a_route(
+    client, async_engine, token
+):
+    # arrange
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # act
+    with record_queries(async_engine.sync_engine) as first_request:
+        client.get('/auth/me', headers=headers)
+
+    with record_queries(async_engine.sync_engine) as cached_request:
+        client.get('/auth/me', headers=headers)
+
+    # assert
+    assert first_request.count == 1
+    assert cached_request.count == 0
+
+
+def test_should_add_server_timing_header_with_query_stats(client, token):
+    # arrange
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # act
+    response = client.get('/auth/me', headers=headers)
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+
+    server_timing = response.headers['server-timing']
+    assert server_timing.startswith('db;dur=')
+    assert 'desc="1 queries"' in server_timing
+    assert 'db-slowest;dur=' in server_timing
+
+
+def test_should_record_queries_in_the_current_context():
+    # arrange
+    engine = create_engine('sqlite://')
+    instrument_engine(engine)
+    stats = QueryStats()
+    token = query_stats.set(stats)
+
+    statements = ['SELECT 1', 'SELECT 2']
+
+    # act
+    with engine.connect() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+
+    query_stats.reset(token)
+
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 3'))
+
+    # assert
+    assert stats.count == len(statements)
+    assert stats.slowest_statement in statements
+
+
+def test_should_log_slow_queries_with_their_query_plan(
+    monkeypatch, caplog, client, user, token
+):
+    # arrange
+    monkeypatch.setattr(
+        instrumentation,
+        'settings',
+        instrumentation.settings.copy(update={'slow_query_threshold_ms': 0}),
+    )
+    caplog.set_level(logging.WARNING, logger='app.slow_query')
+
+    # act
+    client.get('/auth/me', headers={'Authorization': f'Bearer {token}'})
+
+    # assert
+    records = [
+        json.loads(record.getMessage())
+        for record in caplog.records
+        if record.name == 'app.slow_query'
+    ]
+    assert len(records) == 1
+    assert records[0]['statement'].startswith('SELECT')
+    assert records[0]['plan'] == [
+        'SEARCH users USING INTEGER PRIMARY KEY (rowid=?)'
+    ]
+
+
+def test_should_count_the_connections_checked_out_by_a_request(
+    caplog, client, session, user
+):
+    # arrange
+    user.is_admin = True
+    session.commit()
+    headers = {
+        'Authorization': f'Bearer {Security.create_user_access_token(user)}'
+    }
+    caplog.set_level(logging.INFO, logger='app.instrumentation')
+
+    # act
+    client.get('/users/', headers=headers)
+    client.get('/auth/me/', headers=headers)
+    client.get('/')
+
+    # assert
+    checkouts = {
+        record['route']: record['db_checkouts']
+        for record in map(json.loads, caplog.messages)
+    }
+    # the admin lookup and the listing share the request's session, and
+    # the principal is cached by the time /auth/me/ runs
+    assert checkouts == {'/users/': 1, '/auth/me/': 0, '/': 0}
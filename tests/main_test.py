@@ -1,9 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 
 import pytest
 from fastapi import HTTPException
 from fastapi.exceptions import RequestValidationError
 
+from app.admission import hashing_limiter
+from app.hashing import hashing_engine, import_hashing_engine
 from app.main import http_exception_handler, validation_exception_handler
 
 
@@ -14,6 +17,34 @@ def test_root_should_returns_ok_status(client):
     assert response.json() == {'hello': 'world'}
 
 
+def test_should_start_the_hashing_processes_with_the_app(client):
+    # act / assert
+    for engine in (hashing_engine, import_hashing_engine):
+        assert len(engine._get_executor()._processes) == engine.max_workers
+
+
+def test_should_not_shed_the_first_concurrent_logins(client, user):
+    # arrange
+    # a slot for every hashing process and one waiter each, which only a
+    # pool still spawning keeps queued past the timeout
+    logins = hashing_limiter.max_concurrent * 2
+
+    def login(_):
+        return client.post(
+            '/auth/login/',
+            json={'email': user.email, 'password': user.clean_password},
+        )
+
+    # act
+    with ThreadPoolExecutor(max_workers=logins) as pool:
+        responses = list(pool.map(login, range(logins)))
+
+    # assert
+    assert [response.status_code for response in responses] == [
+        HTTPStatus.OK
+    ] * logins
+
+
 @pytest.mark.asyncio
 async def test_shoud_return_valid_json_format_response_for_validation_error(
     request,
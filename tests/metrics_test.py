@@ -0,0 +1,107 @@
+import os
+from http import HTTPStatus
+
+from prometheus_client.mmap_dict import MmapedDict, mmap_key
+
+from app import metrics
+from app.metrics import (
+    CONTENT_TYPE,
+    clear_multiproc_dir,
+    expose_metrics,
+    mark_process_dead,
+)
+
+
+def use_multiproc_dir(monkeypatch, path):
+    monkeypatch.setattr(
+        metrics,
+        'settings',
+        metrics.settings.copy(update={'metrics_multiproc_dir': str(path)}),
+    )
+
+
+def write_worker_value(path, file_name, metric_name, labels, value):
+    values = MmapedDict(str(path / file_name))
+    key = mmap_key(
+        metric_name, metric_name, list(labels), list(labels.values()), ''
+    )
+    values.write_value(key, value, 0)
+    values.close()
+
+
+def test_should_sum_the_values_of_every_worker_process(monkeypatch, tmp_path):
+    # arrange
+    use_multiproc_dir(monkeypatch, tmp_path)
+    labels = {'operation': 'verify'}
+
+    for pid in (101, 102):
+        write_worker_value(
+            tmp_path,
+            f'counter_{pid}.db',
+            'password_hashes_total',
+            labels,
+            2,
+        )
+
+    # act
+    exposed = expose_metrics().decode()
+
+    # assert
+    assert 'password_hashes_total{operation="verify"} 4.0' in exposed
+
+
+def test_should_drop_gauges_of_a_dead_worker_process(monkeypatch, tmp_path):
+    # arrange
+    use_multiproc_dir(monkeypatch, tmp_path)
+    write_worker_value(
+        tmp_path, 'gauge_livesum_101.db', 'http_requests_in_flight', {}, 3
+    )
+    write_worker_value(
+        tmp_path, 'counter_101.db', 'http_requests_total', {}, 1
+    )
+
+    # act
+    mark_process_dead(101)
+
+    # assert
+    assert not os.path.exists(tmp_path / 'gauge_livesum_101.db')
+    assert os.path.exists(tmp_path / 'counter_101.db')
+
+
+def test_should_clear_the_files_of_a_previous_run(monkeypatch, tmp_path):
+    # arrange
+    use_multiproc_dir(monkeypatch, tmp_path / 'metrics')
+    (tmp_path / 'metrics').mkdir()
+    write_worker_value(
+        tmp_path / 'metrics', 'counter_101.db', 'http_requests_total', {}, 1
+    )
+
+    # act
+    clear_multiproc_dir()
+
+    # assert
+    assert not list((tmp_path / 'metrics').iterdir())
+
+
+def test_should_serve_route_metrics(client, user, token):
+    # arrange
+    client.get('/auth/me/', headers={'Authorization': f'Bearer {token}'})
+
+    # act
+    response = client.get('/metrics')
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith(CONTENT_TYPE)
+
+    assert (
+        'http_requests_total{method="GET",route="/auth/me/",status="200"}'
+        in response.text
+    )
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/auth/me/"}'
+        in response.text
+    )
+    assert 'password_hashes_total{operation="verify"}' in response.text
+    assert 'token_decodes_total{outcome="decoded"}' in response.text
+    assert 'cache_requests_total{cache="user",result="miss"}' in response.text
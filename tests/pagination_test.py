@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    prefix_upper_bound,
+)
+
+
+def test_should_decode_an_encoded_cursor():
+    # arrange
+    created_at = datetime(2024, 7, 1, 12, 30, 15)
+    user_id = 42
+
+    # act
+    cursor = encode_cursor(created_at, user_id)
+
+    # assert
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (created_at, user_id)
+
+
+def tampered_cursor(created_at, id) -> str:
+    raw = json.dumps([created_at, id]).encode()
+
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    [
+        'not-a-cursor',
+        encode_cursor(datetime(2024, 7, 1), 1)[:-4],
+        tampered_cursor('2024-01-01T00:00:00', 2**70),
+        tampered_cursor('2024-01-01T00:00:00', 0),
+        tampered_cursor('2024-01-01T00:00:00', '1'),
+        tampered_cursor('yesterday', 1),
+        tampered_cursor(None, 1),
+    ],
+)
+def test_should_reject_malformed_cursors(cursor):
+    # arrange
+    # act
+    # assert
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_should_return_the_upper_bound_of_a_prefix():
+    # arrange
+    # act
+    # assert
+    assert prefix_upper_bound('abc') == 'abd'
+    assert prefix_upper_bound('ab' + chr(0x10FFFF)) == 'ac'
+    assert prefix_upper_bound(chr(0x10FFFF)) is None
@@ -0,0 +1,262 @@
+import pytest
+from factories import UserFactory
+from sqlalchemy import select
+
+from app.instrumentation import record_queries
+from app.models.user import User
+from app.repositories.async_user_repository import AsyncUserRepository
+from app.schemas.user_schema import UserCreateInput, UserUpdateInput
+
+
+@pytest.fixture
+def user_repo(async_session):
+    return AsyncUserRepository(session=async_session)
+
+
+def create_many_users(session, number=5):
+    users = UserFactory.create_batch(number, password='123456789')
+
+    session.bulk_save_objects(users)
+    session.commit()
+
+    return users
+
+
+@pytest.mark.asyncio
+async def test_should_create_a_user_with_valid_data(async_session, user_repo):
+    # arrange
+    data = UserCreateInput(
+        username='test user', email='user@email.com', password='123456789'
+    )
+
+    # act
+    await user_repo.create_user(data)
+
+    # assert
+    created_user = await async_session.scalar(
+        select(User).filter_by(username='test user')
+    )
+
+    assert created_user is not None
+    assert type(created_user.id) is int
+    assert created_user.username == data.username
+    assert created_user.email == data.email
+    assert created_user.password == data.password
+
+
+@pytest.mark.asyncio
+async def test_should_return_all_users(session, user_repo):
+    # arrange
+    NUM_USERS = 5
+    create_many_users(session, number=NUM_USERS)
+
+    # act
+    returned_users = await user_repo.get_all_users()
+
+    # assert
+    assert len(returned_users) == NUM_USERS
+
+    for user in returned_users:
+        assert user.id is not None
+        assert user.username.startswith('test')
+
+
+@pytest.mark.asyncio
+async def test_should_return_user_by_id(user, user_repo):
+    # arrange
+    # act
+    returned_user = await user_repo.get_user_by_id(user.id)
+
+    # assert
+    assert returned_user is not None
+    assert returned_user.id == user.id
+
+
+@pytest.mark.asyncio
+async def test_should_update_a_user_with_valid_data(user, user_repo):
+    # arrange
+    data = UserUpdateInput(
+        username='test update user', email='update_user@email.com'
+    )
+
+    # act
+    returned_user = await user_repo.update_user(user.id, data)
+
+    # assert
+    assert returned_user.id == user.id
+    assert returned_user.username == 'test update user'
+    assert returned_user.email == 'update_user@email.com'
+
+
+@pytest.mark.asyncio
+async def test_should_returns_none_on_update_nonexistent_use(user_repo):
+    # arrange
+    random_user_id = 1000
+    data = UserUpdateInput(
+        username='test update user', email='update_user@email.com'
+    )
+
+    # act
+    return_value = await user_repo.update_user(random_user_id, data)
+
+    # assert
+    assert return_value is None
+
+
+@pytest.mark.asyncio
+async def test_should_delete_a_user_by_id(async_session, user, user_repo):
+    # arrange
+    # act
+    return_value = await user_repo.delete_user(user.id)
+
+    # assert
+    assert return_value
+
+    delete_user = await async_session.scalar(
+        select(User).filter_by(id=user.id)
+    )
+    assert delete_user is None
+
+
+@pytest.mark.asyncio
+async def test_should_returns_none_on_delete_nonexistent_use(user_repo):
+    # arrange
+    random_user_id = 1000
+    # act
+    return_value = await user_repo.delete_user(random_user_id)
+
+    # assert
+    assert return_value is None
+
+
+@pytest.mark.asyncio
+async def test_should_create_a_user_in_a_single_statement(
+    async_engine, user_repo
+):
+    # arrange
+    data = UserCreateInput(
+        username='test user', email='user@email.com', password='123456789'
+    )
+
+    # act
+    with record_queries(async_engine.sync_engine) as stats:
+        created_user = await user_repo.create_user(data)
+
+    # assert
+    assert stats.count == 1
+    assert stats.slowest_statement.startswith('INSERT')
+    assert 'RETURNING' in stats.slowest_statement
+    assert type(created_user.id) is int
+    assert created_user.created_at is not None
+
+
+@pytest.mark.asyncio
+async def test_should_update_a_user_in_a_single_statement(
+    async_engine, user, user_repo
+):
+    # arrange
+    data = UserUpdateInput(username='test update user')
+    expected_version = user.version + 1
+
+    # act
+    with record_queries(async_engine.sync_engine) as stats:
+        returned_user = await user_repo.update_user(user.id, data)
+
+    # assert
+    assert stats.count == 1
+    assert stats.slowest_statement.startswith('UPDATE')
+    assert returned_user.username == data.username
+    assert returned_user.version == expected_version
+
+
+@pytest.mark.asyncio
+async def test_should_refresh_a_loaded_user_on_update(user, user_repo):
+    # arrange
+    loaded_user = await user_repo.get_user_by_id(user.id)
+    data = UserUpdateInput(username='test update user')
+
+    # act
+    returned_user = await user_repo.update_user(user.id, data)
+
+    # assert
+    assert returned_user is loaded_user
+    assert loaded_user.username == data.username
+
+
+@pytest.mark.asyncio
+async def test_should_delete_a_user_in_a_single_statement(
+    async_engine, user, user_repo
+):
+    # arrange
+    # act
+    with record_queries(async_engine.sync_engine) as stats:
+        return_value = await user_repo.delete_user(user.id)
+
+    # assert
+    assert return_value
+    assert stats.count == 1
+    assert stats.slowest_statement.startswith('DELETE')
+
+
+@pytest.mark.asyncio
+async def test_should_load_users_by_ids_in_a_single_query(
+    async_engine, session, user_repo
+):
+    # arrange
+    users = UserFactory.create_batch(5)
+    session.add_all(users)
+    session.commit()
+    user_ids = [user.id for user in users[:3]] + [users[0].id, 404]
+
+    # act
+    with record_queries(async_engine.sync_engine) as stats:
+        returned_users = await user_repo.get_users_by_ids(user_ids)
+
+    # assert
+    assert stats.count == 1
+    assert ' IN ' in stats.slowest_statement
+    assert {user.id for user in returned_users} == set(user_ids[:3])
+
+
+@pytest.mark.asyncio
+async def test_should_grant_the_admin_role_by_email(user, user_repo):
+    # arrange
+    expected_version = user.version + 1
+
+    # act
+    returned_user = await user_repo.set_admin(user.email, is_admin=True)
+
+    # assert
+    assert returned_user.is_admin
+    assert returned_user.version == expected_version
+
+
+@pytest.mark.asyncio
+async def test_should_not_grant_the_admin_role_to_an_unknown_email(
+    user_repo,
+):
+    # arrange
+    # act
+    returned_user = await user_repo.set_admin('nobody@test.com', is_admin=True)
+
+    # assert
+    assert returned_user is None
+
+
+@pytest.mark.asyncio
+async def test_should_return_the_tenant_ids_across_tenants(
+    session, user, user_repo
+):
+    # arrange
+    session.add_all([
+        UserFactory(tenant_id='pizzeria'),
+        UserFactory(tenant_id='bakery'),
+        UserFactory(tenant_id='pizzeria'),
+    ])
+    session.commit()
+
+    # act
+    tenant_ids = await user_repo.get_tenant_ids()
+
+    # assert
+    assert tenant_ids == sorted({'bakery', 'pizzeria', user.tenant_id})
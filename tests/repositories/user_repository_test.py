@@ -1,8 +1,14 @@
 import pytest
 from factories import UserFactory
+from sqlalchemy import text
 
+from app.config.sharding import current_tenant
+from app.instrumentation import record_queries
 from app.models.user import User
-from app.repositories.user_repository import UserRepository
+from app.repositories.user_repository import (
+    UserRepository,
+    users_page_query,
+)
 from app.schemas.user_schema import UserCreateInput, UserUpdateInput
 
 
@@ -115,3 +121,170 @@ def test_should_returns_none_on_delete_nonexistent_use(user_repo):
 
     # assert
     assert return_value is None
+
+
+def test_should_create_a_user_in_a_single_statement(session, user_repo):
+    # arrange
+    data = UserCreateInput(
+        username='test user', email='user@email.com', password='123456789'
+    )
+
+    # act
+    with record_queries(session.get_bind()) as stats:
+        created_user = user_repo.create_user(data)
+
+    # assert
+    assert stats.count == 1
+    assert stats.slowest_statement.startswith('INSERT')
+    assert 'RETURNING' in stats.slowest_statement
+    assert type(created_user.id) is int
+    assert created_user.created_at is not None
+
+
+def test_should_update_a_user_in_a_single_statement(session, user, user_repo):
+    # arrange
+    data = UserUpdateInput(username='test update user')
+    expected_version = user.version + 1
+
+    # act
+    with record_queries(session.get_bind()) as stats:
+        returned_user = user_repo.update_user(user.id, data)
+
+    # assert
+    assert stats.count == 1
+    assert stats.slowest_statement.startswith('UPDATE')
+    assert 'RETURNING' in stats.slowest_statement
+    assert returned_user.version == expected_version
+
+
+def test_should_delete_a_user_in_a_single_statement(session, user, user_repo):
+    # arrange
+    # act
+    with record_queries(session.get_bind()) as stats:
+        return_value = user_repo.delete_user(user.id)
+
+    # assert
+    assert return_value
+    assert stats.count == 1
+    assert stats.slowest_statement.startswith('DELETE')
+    assert 'RETURNING' in stats.slowest_statement
+
+
+def test_should_seek_users_pages_through_the_listing_index(
+    session, user, user_repo
+):
+    # arrange
+    after = (user.created_at, user.id)
+    query = users_page_query(limit=10, after=after)
+    statement = query.compile(
+        session.get_bind(), compile_kwargs={'literal_binds': True}
+    )
+
+    # act
+    plan = session.execute(text(f'EXPLAIN QUERY PLAN {statement}')).all()
+
+    # assert
+    assert 'ix_users_tenant_id_created_at_id' in plan[0][-1]
+    assert user_repo.get_users_page(limit=10, after=after) == []
+
+
+def test_should_load_users_by_ids_in_a_single_query(session, user_repo):
+    # arrange
+    users = UserFactory.create_batch(5)
+    session.add_all(users)
+    session.commit()
+    user_ids = [user.id for user in users[:3]] + [users[0].id, 404]
+
+    # act
+    with record_queries(session.get_bind()) as stats:
+        returned_users = user_repo.get_users_by_ids(user_ids)
+
+    # assert
+    assert stats.count == 1
+    assert ' IN ' in stats.slowest_statement
+    assert {user.id for user in returned_users} == set(user_ids[:3])
+
+
+def test_should_grant_the_admin_role_by_email(user, user_repo):
+    # arrange
+    expected_version = user.version + 1
+
+    # act
+    returned_user = user_repo.set_admin(user.email, is_admin=True)
+
+    # assert
+    assert returned_user.is_admin
+    assert returned_user.version == expected_version
+
+
+def test_should_not_grant_the_admin_role_to_an_unknown_email(user_repo):
+    # arrange
+    # act
+    returned_user = user_repo.set_admin('nobody@test.com', is_admin=True)
+
+    # assert
+    assert returned_user is None
+
+
+@pytest.fixture
+def other_tenant_user(session, user):
+    # the same email and username, which another tenant may reuse
+    other_user = UserFactory(
+        username=user.username, email=user.email, tenant_id='pizzeria'
+    )
+
+    session.add(other_user)
+    session.commit()
+
+    return other_user
+
+
+def test_should_create_users_in_the_current_tenant(session, user_repo):
+    # arrange
+    data = UserCreateInput(
+        username='test user', email='user@email.com', password='123456789'
+    )
+    token = current_tenant.set('pizzeria')
+
+    # act
+    try:
+        created_user = user_repo.create_user(data)
+    finally:
+        current_tenant.reset(token)
+
+    # assert
+    assert created_user.tenant_id == 'pizzeria'
+
+
+def test_should_only_see_the_users_of_the_current_tenant(
+    user, other_tenant_user, user_repo
+):
+    # act
+    all_users = user_repo.get_all_users()
+    by_email = user_repo.get_user_by({'email': user.email})
+    other_by_id = user_repo.get_user_by_id(other_tenant_user.id)
+    other_by_ids = user_repo.get_users_by_ids([other_tenant_user.id])
+    page = user_repo.get_users_page(limit=10)
+
+    # assert
+    assert [found.id for found in all_users] == [user.id]
+    assert by_email.id == user.id
+    assert other_by_id is None
+    assert other_by_ids == []
+    assert [found.id for found in page] == [user.id]
+
+
+def test_dont_change_the_users_of_another_tenant(
+    session, other_tenant_user, user_repo
+):
+    # act
+    updated_user = user_repo.update_user(
+        other_tenant_user.id, UserUpdateInput(username='renamed')
+    )
+    deleted = user_repo.delete_user(other_tenant_user.id)
+
+    # assert
+    session.expire_all()
+    assert updated_user is None
+    assert deleted is None
+    assert session.get(User, other_tenant_user.id).username != 'renamed'
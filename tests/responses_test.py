@@ -0,0 +1,48 @@
+import json
+from datetime import datetime
+from http import HTTPStatus
+
+from app import responses
+from app.responses import error_response, success_response
+from app.schemas.user_schema import UserPublic, serialize_user_public
+
+
+def test_should_render_a_success_response():
+    # arrange
+    data = {'user': {'id': 1, 'username': 'user'}, 'access_token': 'token'}
+
+    # act
+    response = success_response(data, status_code=HTTPStatus.CREATED)
+
+    # assert
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.media_type == 'application/json'
+    assert json.loads(response.body) == {'status': 'success', 'data': data}
+
+
+def test_should_render_an_error_response_with_the_stdlib_encoder(
+    monkeypatch,
+):
+    # arrange
+    monkeypatch.setattr(responses, 'orjson', None)
+    errors = [{'loc': ('body', 'email'), 'ctx': {'at': datetime(2024, 1, 1)}}]
+
+    # act
+    response = error_response(
+        'validation error', errors, status_code=HTTPStatus.BAD_REQUEST
+    )
+
+    # assert
+    assert response.body == (
+        b'{"status":"fail","message":"validation error","errors":'
+        b'[{"loc":["body","email"],"ctx":{"at":"2024-01-01T00:00:00"}}]}'
+    )
+
+
+def test_should_serialize_a_user_like_user_public(user):
+    # arrange
+    # act
+    serialized = serialize_user_public(user)
+
+    # assert
+    assert serialized == UserPublic(**user.__dict__).dict()
@@ -1,5 +1,8 @@
 from http import HTTPStatus
 
+from app.config.settings import get_settings
+from app.security import Security
+
 
 def test_should_register_a_user_with_valid_data(client):
     # arrange
@@ -30,6 +33,7 @@ def test_should_register_a_user_with_valid_data(client):
 
     assert 'access_token' in response_data
     assert type(response_data.get('access_token')) is str
+    assert type(response_data.get('refresh_token')) is str
 
 
 def test_dont_register_a_user_with_invalid_data(client):
@@ -139,6 +143,7 @@ def test_should_login_a_user_with_valid_data(client, user):
 
     assert 'access_token' in response_data
     assert type(response_data.get('access_token')) is str
+    assert type(response_data.get('refresh_token')) is str
 
 
 def test_dont_login_a_user_with_invalid_password(client, user):
@@ -231,3 +236,175 @@ def test_dont_return_user_with_invalid_token(client):
     assert type(response_errors) is dict
 
     assert response_errors == {}
+
+
+def test_get_logged_user_dont_block_the_event_loop(
+    loop_watchdog, client, user, token
+):
+    # arrange
+    loop_watchdog.reports.clear()
+
+    # act
+    for _ in range(10):
+        response = client.get(
+            '/auth/me', headers={'Authorization': f'Bearer {token}'}
+        )
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+    assert loop_watchdog.reports == []
+
+
+def test_should_return_logged_user_from_claims_only_token(
+    use_claims_mode, client, user, session
+):
+    # arrange
+    use_claims_mode()
+    token = Security.create_user_access_token(user)
+    session.delete(user)
+    session.commit()
+
+    # act
+    response = client.get(
+        '/auth/me', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+
+    logged_user = response.json()['data']['user']
+    assert logged_user.get('id') == user.id
+    assert logged_user.get('email') == user.email
+
+
+def test_should_refresh_the_access_token(client, user):
+    # arrange
+    data = {'refresh_token': Security.create_refresh_token(user.id)}
+
+    # act
+    response = client.post('/auth/refresh', json=data)
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+
+    response_data = response.json()['data']
+    assert type(response_data.get('access_token')) is str
+    assert type(response_data.get('refresh_token')) is str
+
+    response = client.get(
+        '/auth/me',
+        headers={'Authorization': f"Bearer {response_data['access_token']}"},
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_dont_refresh_with_an_access_token(client, token):
+    # arrange
+    data = {'refresh_token': token}
+
+    # act
+    response = client.post('/auth/refresh', json=data)
+
+    # assert
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json().get('message') == 'unauthorized error'
+
+
+def introspect(client, data, headers=None):
+    return client.post('/auth/introspect/', json=data, headers=headers)
+
+
+def test_should_introspect_a_batch_of_tokens(client, user, admin_token):
+    # arrange
+    token = Security.create_user_access_token(user)
+    data = {'tokens': [token, 'invalid token', token]}
+
+    # act
+    response = introspect(
+        client, data, {'Authorization': f'Bearer {admin_token}'}
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+
+    results = response.json()['data']['results']
+    assert [result['active'] for result in results] == [True, False, True]
+    assert results[0]['user'] == {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+    }
+    assert results[0]['claims']['sub'] == user.id
+
+
+def test_should_introspect_for_a_service_with_the_secret(
+    override_settings, client, user
+):
+    # arrange
+    override_settings(introspect_secret='service-secret')
+    data = {'tokens': [Security.create_user_access_token(user)]}
+
+    # act
+    response = introspect(
+        client, data, {'X-Introspect-Secret': 'service-secret'}
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['data']['results'][0]['active'] is True
+
+
+def test_dont_introspect_for_anonymous_callers(
+    override_settings, client, user
+):
+    # arrange
+    override_settings(introspect_secret='service-secret')
+    data = {'tokens': [Security.create_user_access_token(user)]}
+
+    # act
+    without_secret = introspect(client, data)
+    wrong_secret = introspect(client, data, {'X-Introspect-Secret': 'guess'})
+
+    # assert
+    assert without_secret.status_code == HTTPStatus.UNAUTHORIZED
+    assert wrong_secret.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_dont_introspect_for_non_admin_users(client, user):
+    # arrange
+    token = Security.create_user_access_token(user)
+
+    # act
+    response = introspect(
+        client, {'tokens': [token]}, {'Authorization': f'Bearer {token}'}
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_dont_introspect_more_tokens_than_allowed(client, admin_token):
+    # arrange
+    max_tokens = get_settings().introspect_max_tokens
+    data = {'tokens': ['token'] * (max_tokens + 1)}
+
+    # act
+    response = introspect(
+        client, data, {'Authorization': f'Bearer {admin_token}'}
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_dont_introspect_an_empty_batch(client, admin_token):
+    # arrange
+    data = {'tokens': []}
+
+    # act
+    response = introspect(
+        client, data, {'Authorization': f'Bearer {admin_token}'}
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
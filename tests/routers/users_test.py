@@ -0,0 +1,266 @@
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+from factories import UserFactory
+from sqlalchemy import update
+
+from app.config.settings import get_settings
+from app.hashing import hashing_engine
+from app.models.user import User
+from app.security import Security
+
+
+@pytest.fixture
+def users(session, user):
+    users = UserFactory.create_batch(6)
+
+    session.add_all(users)
+    session.commit()
+
+    return [user, *users]
+
+
+def list_users(client, token, **params):
+    return client.get(
+        '/users/',
+        params=params,
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+
+def test_should_list_users_page_by_page(client, users, admin_token):
+    # arrange
+    page_size = 3
+    listed_ids = []
+    cursor = None
+
+    # act
+    while True:
+        params = {'limit': page_size}
+
+        if cursor is not None:
+            params['cursor'] = cursor
+
+        response = list_users(client, admin_token, **params)
+        assert response.status_code == HTTPStatus.OK
+
+        data = response.json()['data']
+        assert len(data['users']) <= page_size
+
+        listed_ids += [user['id'] for user in data['users']]
+        cursor = data['next_cursor']
+
+        if cursor is None:
+            break
+
+    # assert
+    assert listed_ids == [user.id for user in users]
+
+
+def test_should_filter_users_by_username_and_email_prefix(
+    client, users, admin_token
+):
+    # arrange
+    expected_user = users[-1]
+
+    # act
+    by_username = list_users(
+        client, admin_token, username_prefix=expected_user.username
+    )
+    by_email = list_users(
+        client, admin_token, email_prefix=expected_user.email[:-1]
+    )
+
+    # assert
+    assert [user['id'] for user in by_username.json()['data']['users']] == [
+        expected_user.id
+    ]
+    assert [user['id'] for user in by_email.json()['data']['users']] == [
+        expected_user.id
+    ]
+
+
+def test_dont_list_users_for_non_admin_users(client, user):
+    # arrange
+    token = Security.create_user_access_token(user)
+
+    # act
+    response = list_users(client, token)
+
+    # assert
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json()['message'] == 'forbidden error'
+
+
+def test_dont_list_users_with_an_invalid_cursor(client, admin_token):
+    # arrange
+    # act
+    response = list_users(client, admin_token, cursor='not-a-cursor')
+    # an id past the 64-bit INTEGER column
+    overflowing = list_users(
+        client,
+        admin_token,
+        cursor=base64.urlsafe_b64encode(
+            json.dumps(['2024-01-01T00:00:00', 2**70]).encode()
+        ).decode(),
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert overflowing.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_dont_list_users_with_a_page_size_above_the_limit(client, admin_token):
+    # arrange
+    # act
+    response = list_users(
+        client, admin_token, limit=get_settings().users_max_page_size + 1
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_should_stream_every_user_as_ndjson(client, users, admin_token):
+    # arrange
+    # act
+    response = client.get(
+        '/users/export/', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [user['id'] for user in exported] == [user.id for user in users]
+
+
+def test_should_stream_users_updated_since_as_csv(
+    client, session, users, admin_token
+):
+    # arrange
+    session.execute(
+        update(User)
+        .where(User.id != users[0].id)
+        .values(updated_at=datetime(2023, 1, 1))
+    )
+    session.commit()
+
+    # act
+    response = client.get(
+        '/users/export/',
+        params={'format': 'csv', 'since': '2024-01-01T00:00:00'},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert 'users.csv' in response.headers['content-disposition']
+
+    exported = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row['id']) for row in exported] == [users[0].id]
+
+
+def test_dont_export_users_for_non_admin_users(client, user):
+    # arrange
+    token = Security.create_user_access_token(user)
+
+    # act
+    response = client.get(
+        '/users/export/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_should_import_users_from_ndjson(client, admin_token):
+    # arrange
+    body = '\n'.join([
+        json.dumps({
+            'username': 'imported',
+            'email': 'imported@test.com',
+            'password': 'import-password',
+        }),
+        json.dumps({'username': 'no'}),
+    ])
+
+    # act
+    response = client.post(
+        '/users/import/',
+        content=body,
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]['status'] == 'invalid'
+    assert events[-1]['event'] == 'summary'
+    assert events[-1]['created'] == 1
+
+
+def test_should_import_users_on_their_own_hashing_pool(
+    monkeypatch, client, admin_token
+):
+    # arrange
+    async def busy_login_pool(passwords):
+        raise AssertionError('imports must not use the login hashing pool')
+
+    monkeypatch.setattr(hashing_engine, 'hash_many', busy_login_pool)
+    body = json.dumps({
+        'username': 'imported',
+        'email': 'imported@test.com',
+        'password': 'import-password',
+    })
+
+    # act
+    response = client.post(
+        '/users/import/',
+        content=body,
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    # assert
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[-1]['created'] == 1
+
+
+def test_should_import_in_batches_of_the_injected_size(
+    override_settings, client, admin_token
+):
+    # arrange
+    override_settings(import_batch_size=1, import_max_batch_size=2)
+    body = '\n'.join(
+        json.dumps({
+            'username': f'imported{index}',
+            'email': f'imported{index}@test.com',
+            'password': 'import-password',
+        })
+        for index in range(2)
+    )
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    # act
+    response = client.post('/users/import/', content=body, headers=headers)
+    too_large = client.post(
+        '/users/import/?batch_size=3', content=body, headers=headers
+    )
+
+    # assert
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event['event'] for event in events] == [
+        'progress',
+        'progress',
+        'summary',
+    ]
+    assert too_large.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
@@ -1,4 +1,12 @@
-from app.security import Security
+from datetime import datetime, timedelta
+
+import pytest
+from jwt import encode
+from zoneinfo import ZoneInfo
+
+from app.cache import token_cache
+from app.config.settings import get_settings
+from app.security import ALGORITHM, Security
 
 
 def test_should_be_hash_a_password():
@@ -70,3 +78,115 @@ def test_should_returns_none_when_decode_a_invalid_access_token():
 
     # assert
     assert payload is None
+
+
+def test_should_returns_none_when_decode_an_expired_access_token():
+    # arrange
+    expired_at = datetime.now(tz=ZoneInfo('UTC')) - timedelta(minutes=1)
+    access_token = encode(
+        {'sub': '123456789', 'exp': expired_at},
+        get_settings().secret_key,
+        ALGORITHM,
+    )
+
+    # act
+    payload = Security.decode_access_token(access_token)
+
+    # assert
+    assert payload is None
+    assert token_cache.stats()['size'] == 0
+
+
+def test_should_decode_a_valid_refresh_token():
+    # arrange
+    refresh_token = Security.create_refresh_token(1)
+
+    # act
+    payload = Security.decode_refresh_token(refresh_token)
+
+    # assert
+    assert payload['sub'] == 1
+    assert payload['type'] == 'refresh'
+
+
+def test_dont_accept_a_refresh_token_as_access_token():
+    # arrange
+    refresh_token = Security.create_refresh_token(1)
+
+    # act
+    payload = Security.decode_access_token(refresh_token)
+
+    # assert
+    assert payload is None
+
+
+def test_dont_accept_an_access_token_as_refresh_token():
+    # arrange
+    access_token = Security.create_access_token({'sub': 1})
+
+    # act
+    payload = Security.decode_refresh_token(access_token)
+
+    # assert
+    assert payload is None
+
+
+def test_should_embed_the_user_profile_in_claims_mode(use_claims_mode, user):
+    # arrange
+    use_claims_mode()
+
+    # act
+    access_token = Security.create_user_access_token(user)
+
+    # assert
+    payload = Security.decode_access_token(access_token)
+    assert payload['sub'] == user.id
+    assert payload['username'] == user.username
+    assert payload['email'] == user.email
+    assert payload['ver'] == user.version
+
+
+def test_should_cache_decoded_access_tokens():
+    # arrange
+    access_token = Security.create_access_token({'sub': '123456789'})
+    first_payload = Security.decode_access_token(access_token)
+
+    # act
+    payload = Security.decode_access_token(access_token)
+
+    # assert
+    assert payload == first_payload
+    assert token_cache.stats()['hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_should_hash_and_verify_a_password_asynchronously():
+    # arrange
+    raw_password = '123456789'
+
+    # act
+    hashed_password = await Security.get_password_hash_async(raw_password)
+
+    # assert
+    assert type(hashed_password) is str
+    assert Security.verify_password(raw_password, hashed_password)
+    assert await Security.verify_password_async(raw_password, hashed_password)
+    assert not await Security.verify_password_async(
+        'invalid_password', hashed_password
+    )
+
+
+def test_should_compute_the_wrong_password_hash_once(monkeypatch):
+    # arrange
+    monkeypatch.setattr(Security, '_wrong_password_hash', None)
+    monkeypatch.delenv('WRONG_PASSWORD_HASH', raising=False)
+
+    # act
+    first_hash = Security.wrong_password_hash()
+    second_hash = Security.wrong_password_hash()
+
+    # assert
+    assert first_hash is second_hash
+    assert not Security.pwd_context.current_hasher.check_needs_rehash(
+        first_hash
+    )
@@ -0,0 +1,156 @@
+import importlib.util
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from argparse import Namespace
+from http import HTTPStatus
+
+import httpx
+import pytest
+
+from app import serve
+
+
+@pytest.fixture
+def _restore_signals():
+    handlers = {
+        signum: signal.getsignal(signum)
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+
+    yield
+
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            return httpx.get(f'{base_url}/')
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+    raise RuntimeError(f'server at {base_url} did not start in {timeout}s')
+
+
+def test_should_fall_back_to_the_stdlib_loop_and_parser(monkeypatch):
+    # arrange
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name: None)
+
+    # act / assert
+    assert serve.pick_loop() == 'asyncio'
+    assert serve.pick_http() == 'h11'
+
+
+def test_should_build_the_uvicorn_config_from_the_settings():
+    # arrange
+    args = Namespace(
+        host='127.0.0.1',
+        port=8001,
+        backlog=128,
+        keep_alive=15,
+        limit_concurrency=64,
+        graceful_timeout=10,
+        log_level='warning',
+    )
+
+    # act
+    config = serve.create_config(args)
+
+    # assert
+    assert config.app is serve.app
+    assert config.backlog == args.backlog
+    assert config.timeout_keep_alive == args.keep_alive
+    assert config.limit_concurrency == args.limit_concurrency
+    assert config.timeout_graceful_shutdown == args.graceful_timeout
+
+
+@pytest.mark.usefixtures('_restore_signals')
+def test_should_stop_when_workers_fail_to_boot(monkeypatch):
+    # arrange
+    def failing_worker(config, sock):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(serve, 'run_worker', failing_worker)
+    config = Namespace(loop='asyncio', http='h11')
+    supervisor = serve.Supervisor(config, None, workers=2, graceful_timeout=1)
+
+    # act
+    exit_code = supervisor.run()
+
+    # assert
+    assert exit_code == 1
+
+
+@pytest.mark.usefixtures('_restore_signals')
+def test_should_clear_the_metrics_and_mark_reaped_workers_dead(monkeypatch):
+    # arrange
+    def failing_worker(config, sock):
+        raise RuntimeError('boom')
+
+    calls = []
+    monkeypatch.setattr(serve, 'run_worker', failing_worker)
+    monkeypatch.setattr(
+        serve, 'clear_multiproc_dir', lambda: calls.append('clear')
+    )
+    monkeypatch.setattr(serve, 'mark_process_dead', calls.append)
+    config = Namespace(loop='asyncio', http='h11')
+    supervisor = serve.Supervisor(config, None, workers=2, graceful_timeout=1)
+
+    # act
+    supervisor.run()
+
+    # assert
+    assert calls[0] == 'clear'
+    assert len(calls[1:]) == 2  # noqa: PLR2004
+    assert all(isinstance(pid, int) for pid in calls[1:])
+
+
+def test_should_serve_from_forked_workers_and_drain_on_sigterm():
+    # arrange
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable,
+        '-m',
+        'app.serve',
+        '--host',
+        '127.0.0.1',
+        '--port',
+        str(port),
+        '--workers',
+        '2',
+        '--log-level',
+        'warning',
+    ])
+
+    try:
+        response = wait_until_ready(f'http://127.0.0.1:{port}')
+        with open(
+            f'/proc/{process.pid}/task/{process.pid}/children',
+            encoding='utf-8',
+        ) as file:
+            workers = file.read().split()
+
+        # act
+        process.send_signal(signal.SIGTERM)
+        exit_code = process.wait(timeout=30)
+    finally:
+        if process.poll() is None:
+            os.kill(process.pid, signal.SIGKILL)
+
+    # assert
+    assert response.status_code == HTTPStatus.OK
+    assert len(workers) == 2  # noqa: PLR2004
+    assert exit_code == 0
@@ -0,0 +1,394 @@
+import asyncio
+
+import pytest
+from factories import UserFactory
+from sqlalchemy import inspect, select
+
+from app.cache import user_cache, user_cache_key
+from app.config.sharding import current_tenant
+from app.hashing import create_password_hash
+from app.instrumentation import record_queries
+from app.models.user import User
+from app.schemas.user_schema import (
+    UserCreateInput,
+    UserLoginInput,
+    UserUpdateInput,
+)
+from app.security import Security
+from app.services.async_user_service import AsyncUserService
+
+
+@pytest.fixture
+def user_service(async_session):
+    return AsyncUserService(session=async_session)
+
+
+def create_many_users(session, number=5):
+    users = UserFactory.create_batch(number)
+
+    session.bulk_save_objects(users)
+    session.commit()
+
+    return users
+
+
+@pytest.mark.asyncio
+async def test_should_register_a_user_with_valid_data(
+    async_session, user_service
+):
+    # arrange
+    data = UserCreateInput(
+        username='test user', email='user@email.com', password='123456789'
+    )
+
+    # act
+    user, token = await user_service.register_user(data)
+
+    # assert
+    created_user = await async_session.scalar(
+        select(User).filter_by(username='test user')
+    )
+
+    assert created_user is not None
+    assert type(created_user.id) is int
+    assert created_user.id == user.id
+    assert created_user.username == data.username
+    assert created_user.email == data.email
+    assert created_user.password == data.password
+    assert created_user.password != '123456789'
+
+    assert token is not None
+
+
+@pytest.mark.asyncio
+async def test_should_login_a_valid_user(user, user_service):
+    # arrange
+    data = UserLoginInput(email=user.email, password='123456789')
+    # act
+    logged_user, token = await user_service.login_user(data)
+
+    # assert
+    assert logged_user is not None
+    assert logged_user.id == user.id
+    assert logged_user.email == user.email
+    assert token is not None
+
+
+@pytest.mark.asyncio
+async def test_dont_login_user_with_invalid_password(user, user_service):
+    # arrange
+    data = UserLoginInput(email=user.email, password='1111111111')
+    # act
+    result = await user_service.login_user(data)
+
+    # assert
+    assert not result
+
+
+@pytest.mark.asyncio
+async def test_dont_login_a_noexistent_user_with_invalid_email(user_service):
+    # arrange
+    data = UserLoginInput(email='noexistent@email.com', password='1111111111')
+    # act
+    result = await user_service.login_user(data)
+
+    # assert
+    assert not result
+
+
+@pytest.mark.asyncio
+async def test_should_rehash_a_stale_password_on_login(
+    async_session, session, user_service
+):
+    # arrange
+    stale_context = create_password_hash(
+        time_cost=1, memory_cost=8192, parallelism=1
+    )
+    user = UserFactory(password=stale_context.hash('123456789'))
+    session.add(user)
+    session.commit()
+    stale_hash = user.password
+    data = UserLoginInput(email=user.email, password='123456789')
+
+    # act
+    logged_user, _ = await user_service.login_user(data)
+
+    # assert
+    password_hash = await async_session.scalar(
+        select(User.password).filter_by(id=logged_user.id)
+    )
+
+    assert password_hash != stale_hash
+    assert Security.verify_password('123456789', password_hash)
+    assert not Security.pwd_context.current_hasher.check_needs_rehash(
+        password_hash
+    )
+
+
+@pytest.mark.asyncio
+async def test_should_return_a_user_from_a_valid_token(user, user_service):
+    # arrange
+    token = user_service.security.create_access_token(data={'sub': user.id})
+
+    # act
+    user_from_token = await user_service.get_user_from_token(token)
+
+    # assert
+    assert user_from_token is not None
+    assert user_from_token.id == user.id
+    assert user_from_token.email == user.email
+
+
+@pytest.mark.asyncio
+async def test_should_cache_the_user_from_a_valid_token(user, user_service):
+    # arrange
+    token = user_service.security.create_access_token(data={'sub': user.id})
+    await user_service.get_user_from_token(token)
+
+    # act
+    user_from_token = await user_service.get_user_from_token(token)
+
+    # assert
+    assert user_from_token.id == user.id
+    assert user_cache.stats()['hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_should_invalidate_the_cached_user_on_update(user, user_service):
+    # arrange
+    token = user_service.security.create_access_token(data={'sub': user.id})
+    await user_service.get_user_from_token(token)
+
+    # act
+    await user_service.update_user(
+        user.id, UserUpdateInput(username='test update user')
+    )
+    user_from_token = await user_service.get_user_from_token(token)
+
+    # assert
+    assert user_from_token.username == 'test update user'
+
+
+@pytest.mark.asyncio
+async def test_should_invalidate_the_cached_user_on_delete(user, user_service):
+    # arrange
+    token = user_service.security.create_access_token(data={'sub': user.id})
+    await user_service.get_user_from_token(token)
+
+    # act
+    await user_service.delete_user(user.id)
+    user_from_token = await user_service.get_user_from_token(token)
+
+    # assert
+    assert user_from_token is None
+
+
+@pytest.mark.asyncio
+async def test_should_return_none_user_from_a_ivalid_token(user_service):
+    # arrange
+    token = 'invalid-access-token'
+
+    # act
+    user_from_token = await user_service.get_user_from_token(token)
+
+    # assert
+    assert user_from_token is None
+
+
+@pytest.mark.asyncio
+async def test_should_return_a_principal_from_the_database(user, user_service):
+    # arrange
+    token = Security.create_user_access_token(user)
+
+    # act
+    principal = await user_service.get_principal_from_token(token)
+
+    # assert
+    assert principal.id == user.id
+    assert principal.email == user.email
+    assert principal.version == user.version
+
+
+@pytest.mark.asyncio
+async def test_should_return_a_principal_from_claims_only(
+    use_claims_mode, user, user_service
+):
+    # arrange
+    use_claims_mode()
+    token = Security.create_user_access_token(user)
+    await user_service.delete_user(user.id)
+
+    # act
+    principal = await user_service.get_principal_from_token(token)
+
+    # assert
+    assert principal.id == user.id
+    assert principal.username == user.username
+
+
+@pytest.mark.asyncio
+async def test_should_refresh_tokens_of_an_existent_user(user, user_service):
+    # arrange
+    refresh_token = Security.create_refresh_token(user.id)
+
+    # act
+    access_token, new_refresh_token = await user_service.refresh_tokens(
+        refresh_token
+    )
+
+    # assert
+    assert Security.decode_access_token(access_token)['sub'] == user.id
+    assert Security.decode_refresh_token(new_refresh_token)['sub'] == user.id
+
+
+@pytest.mark.asyncio
+async def test_dont_refresh_tokens_of_a_deleted_user(user, user_service):
+    # arrange
+    refresh_token = Security.create_refresh_token(user.id)
+    await user_service.delete_user(user.id)
+
+    # act
+    result = await user_service.refresh_tokens(refresh_token)
+
+    # assert
+    assert result is None
+
+
+@pytest.mark.asyncio
+async def test_should_return_all_users(session, user_service):
+    # arrange
+    NUM_USERS = 5
+    create_many_users(session, number=NUM_USERS)
+
+    # act
+    returned_users = await user_service.get_all_users()
+
+    # assert
+    assert len(returned_users) == NUM_USERS
+
+
+@pytest.mark.asyncio
+async def test_should_update_a_user_with_valid_data(user, user_service):
+    # arrange
+    data = UserUpdateInput(
+        username='test update user', email='update_user@email.com'
+    )
+
+    # act
+    returned_user = await user_service.update_user(user.id, data)
+
+    # assert
+    assert returned_user.id == user.id
+    assert returned_user.username == 'test update user'
+    assert returned_user.version == user.version + 1
+
+
+@pytest.mark.asyncio
+async def test_should_delete_a_user_by_id(user, user_service):
+    # arrange
+    # act
+    return_value = await user_service.delete_user(user.id)
+
+    # assert
+    assert return_value
+    assert await user_service.get_user_by_id(user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_should_query_the_user_once_for_a_burst_of_lookups(
+    user, async_engine, async_session_factory
+):
+    # arrange
+    token = Security.create_access_token(data={'sub': user.id})
+    burst = 20
+
+    async def get_user():
+        # a session per caller, as every request gets its own
+        async with async_session_factory() as session:
+            return await AsyncUserService(session).get_user_from_token(token)
+
+    # act
+    with record_queries(async_engine.sync_engine) as stats:
+        users = await asyncio.gather(*[get_user() for _ in range(burst)])
+
+    # assert
+    assert stats.count == 1
+    assert {found.id for found in users} == {user.id}
+    assert all(inspect(found).detached for found in users)
+
+
+@pytest.mark.asyncio
+async def test_should_introspect_tokens_with_a_single_query(
+    use_claims_mode, session, async_engine, user_service
+):
+    # arrange
+    users = UserFactory.create_batch(3)
+    session.add_all(users)
+    session.commit()
+    deleted_user = users[2]
+    session.delete(deleted_user)
+    session.commit()
+    tokens = [
+        Security.create_user_access_token(users[0]),
+        'invalid token',
+        Security.create_user_access_token(users[1]),
+        Security.create_refresh_token(users[0].id),
+        Security.create_user_access_token(users[0]),
+        Security.create_user_access_token(deleted_user),
+    ]
+    use_claims_mode()
+    tokens.append(Security.create_user_access_token(deleted_user))
+
+    # act
+    with record_queries(async_engine.sync_engine) as stats:
+        results = await user_service.introspect_tokens(tokens)
+
+    # assert
+    assert stats.count == 1
+    assert [result['active'] for result in results] == [
+        True,
+        False,
+        True,
+        False,
+        True,
+        False,
+        True,
+    ]
+    assert results[0]['user']['id'] == users[0].id
+    assert results[0]['claims']['sub'] == users[0].id
+    assert results[2]['user']['email'] == users[1].email
+    assert results[6]['user']['id'] == deleted_user.id
+
+
+@pytest.mark.asyncio
+async def test_should_introspect_tokens_of_cached_users_without_queries(
+    async_engine, user, user_service
+):
+    # arrange
+    token = Security.create_user_access_token(user)
+    await user_service.introspect_tokens([token])
+
+    # act
+    with record_queries(async_engine.sync_engine) as stats:
+        results = await user_service.introspect_tokens([token])
+
+    # assert
+    assert stats.count == 0
+    assert results[0]['active']
+    assert inspect(user_cache.get(user_cache_key(user.id))).detached
+
+
+@pytest.mark.asyncio
+async def test_dont_introspect_tokens_of_another_tenant(user, user_service):
+    # arrange
+    tenant = current_tenant.set('pizzeria')
+    token = Security.create_user_access_token(user)
+    current_tenant.reset(tenant)
+    tenant = current_tenant.set('burger-place')
+
+    # act
+    results = await user_service.introspect_tokens([token])
+
+    # assert
+    current_tenant.reset(tenant)
+    assert results == [{'active': False}]
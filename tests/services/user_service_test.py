@@ -1,12 +1,19 @@
+import statistics
+import time
+
 import pytest
 from factories import UserFactory
 
+from app.cache import user_cache
+from app.hashing import create_password_hash
+from app.instrumentation import record_queries
 from app.models.user import User
 from app.schemas.user_schema import (
     UserCreateInput,
     UserLoginInput,
     UserUpdateInput,
 )
+from app.security import Security
 from app.services.user_service import UserService
 
 
@@ -15,6 +22,30 @@ def user_service(session):
     return UserService(session=session)
 
 
+def measure_login_latency(user_service, emails, samples):
+    # interleaved, so drift in machine load hits every email alike
+    latencies = {email: [] for email in emails}
+
+    for _ in range(samples):
+        for email in emails:
+            data = UserLoginInput(email=email, password='wrong-password')
+            started_at = time.perf_counter()
+            user_service.login_user(data)
+            latencies[email].append(time.perf_counter() - started_at)
+
+    return latencies
+
+
+def assert_same_distribution(first, second, tolerance=0.25):
+    first_quartiles = statistics.quantiles(first, n=4)
+    second_quartiles = statistics.quantiles(second, n=4)
+
+    for first_value, second_value in zip(first_quartiles, second_quartiles):
+        assert abs(first_value - second_value) <= tolerance * max(
+            first_value, second_value
+        )
+
+
 def create_many_users(session, number=5):
     users = UserFactory.create_batch(number)
 
@@ -80,6 +111,72 @@ def test_dont_login_a_noexistent_user_with_invalid_email(user_service):
     assert not result
 
 
+def test_should_rehash_a_stale_password_on_login(session, user_service):
+    # arrange
+    stale_context = create_password_hash(
+        time_cost=1, memory_cost=8192, parallelism=1
+    )
+    user = UserFactory(password=stale_context.hash('123456789'))
+    session.add(user)
+    session.commit()
+    stale_hash = user.password
+    data = UserLoginInput(email=user.email, password='123456789')
+
+    # act
+    logged_user, _ = user_service.login_user(data)
+
+    # assert
+    session.expire_all()
+    password_hash = session.get(User, logged_user.id).password
+
+    assert password_hash != stale_hash
+    assert Security.verify_password('123456789', password_hash)
+    assert not Security.pwd_context.current_hasher.check_needs_rehash(
+        password_hash
+    )
+
+
+def test_should_keep_a_current_password_hash_on_login(
+    session, user, user_service
+):
+    # arrange
+    data = UserLoginInput(email=user.email, password='123456789')
+
+    # act
+    user_service.login_user(data)
+
+    # assert
+    session.expire_all()
+
+    assert session.get(User, user.id).password == user.password
+
+
+def test_should_take_as_long_for_unknown_emails_as_for_known_ones(
+    monkeypatch, session, user_service
+):
+    # arrange
+    # cheap costs keep the harness fast, the dummy hash must follow them
+    monkeypatch.setattr(
+        Security,
+        'pwd_context',
+        create_password_hash(time_cost=1, memory_cost=8192, parallelism=1),
+    )
+    monkeypatch.setattr(Security, '_wrong_password_hash', None)
+    user = UserFactory(password=Security.get_password_hash('123456789'))
+    session.add(user)
+    session.commit()
+
+    # act
+    latencies = measure_login_latency(
+        user_service, [user.email, 'noexistent@email.com'], samples=20
+    )
+
+    # assert
+    assert_same_distribution(
+        latencies[user.email], latencies['noexistent@email.com']
+    )
+
+
 def test_should_return_a_user_from_a_valid_token(user, user_service):
     # arrange
     data = UserLoginInput(email=user.email, password='123456789')
@@ -94,6 +191,22 @@ def test_should_return_a_user_from_a_valid_token(user, user_service):
     assert user_from_token.email == user.email
 
 
+def test_should_invalidate_the_cached_user_on_update(user, user_service):
+    # arrange
+    token = user_service.security.create_access_token(data={'sub': user.id})
+    user_service.get_user_from_token(token)
+
+    # act
+    user_service.update_user(
+        user.id, UserUpdateInput(username='test update user')
+    )
+    user_from_token = user_service.get_user_from_token(token)
+
+    # assert
+    assert user_cache.stats()['hits'] == 0
+    assert user_from_token.username == 'test update user'
+
+
 def test_should_return_none_user_from_a_ivalid_token(user, user_service):
     # arrange
     token = 'invalid-access-token'
@@ -181,3 +294,24 @@ def test_should_returns_none_on_delete_nonexistent_use(user_service):
 
     # assert
     assert return_value is None
+
+
+def test_should_introspect_tokens_of_users_loaded_together(
+    session, user_service
+):
+    # arrange
+    users = UserFactory.create_batch(2)
+    session.add_all(users)
+    session.commit()
+    tokens = [Security.create_user_access_token(user) for user in users]
+
+    # act
+    with record_queries(session.get_bind()) as stats:
+        results = user_service.introspect_tokens([*tokens, 'invalid token'])
+
+    # assert
+    assert stats.count == 1
+    assert [result['active'] for result in results] == [True, True, False]
+    assert [result['user']['id'] for result in results[:2]] == [
+        user.id for user in users
+    ]
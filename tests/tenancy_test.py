@@ -0,0 +1,231 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from factories import UserFactory
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.datastructures import Headers
+
+from app import tenancy
+from app.config import database, sharding
+from app.config.database import (
+    create_async_database_engine,
+    get_async_database_url,
+    get_async_session,
+)
+from app.config.sharding import HashRing, current_tenant
+from app.security import Security
+
+
+@pytest.fixture
+def _tenant_domain(monkeypatch):
+    monkeypatch.setattr(
+        tenancy,
+        'settings',
+        tenancy.settings.copy(update={'tenant_domain': 'restaurants.app'}),
+    )
+
+
+@pytest.mark.usefixtures('_tenant_domain')
+def test_should_resolve_the_tenant_by_precedence():
+    # arrange
+    token = current_tenant.set('from-claim')
+    claim_token = Security.create_access_token(data={'sub': 1})
+    current_tenant.reset(token)
+
+    host = {'host': 'from-subdomain.restaurants.app:8000'}
+    header = {'x-tenant': 'From-Header'}
+    authorization = {'authorization': f'Bearer {claim_token}'}
+
+    # act / assert
+    assert tenancy.resolve_tenant(Headers(host)) == 'from-subdomain'
+    assert tenancy.resolve_tenant(Headers({**host, **header})) == 'from-header'
+    assert (
+        tenancy.resolve_tenant(Headers({**host, **header, **authorization}))
+        == 'from-claim'
+    )
+    assert tenancy.resolve_tenant(Headers({})) == 'default'
+
+
+def test_should_reject_an_invalid_tenant(client):
+    # act
+    response = client.get('/', headers={'X-Tenant': 'not a tenant'})
+
+    # assert
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.fixture
+def pizzeria_user(session):
+    user = UserFactory(tenant_id='pizzeria')
+
+    session.add(user)
+    session.commit()
+
+    user.clean_password = '123456789'
+
+    return user
+
+
+def login(client, user, tenant):
+    return client.post(
+        '/auth/login/',
+        json={'email': user.email, 'password': user.clean_password},
+        headers={'X-Tenant': tenant},
+    )
+
+
+def test_should_issue_tokens_bound_to_the_tenant(client, pizzeria_user):
+    # act
+    response = login(client, pizzeria_user, 'pizzeria')
+
+    # assert
+    data = response.json()['data']
+    access_payload = Security.decode_access_token(data['access_token'])
+    refresh_payload = Security.decode_refresh_token(data['refresh_token'])
+
+    assert access_payload['tnt'] == 'pizzeria'
+    assert refresh_payload['tnt'] == 'pizzeria'
+
+
+def test_dont_log_in_a_user_of_another_tenant(client, user):
+    # act
+    response = login(client, user, 'pizzeria')
+
+    # assert
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_should_keep_the_same_email_apart_in_every_tenant(client, user):
+    # arrange
+    data = {
+        'username': user.username,
+        'email': user.email,
+        'password': 'another-password',
+    }
+
+    # act
+    response = client.post(
+        '/auth/register/', json=data, headers={'X-Tenant': 'pizzeria'}
+    )
+    pizzeria_login = client.post(
+        '/auth/login/',
+        json={'email': user.email, 'password': 'another-password'},
+        headers={'X-Tenant': 'pizzeria'},
+    )
+    default_login = login(client, user, 'default')
+
+    # assert
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['data']['user']['id'] != user.id
+    assert pizzeria_login.status_code == HTTPStatus.OK
+    assert default_login.status_code == HTTPStatus.OK
+
+
+def test_dont_list_the_users_of_another_tenant(
+    client, session, user, pizzeria_user
+):
+    # arrange
+    user.is_admin = True
+    session.commit()
+    token = Security.create_user_access_token(user)
+    headers = {'Authorization': f'Bearer {token}', 'X-Tenant': 'pizzeria'}
+
+    # act
+    listed = client.get('/users/', headers=headers)
+    exported = client.get('/users/export/', headers=headers)
+
+    # assert
+    assert [found['id'] for found in listed.json()['data']['users']] == [
+        user.id
+    ]
+    assert [json.loads(line)['id'] for line in exported.text.splitlines()] == [
+        user.id
+    ]
+
+
+def test_dont_accept_a_token_of_another_tenant(client, pizzeria_user):
+    # arrange
+    # signed with the server key, but naming the wrong tenant
+    token = Security.create_access_token(
+        data={'sub': pizzeria_user.id, 'tnt': 'default'}
+    )
+
+    # act
+    response = client.get(
+        '/auth/me/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    # assert
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_dont_refresh_a_token_of_another_tenant(client, pizzeria_user):
+    # arrange
+    token = current_tenant.set('pizzeria')
+    refresh_token = Security.create_refresh_token(pizzeria_user.id)
+    current_tenant.reset(token)
+
+    # act
+    other_tenant = client.post(
+        '/auth/refresh/',
+        json={'refresh_token': refresh_token},
+        headers={'X-Tenant': 'burgers'},
+    )
+    same_tenant = client.post(
+        '/auth/refresh/',
+        json={'refresh_token': refresh_token},
+        headers={'X-Tenant': 'pizzeria'},
+    )
+
+    # assert
+    assert other_tenant.status_code == HTTPStatus.UNAUTHORIZED
+    assert same_tenant.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_should_yield_a_session_of_the_tenant_shard(
+    monkeypatch, tmp_path
+):
+    # arrange
+    engines = {
+        name: create_async_database_engine(
+            get_async_database_url(f'sqlite:///{tmp_path / name}.sqlite')
+        )
+        for name in ('shard-0', 'shard-1')
+    }
+    ring = HashRing(list(engines))
+    monkeypatch.setattr(sharding, 'shard_ring', ring)
+    monkeypatch.setattr(
+        database,
+        'async_shard_sessions',
+        {
+            name: async_sessionmaker(bind=engine)
+            for name, engine in engines.items()
+        },
+    )
+    tenants = {
+        ring.node_for(f'tenant-{index}'): f'tenant-{index}'
+        for index in range(20)
+    }
+
+    # act
+    binds = {}
+
+    for shard, tenant in tenants.items():
+        token = current_tenant.set(tenant)
+        sessions = get_async_session()
+        session = await anext(sessions)
+        await session.execute(select(1))
+        binds[shard] = session.get_bind()
+        await sessions.aclose()
+        current_tenant.reset(token)
+
+    # assert
+    assert binds == {
+        name: engine.sync_engine for name, engine in engines.items()
+    }
+
+    for engine in engines.values():
+        await engine.dispose()
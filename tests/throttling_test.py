@@ -0,0 +1,206 @@
+import ipaddress
+import threading
+from http import HTTPStatus
+
+import pytest
+
+from app import security
+from app.throttling import (
+    LoginThrottle,
+    MemoryThrottleBackend,
+    SlidingWindowLimiter,
+    SQLiteThrottleBackend,
+    ThrottledError,
+    client_ip,
+    login_throttle,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_limiter(backend, limit=3, window=60):
+    limiter = SlidingWindowLimiter('test', limit, window, backend, buckets=6)
+    limiter.clock = FakeClock()
+
+    return limiter
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / 'throttle.sqlite')
+
+
+@pytest.mark.parametrize('backend_name', ['memory', 'sqlite'])
+def test_should_throttle_keys_over_the_limit_in_the_window(
+    backend_name, sqlite_path
+):
+    # arrange
+    backend = (
+        SQLiteThrottleBackend(sqlite_path)
+        if backend_name == 'sqlite'
+        else MemoryThrottleBackend()
+    )
+    limiter = make_limiter(backend)
+
+    # act
+    for _ in range(limiter.limit):
+        limiter.hit('user@test.com')
+
+    with pytest.raises(ThrottledError) as exc_info:
+        limiter.hit('user@test.com')
+
+    limiter.hit('other@test.com')
+
+    # assert
+    assert exc_info.value.key == 'test:user@test.com'
+    assert 0 < exc_info.value.retry_after <= limiter.window
+
+
+def test_should_slide_old_hits_out_of_the_window():
+    # arrange
+    limiter = make_limiter(MemoryThrottleBackend())
+
+    for _ in range(limiter.limit):
+        limiter.hit('user@test.com')
+        limiter.clock.now += limiter.bucket_width
+
+    # act
+    limiter.clock.now += limiter.window - limiter.limit * limiter.bucket_width
+    limiter.hit('user@test.com')
+
+    limiter.clock.now += limiter.window
+
+    for _ in range(limiter.limit):
+        limiter.hit('user@test.com')
+
+    # assert
+    with pytest.raises(ThrottledError):
+        limiter.hit('user@test.com')
+
+
+def test_should_not_throttle_when_the_limit_is_zero():
+    # arrange
+    backend = MemoryThrottleBackend()
+    limiter = make_limiter(backend, limit=0)
+
+    # act
+    for _ in range(10):
+        limiter.hit('user@test.com')
+
+    # assert
+    assert len(backend) == 0
+
+
+@pytest.mark.parametrize(
+    ('client_host', 'forwarded_for', 'expected'),
+    [
+        ('10.0.0.1', '203.0.113.7', '203.0.113.7'),
+        ('10.0.0.1', '198.51.100.1, 203.0.113.7, 10.0.0.2', '203.0.113.7'),
+        ('10.0.0.1', '10.0.0.3, 10.0.0.2', '10.0.0.3'),
+        ('10.0.0.1', None, '10.0.0.1'),
+        ('192.0.2.1', '203.0.113.7', '192.0.2.1'),
+        (None, '203.0.113.7', None),
+    ],
+)
+def test_should_take_the_client_ip_from_trusted_proxies(
+    client_host, forwarded_for, expected
+):
+    # arrange
+    proxies = (ipaddress.ip_network('10.0.0.0/8'),)
+
+    # act
+    ip = client_ip(client_host, forwarded_for, proxies)
+
+    # assert
+    assert ip == expected
+
+
+def test_should_evict_the_least_recently_hit_keys():
+    # arrange
+    backend = MemoryThrottleBackend(max_keys=2)
+    limiter = make_limiter(backend, limit=1)
+
+    limiter.hit('first')
+    limiter.hit('second')
+
+    # act
+    limiter.hit('third')
+
+    # assert
+    assert len(backend) == backend.max_keys
+    limiter.hit('first')
+
+    with pytest.raises(ThrottledError):
+        limiter.hit('third')
+
+
+def test_should_share_windows_between_sqlite_backends(sqlite_path):
+    # arrange
+    first_worker = make_limiter(SQLiteThrottleBackend(sqlite_path), limit=1)
+    second_worker = make_limiter(SQLiteThrottleBackend(sqlite_path), limit=1)
+
+    # act
+    first_worker.hit('user@test.com')
+
+    # assert
+    with pytest.raises(ThrottledError):
+        second_worker.hit('user@test.com')
+
+
+@pytest.mark.asyncio
+async def test_should_hit_the_sqlite_backend_off_the_event_loop(sqlite_path):
+    # arrange
+    backend = SQLiteThrottleBackend(sqlite_path)
+    throttle = LoginThrottle(backend)
+    hit = backend.hit
+    threads = []
+
+    def recording_hit(*args):
+        threads.append(threading.get_ident())
+        return hit(*args)
+
+    backend.hit = recording_hit
+
+    # act
+    await throttle.hit_async('user@test.com', '127.0.0.1')
+
+    # assert
+    assert len(threads) == 2  # noqa: PLR2004
+    assert threading.get_ident() not in threads
+
+
+def test_should_throttle_logins_before_verifying_the_password(
+    monkeypatch, client, user
+):
+    # arrange
+    verified = []
+    verify_and_update = security.Security.verify_and_update_password_async
+
+    async def counting_verify(plain_password, hashed_password):
+        verified.append(plain_password)
+        return await verify_and_update(plain_password, hashed_password)
+
+    monkeypatch.setattr(
+        security.Security,
+        'verify_and_update_password_async',
+        staticmethod(counting_verify),
+    )
+    monkeypatch.setattr(login_throttle.email_limiter, 'limit', 1)
+    data = {'email': user.email.upper(), 'password': 'wrong-password'}
+
+    # act
+    first = client.post('/auth/login/', json=data)
+    second = client.post('/auth/login/', json=data)
+
+    # assert
+    assert first.status_code == HTTPStatus.UNAUTHORIZED
+    assert second.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert second.json()['message'] == 'too many requests error'
+    assert int(second.headers['retry-after']) >= 1
+    assert verified == [data['password']]
@@ -0,0 +1,58 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.watchdog import LoopWatchdog
+
+
+def test_should_report_a_route_that_blocks_the_event_loop():
+    # arrange
+    watchdog = LoopWatchdog(enabled=True, threshold=0.05)
+    app = FastAPI()
+
+    @app.on_event('startup')
+    async def start_watchdog():
+        await watchdog.start()
+
+    @app.on_event('shutdown')
+    async def stop_watchdog():
+        await watchdog.stop()
+
+    @app.get('/blocking/{item_id}')
+    async def blocking_route(item_id: int):
+        time.sleep(0.3)
+        return {'item_id': item_id}
+
+    # act
+    with TestClient(app) as client:
+        client.get('/blocking/1')
+
+    # assert
+    assert len(watchdog.reports) == 1
+
+    report = watchdog.reports[0]
+    assert report.route == '/blocking/{item_id}'
+    assert report.function == 'blocking_route'
+    assert 'time.sleep(0.3)' in report.stack
+
+
+def test_dont_start_a_disabled_watchdog():
+    # arrange
+    watchdog = LoopWatchdog(enabled=False, threshold=0.05)
+    app = FastAPI()
+
+    @app.on_event('startup')
+    async def start_watchdog():
+        await watchdog.start()
+
+    @app.get('/blocking')
+    async def blocking_route():
+        time.sleep(0.2)
+
+    # act
+    with TestClient(app) as client:
+        client.get('/blocking')
+
+    # assert
+    assert watchdog.reports == []